@@ -3,15 +3,31 @@ Application principale Streamlit
 """
 
 import streamlit as st
-import pandas as pd
+import os
+import shutil
+import tempfile
 import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 
 from bots_checker import BotsChecker
+from core import instrumentation
+from core.cancellation import CancellationToken
+from core.export import available_exporters, missing_requirements
+from core.log_analyzer import LogAnalyzer
+from core.profiling import RunProfiler
+from core.result_cache import MemoryCacheBackend, ResultCache
+from core.robots_audit import RobotsAudit
 from ui.components import UIComponents
+from ui.log_display import LogAnalysisDisplay
 from ui.results_display import ResultsDisplay
 
 
+# Nombre d'URLs vérifiées en parallèle et intervalle de rafraîchissement de la vue (s)
+ANALYSIS_WORKERS = 4
+REFRESH_INTERVAL = 1.0
+
 # Configuration de la page
 st.set_page_config(
     page_title="AI Crawlers & Robots.txt Checker",
@@ -21,25 +37,119 @@ st.set_page_config(
 )
 
 
-def main():
-    """Fonction principale de l'application"""
-    # Initialisation des composants
-    ui_components = UIComponents()
-    results_display = ResultsDisplay()
+@st.cache_resource
+def get_result_cache():
+    """Cache de résultats partagé par toutes les sessions du processus"""
+    return ResultCache(MemoryCacheBackend(max_entries=50000), ttl=3600)
+
+
+@st.cache_resource
+def get_ui():
+    """Composants d'interface sans état, créés une seule fois par processus et non à chaque rerun"""
+    return UIComponents(), ResultsDisplay(), LogAnalysisDisplay()
+
+
+@st.cache_resource
+def get_instrumentation():
+    """Instrumentation (compteurs, histogrammes, spans) configurée par UA_CHECKER_METRICS"""
+    return instrumentation.configure_from_env()
+
+
+def check_url(checker, url, selected_bots, token):
+    """Analyse d'une URL (exécutée dans un thread du pool)"""
+    result = checker.check_robots_txt(url, selected_bots, token)
+    result['original_url'] = url
+    return result
+
+
+def audit_site(audit, url, selected_bots, token):
+    """Audit robots.txt seul d'un site (bots fixés par l'audit) : un résultat par chemin évalué"""
+    return audit.check_site(url, token)
+
+
+def run_analysis(urls, selected_bots, results_display, deadline=None, audit_paths=None):
+    """Analyse des URLs avec affichage incrémental des résultats
     
-    # Appliquer les styles
-    ui_components.render_css()
+    Les URLs sont vérifiées par un pool de threads ; le script ne fait que
+    collecter les résultats terminés et redessine la vue en direct à une
+    fréquence bornée. Chaque résultat est stocké dès réception en session :
+    un clic sur « Arrêter » relance le script et conserve les résultats partiels.
+    Le jeton d'annulation interrompt alors les requêtes en cours ; passé
+    `deadline` secondes, les tests restants sont rapportés en NA.
     
-    # Initialisation des variables de session
-    if 'current_urls' not in st.session_state:
-        st.session_state.current_urls = []
+    Avec `audit_paths` (liste éventuellement vide), seul le robots.txt de
+    chaque site est récupéré : l'URL et ces chemins sont évalués sans
+    requête vers les pages.
+    """
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    st.button("⏹️ Arrêter l'analyse", key="stop_analysis")
+    live_view = st.empty()
     
-    # Sidebar
-    selected_bots = ui_components.render_sidebar()
+    run_id = uuid.uuid4().hex
+    completed = []
+    positions = []
+    st.session_state.results = completed
+    st.session_state.results_version = f"{run_id}:0"
+    st.session_state.selected_bots = selected_bots
+    st.session_state.analysis_timestamp = datetime.now()
+    st.session_state.analysis_running = True
     
-    # En-tête principal
-    ui_components.render_header()
+    token = CancellationToken.with_timeout(deadline)
+    if audit_paths is None:
+        task, checker, workers = check_url, BotsChecker(cache=get_result_cache()), ANALYSIS_WORKERS
+    else:
+        checker = RobotsAudit(audit_paths, selected_bots, cache=get_result_cache())
+        task, workers = audit_site, checker.workers
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = set()
+    try:
+        futures = {
+            executor.submit(task, checker, url, selected_bots, token): i
+            for i, url in enumerate(urls)
+        }
+        pending = set(futures)
+        next_refresh = 0.0
+        
+        while pending:
+            done, pending = wait(pending, timeout=REFRESH_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in done:
+                # Un site audité par robots.txt seul donne un résultat par chemin évalué
+                value = future.result()
+                site_results = value if isinstance(value, list) else [value]
+                positions.extend((futures[future], index) for index in range(len(site_results)))
+                completed.extend(site_results)
+            st.session_state.results_version = f"{run_id}:{len(completed)}"
+            
+            # Rafraîchissement borné : au plus un rendu par intervalle, et jamais plus
+            # d'un tiers du temps passé à redessiner sur les gros volumes
+            if time.monotonic() >= next_refresh or not pending:
+                render_start = time.monotonic()
+                sites_done = len(futures) - len(pending)
+                progress_bar.progress(sites_done / len(urls))
+                status_text.info(f"🔍 Analyse en cours: **{sites_done}/{len(urls)}** URLs")
+                if completed:
+                    frame = results_display.get_frame(completed, st.session_state.results_version)
+                    with live_view.container():
+                        results_display.render_live_summary(frame, selected_bots)
+                render_time = time.monotonic() - render_start
+                next_refresh = time.monotonic() + max(REFRESH_INTERVAL, 2 * render_time)
+    finally:
+        # Analyse interrompue : le jeton coupe les requêtes encore en vol
+        if pending:
+            token.cancel()
+        executor.shutdown(wait=False, cancel_futures=True)
+        instrumentation.flush()
     
+    # Analyse complète : résultats remis dans l'ordre de saisie
+    completed[:] = [result for _, result in sorted(zip(positions, completed), key=lambda pair: pair[0])]
+    st.session_state.results_version = f"{run_id}:done"
+    st.session_state.analysis_running = False
+    status_text.success("✅ **Analyse terminée avec succès!**")
+
+
+def render_robots_check(ui_components, results_display, selected_bots, run_deadline, profiling, audit_paths=None):
+    """Onglet de vérification des robots.txt : saisie des URLs, analyse, résultats et export"""
     # Interface principale
     urls = ui_components.render_url_input()
     
@@ -71,47 +181,42 @@ def main():
     with col_btn2:
         button_key = f"launch_analysis_{len(current_urls)}_{len(selected_bots)}_{hash(str(current_urls))}"
         
-        if st.button(
+        launch = st.button(
             "🚀 Lancer l'analyse", 
             type="primary", 
             disabled=launch_disabled,
             use_container_width=True,
             key=button_key
-        ):
-            if len(current_urls) > 0 and len(selected_bots) > 0:
-                # Barre de progression
-                progress_bar = st.progress(0)
-                status_text = st.empty()
-                
-                results = []
-                
-                for i, url in enumerate(current_urls):
-                    status_text.info(f"🔍 Analyse en cours: **{url}** ({i+1}/{len(current_urls)})")
-                    
-                    # Analyse avec le checker
-                    checker = BotsChecker()
-                    result = checker.check_robots_txt(url, selected_bots)
-                    result['original_url'] = url
-                    results.append(result)
-                    
-                    # Update progress
-                    progress = (i + 1) / len(current_urls)
-                    progress_bar.progress(progress)
-                    
-                    time.sleep(0.1)
-                
-                status_text.success("✅ **Analyse terminée avec succès!**")
-                
-                # Stocker les résultats
-                st.session_state.results = results
-                st.session_state.selected_bots = selected_bots
-                st.session_state.analysis_timestamp = datetime.now()
-                
-                st.rerun()
+        )
+    
+    # Une analyse encore marquée en cours a été interrompue par une interaction (bouton Arrêter)
+    if st.session_state.get('analysis_running'):
+        st.session_state.analysis_running = False
+        st.warning(
+            f"⏹️ Analyse interrompue : {len(st.session_state.get('results', []))} URL(s) analysée(s), "
+            "résultats partiels conservés"
+        )
+    
+    if launch and len(current_urls) > 0 and len(selected_bots) > 0:
+        # Le profileur reste actif jusqu'à la fin du rendu des résultats (rerun suivant)
+        if profiling:
+            st.session_state.active_profiler = RunProfiler().start()
+        st.session_state.pop('profile_report', None)
+        run_analysis(current_urls, selected_bots, results_display, run_deadline, audit_paths)
+        st.rerun()
     
     # Affichage des résultats
     if hasattr(st.session_state, 'results') and st.session_state.results:
-        results_display.render_results(st.session_state.results, st.session_state.selected_bots)
+        results_version = st.session_state.get('results_version')
+        results_display.render_results(
+            st.session_state.results, st.session_state.selected_bots, results_version
+        )
+        
+        profiler = st.session_state.pop('active_profiler', None)
+        if profiler is not None:
+            st.session_state.profile_report = profiler.stop()
+        if st.session_state.get('profile_report') is not None:
+            ui_components.render_profile_report(st.session_state.profile_report)
         
         # Section Export
         st.markdown("---")
@@ -120,36 +225,109 @@ def main():
         col_center1, col_center2, col_center3 = st.columns([2, 1, 2])
         
         with col_center2:
-            if st.button("📊 Générer rapport Excel", type="secondary", use_container_width=True):
-                # Préparer les données pour Excel
-                excel_data = []
-                for result in st.session_state.results:
-                    if 'error' in result:
-                        excel_data.append({
-                            'URL': result['original_url'],
-                            'Status': 'Error',
-                            'Error': result['error'],
-                            'Bot': '', 'Test_Details': '',
-                            'Timestamp': result.get('timestamp', '')
-                        })
-                    else:
-                        for bot, bot_result in result['results'].items():
-                            for test in bot_result.get('tests', []):
-                                excel_data.append({
-                                    'URL': result['original_url'],
-                                    'Status': 'Success',
-                                    'Error': '',
-                                    'Bot': f"{bot}_{test['user_agent_name']}",
-                                    'Test_Details': f"Status: {test['status']}, Reason: {test['reason']}",
-                                    'Timestamp': result.get('timestamp', '')
-                                })
-                
-                df_export = pd.DataFrame(excel_data)
+            exporters = available_exporters()
+            export_format = st.selectbox(
+                "Format",
+                list(exporters),
+                format_func=lambda name: exporters[name].label,
+                key="export_format"
+            )
+            exporter = exporters[export_format]
+            missing = missing_requirements()
+            if missing:
+                st.caption(
+                    f"Formats indisponibles : {', '.join(missing)} "
+                    f"(pip install {' '.join(sorted(set(missing.values())))})"
+                )
+            
+            if st.button("📊 Générer l'export", type="secondary", use_container_width=True):
+                # Export en streaming depuis la vue tabulaire des résultats
+                frame = results_display.get_frame(st.session_state.results, results_version)
                 timestamp = st.session_state.analysis_timestamp.strftime('%Y%m%d_%H%M%S')
-                filename = f"robots_analysis_{timestamp}.xlsx"
+                filename = f"robots_analysis_{timestamp}.{exporter.extension}"
                 
-                st.markdown(ui_components.get_download_link(df_export, filename), unsafe_allow_html=True)
-                st.success("📄 Rapport Excel généré!")
+                ui_components.render_download_button(
+                    exporter, frame, filename, label=f"📥 Télécharger {exporter.label}"
+                )
+                st.success(f"📄 Export {exporter.label} généré!")
+
+
+def run_log_analysis(paths, uploaded, options):
+    """Analyse des journaux avec barre de progression ; les fichiers envoyés passent par un dossier temporaire"""
+    progress_bar = st.progress(0)
+    status_text = st.empty()
+    upload_dir = tempfile.mkdtemp(prefix='ua_checker_logs_') if uploaded else None
+    try:
+        for uploaded_file in uploaded:
+            # Nom d'origine conservé : l'extension .gz décide de la lecture
+            with open(os.path.join(upload_dir, os.path.basename(uploaded_file.name)), 'wb') as f:
+                shutil.copyfileobj(uploaded_file, f)
+        
+        def progress(done, total):
+            progress_bar.progress(done / total)
+            status_text.info(f"📜 Analyse des journaux : **{done}/{total}** tranches")
+        
+        analyzer = LogAnalyzer(workers=options['workers'], prefix_depth=options['prefix_depth'],
+                               verify_dns=options['verify_dns'])
+        sources = paths + ([upload_dir] if upload_dir else [])
+        analysis = analyzer.analyze(sources, options['include_rotated'], progress=progress)
+    finally:
+        if upload_dir:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+    progress_bar.empty()
+    status_text.empty()
+    return analysis
+
+
+def render_log_tab(log_display):
+    """Onglet d'analyse des journaux d'accès : quels bots visitent réellement le site"""
+    paths, uploaded, options = log_display.render_log_input()
+    
+    launch = st.button(
+        "📜 Analyser les journaux",
+        type="primary",
+        disabled=not (paths or uploaded),
+        key="launch_log_analysis"
+    )
+    if launch:
+        analysis = run_log_analysis(paths, uploaded, options)
+        if not analysis.files:
+            st.error("Aucun fichier de journal trouvé pour ces chemins")
+        else:
+            st.session_state.log_analysis = analysis
+    
+    if st.session_state.get('log_analysis') is not None:
+        log_display.render_log_analysis(st.session_state.log_analysis)
+
+
+def main():
+    """Fonction principale de l'application"""
+    get_instrumentation()
+    
+    # Composants partagés entre reruns et sessions
+    ui_components, results_display, log_display = get_ui()
+    
+    # Appliquer les styles
+    ui_components.render_css()
+    
+    # Initialisation des variables de session
+    if 'current_urls' not in st.session_state:
+        st.session_state.current_urls = []
+    
+    # Sidebar
+    selected_bots = ui_components.render_sidebar()
+    run_deadline = ui_components.render_run_settings()
+    audit_paths = ui_components.render_audit_settings()
+    profiling = ui_components.render_profiling_toggle()
+    
+    # En-tête principal
+    ui_components.render_header()
+    
+    tab_robots, tab_logs = st.tabs(["🤖 Vérification robots.txt", "📜 Analyse de logs"])
+    with tab_robots:
+        render_robots_check(ui_components, results_display, selected_bots, run_deadline, profiling, audit_paths)
+    with tab_logs:
+        render_log_tab(log_display)
     
     # Footer
     st.markdown("---")
@@ -0,0 +1,3 @@
+"""
+Package de benchmarks (serveur HTTP local de substitution et mesures de débit)
+"""
@@ -0,0 +1,183 @@
+"""
+Micro-benchmarks du parsing HTML et de l'évaluation des robots.txt
+
+Le corpus versionné (benchmarks/corpus) réunit des en-têtes HTML et des
+robots.txt représentatifs : volumineux, malformés, non UTF-8, gros scripts
+inline avant le <title>. Les fichiers sont décodés comme le fait
+read_response_text (UTF-8, caractères invalides remplacés).
+
+Mesures par cas et par fichier : opérations/s, µs par appel et pic
+d'allocation par appel (tracemalloc, Ko). Le résultat JSON peut être
+comparé à une exécution précédente avec --compare.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.parsers --output parsers.json
+    python -m benchmarks.parsers --cases html_regex robots_protego --compare parsers.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.throughput import git_revision
+from core.html_parser import HTMLParser
+from core.lazy_imports import optional_import
+from core.robots_parser import RobotsParser
+
+
+CORPUS_DIR = Path(__file__).parent / 'corpus'
+ROBOTS_USER_AGENT = 'Mozilla/5.0 AppleWebKit/537.36 (KHTML, like Gecko; compatible; GPTBot/1.2; +https://openai.com/gptbot)'
+ROBOTS_TOKEN = 'GPTBot'
+ROBOTS_URL = 'https://www.shop.example/catalog/category-8/page-2?sort=price'
+COMPARED_METRICS = ('ops_per_sec', 'alloc_peak_kb')
+
+
+def load_corpus(kind: str) -> Dict[str, str]:
+    """Fichiers d'un sous-dossier du corpus, décodés en UTF-8 avec remplacement"""
+    return {
+        path.name: path.read_bytes().decode('utf-8', errors='replace')
+        for path in sorted((CORPUS_DIR / kind).iterdir()) if path.is_file()
+    }
+
+
+def group_rules(content: str, agent: str) -> Dict[str, List[str]]:
+    """Règles Allow/Disallow du groupe `agent` (ou `*`), au format attendu par is_blocked_by_robots"""
+    groups, current, in_rules = {}, [], False
+    for raw_line in content.splitlines():
+        line = raw_line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = (part.strip() for part in line.split(':', 1))
+        field = field.lower()
+        if field == 'user-agent':
+            if in_rules:
+                current, in_rules = [], False
+            current.append(value.lower())
+            groups.setdefault(value.lower(), {'allowed': [], 'disallowed': []})
+        elif field in ('allow', 'disallow') and current and value:
+            in_rules = True
+            for name in current:
+                groups[name]['allowed' if field == 'allow' else 'disallowed'].append(value)
+    return groups.get(agent.lower()) or groups.get('*') or {'allowed': [], 'disallowed': []}
+
+
+def measure(func: Callable[[], object], min_time: float = 0.2, repeat: int = 3) -> Dict[str, float]:
+    """Débit (meilleure de `repeat` séries d'au moins `min_time` s) et pic d'allocation d'un appel"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    while timer.timeit(number) < min_time:
+        number *= 2
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        func()
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ops_per_sec': round(1 / best, 1),
+        'us_per_op': round(best * 1e6, 2),
+        'alloc_peak_kb': round(peak / 1024, 1),
+    }
+
+
+def build_cases() -> Dict[str, Dict[str, Callable[[], object]]]:
+    """Fonctions à chronométrer, par cas puis par fichier du corpus"""
+    bs4, protego = optional_import('bs4'), optional_import('protego')
+    html_files = load_corpus('html')
+    robots_files = load_corpus('robots')
+    robots_parser = RobotsParser()
+    cases = {}
+
+    if bs4:
+        cases['html_bs4'] = {name: (lambda c=content: HTMLParser.parse_html(c))
+                             for name, content in html_files.items()}
+    cases['html_regex'] = {name: (lambda c=content: HTMLParser._parse_html_fallback(c))
+                           for name, content in html_files.items()}
+
+    if protego:
+        cases['robots_protego_parse'] = {name: (lambda c=content: protego.Protego.parse(c))
+                                         for name, content in robots_files.items()}
+        parsed = {name: protego.Protego.parse(content) for name, content in robots_files.items()}
+        cases['robots_protego_check'] = {
+            name: (lambda p=parser: robots_parser.check_robots_permission(p, ROBOTS_USER_AGENT, ROBOTS_URL))
+            for name, parser in parsed.items()
+        }
+
+    rules = {name: group_rules(content, ROBOTS_TOKEN) for name, content in robots_files.items()}
+    cases['robots_is_blocked'] = {
+        name: (lambda r=bot_rules: robots_parser.is_blocked_by_robots(ROBOTS_URL, r))
+        for name, bot_rules in rules.items()
+    }
+    return cases
+
+
+def compare(baseline: Dict, current: Dict) -> str:
+    """Tableau des écarts entre deux rapports JSON, par cas, fichier et mesure"""
+    lines = [f"{'cas / fichier':<62} {'mesure':<14} {'référence':>11} {'actuel':>11} {'écart':>9}"]
+    for case, files in current['cases'].items():
+        for name, metrics in files.items():
+            base = baseline.get('cases', {}).get(case, {}).get(name)
+            if not base:
+                continue
+            for metric in COMPARED_METRICS:
+                old, new = base[metric], metrics[metric]
+                delta = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+                lines.append(f"{case + ' / ' + name:<62} {metric:<14} {old:>11} {new:>11} {delta:>9}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks des parsers HTML et robots.txt")
+    parser.add_argument('--cases', nargs='+', help="Cas à exécuter (tous par défaut)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Durée minimale d'une série (s)")
+    parser.add_argument('--output', help="Fichier JSON de sortie (stdout si absent)")
+    parser.add_argument('--compare', help="Rapport JSON de référence à comparer")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'bs4': optional_import('bs4') is not None,
+            'protego': optional_import('protego') is not None,
+        },
+        'cases': {},
+    }
+    for case, funcs in build_cases().items():
+        if args.cases and case not in args.cases:
+            continue
+        report['cases'][case] = {}
+        for name, func in funcs.items():
+            metrics = measure(func, args.min_time)
+            report['cases'][case][name] = metrics
+            print(f"{case:<22} {name:<40} {metrics['ops_per_sec']:>12} ops/s "
+                  f"{metrics['alloc_peak_kb']:>10} Ko", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
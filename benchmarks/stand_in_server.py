@@ -0,0 +1,203 @@
+"""
+Serveur HTTP local programmable simulant un parc de sites
+
+Chaque site est identifié par son hôte de boucle locale 127.1.X.Y (index
+X * 256 + Y, tout 127.0.0.0/8 répond sous Linux) : un même serveur sert
+ainsi des robots.txt différents par site. Le profil de chaque site est tiré
+de façon déterministe à partir de la graine et des proportions de `mix` :
+
+- robots.txt : tout autorisé, GPTBot bloqué, tout bloqué, 404, malformé ou volumineux
+- 403 pour certains User-Agents (GPTBot, ClaudeBot...)
+- page avec meta noindex, redirection 301, réponses 429
+- corps « slow-loris » envoyé octet par octet
+"""
+
+import http.server
+import random
+import re
+import threading
+import time
+from typing import Dict, List
+
+
+DEFAULT_MIX = {
+    'robots_block_gptbot': 0.15,
+    'robots_block_all': 0.05,
+    'robots_missing': 0.15,
+    'robots_malformed': 0.03,
+    'robots_large': 0.02,
+    'ua_403': 0.15,
+    'noindex': 0.10,
+    'redirect': 0.10,
+    'rate_limit': 0.05,
+    'slow_loris': 0.01,
+}
+
+BLOCKED_UA_PATTERN = re.compile(r'GPTBot|ClaudeBot|PerplexityBot|Cohere', re.IGNORECASE)
+
+ROBOTS_VARIANTS = {
+    'allow_all': "User-agent: *\nAllow: /\n",
+    'block_gptbot': "User-agent: GPTBot\nDisallow: /\n\nUser-agent: *\nAllow: /\n",
+    'block_all': "User-agent: *\nDisallow: /\n",
+    'malformed': "User-agent GPTBot\nDisalow /\n<html>not a robots file</html>\n\x00\x01",
+    'large': "User-agent: *\n" + "".join(f"Disallow: /private/section-{i}/\n" for i in range(20000)),
+}
+
+
+def site_host(index: int) -> str:
+    """Hôte de boucle locale du site n° index"""
+    return f"127.1.{index // 256}.{index % 256}"
+
+
+def site_index(host: str) -> int:
+    """Index du site à partir de l'en-tête Host (port éventuel ignoré)"""
+    try:
+        _, _, high, low = host.split(':')[0].split('.')
+        return int(high) * 256 + int(low)
+    except ValueError:
+        return 0
+
+
+class StandInServer:
+    """Serveur de substitution : profils de sites, latence simulée et compteurs"""
+
+    def __init__(self, sites: int = 100, latency: float = 0.02, jitter: float = 0.01,
+                 mix: Dict[str, float] = None, slow_loris_seconds: float = 2.0,
+                 seed: int = 0, port: int = 0):
+        self.sites = sites
+        self.latency = latency
+        self.jitter = jitter
+        self.mix = {**DEFAULT_MIX, **(mix or {})}
+        self.slow_loris_seconds = slow_loris_seconds
+        self.seed = seed
+        self.profiles = [self._make_profile(index) for index in range(sites)]
+
+        self._lock = threading.Lock()
+        self.stats = {'connections': 0, 'requests': 0}
+
+        handler = type('Handler', (_StandInHandler,), {'stand_in': self})
+        self.httpd = http.server.ThreadingHTTPServer(('0.0.0.0', port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = None
+
+    def _make_profile(self, index: int) -> Dict:
+        rnd = random.Random(f"{self.seed}:{index}")
+        robots_draw = rnd.random()
+        robots = 'allow_all'
+        threshold = 0.0
+        for key, variant in (('robots_block_gptbot', 'block_gptbot'), ('robots_block_all', 'block_all'),
+                             ('robots_missing', 'missing'), ('robots_malformed', 'malformed'),
+                             ('robots_large', 'large')):
+            threshold += self.mix[key]
+            if robots_draw < threshold:
+                robots = variant
+                break
+        return {
+            'robots': robots,
+            'ua_403': rnd.random() < self.mix['ua_403'],
+            'noindex': rnd.random() < self.mix['noindex'],
+            'redirect': rnd.random() < self.mix['redirect'],
+            'rate_limit': rnd.random() < self.mix['rate_limit'],
+            'slow_loris': rnd.random() < self.mix['slow_loris'],
+        }
+
+    def urls(self, path: str = '/') -> List[str]:
+        """URL de la page d'accueil (ou de `path`) de chaque site"""
+        return [f"http://{site_host(index)}:{self.port}{path}" for index in range(self.sites)]
+
+    def count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats)
+
+    def start(self) -> 'StandInServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'StandInServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+class _StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Réponses du serveur de substitution selon le profil du site demandé"""
+
+    protocol_version = 'HTTP/1.1'
+    stand_in = None
+
+    def setup(self):
+        super().setup()
+        self.stand_in.count('connections')
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.stand_in
+        server.count('requests')
+        index = site_index(self.headers.get('Host', ''))
+        profile = server.profiles[index % len(server.profiles)]
+        user_agent = self.headers.get('User-Agent', '')
+
+        time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+
+        if self.path == '/robots.txt':
+            if profile['robots'] == 'missing':
+                return self._send(404, b'Not found', 'text/plain')
+            return self._send(200, ROBOTS_VARIANTS[profile['robots']].encode('utf-8'), 'text/plain')
+
+        if profile['rate_limit'] and random.random() < 0.5:
+            return self._send(429, b'Too Many Requests', 'text/plain', {'Retry-After': '1'})
+        if profile['redirect'] and self.path != '/landing':
+            return self._send(301, b'', 'text/html', {'Location': '/landing'})
+        if profile['ua_403'] and BLOCKED_UA_PATTERN.search(user_agent):
+            return self._send(403, b'Forbidden', 'text/plain')
+
+        robots_meta = '<meta name="robots" content="noindex, nofollow">' if profile['noindex'] else ''
+        body = (
+            f'<!DOCTYPE html><html><head><title>Site {index}</title>{robots_meta}</head>'
+            f'<body>{"<p>contenu</p>" * 200}</body></html>'
+        ).encode('utf-8')
+
+        if profile['slow_loris']:
+            return self._send_slowly(body)
+        return self._send(200, body, 'text/html; charset=utf-8')
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_slowly(self, body: bytes):
+        """Corps envoyé par petits morceaux, étalé sur slow_loris_seconds"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        pieces = 20
+        step = max(1, len(body) // pieces)
+        try:
+            for start in range(0, len(body), step):
+                self.wfile.write(body[start:start + step])
+                self.wfile.flush()
+                time.sleep(self.stand_in.slow_loris_seconds / pieces)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
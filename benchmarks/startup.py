@@ -0,0 +1,156 @@
+"""
+Benchmark du démarrage à froid et du coût d'un rerun Streamlit
+
+- import : temps d'import de app.py dans un processus neuf (médiane de
+  --repeat exécutions) et modules lourds effectivement chargés ;
+- rerun : durée d'un rerun de app.py via streamlit.testing (AppTest), sans
+  résultats puis avec --sites résultats synthétiques en session.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.startup --output startup.json
+    python -m benchmarks.startup --compare startup.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.throughput import git_revision
+
+
+HEAVY_MODULES = ['pandas', 'numpy', 'bs4', 'protego', 'openpyxl', 'pyarrow', 'zstandard']
+APP_PATH = str(Path(__file__).resolve().parent.parent / 'app.py')
+COMPARED_METRICS = ('import_seconds', 'first_run_seconds', 'rerun_seconds', 'rerun_with_results_seconds')
+
+IMPORT_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'modules': [m for m in %r if m in sys.modules]}))
+"""
+
+
+def measure_import(repeat: int) -> Dict:
+    """Import de app.py dans des processus neufs"""
+    timings, modules = [], []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', IMPORT_PROBE % HEAVY_MODULES],
+                                capture_output=True, text=True, check=True,
+                                cwd=Path(APP_PATH).parent).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        timings.append(probe['seconds'])
+        modules = probe['modules']
+    return {'import_seconds': round(statistics.median(timings), 3), 'heavy_modules_loaded': modules}
+
+
+def synthetic_results(sites: int, bots: List[str]) -> List[Dict]:
+    """Résultats factices au format de BotsChecker.check_robots_txt"""
+    results = []
+    for index in range(sites):
+        url = f'https://site-{index}.example/'
+        bot_results = {}
+        for bot in bots:
+            status = 'OK' if (index + len(bot)) % 3 else 'KO'
+            test = {'user_agent_name': 'main', 'status': status,
+                    'reason': 'Accès autorisé' if status == 'OK' else 'Robots.txt bloque',
+                    'reason_code': 'allowed' if status == 'OK' else 'robots_block',
+                    'reason_codes': ['allowed' if status == 'OK' else 'robots_block'],
+                    'status_code': 200, 'robots_allowed': status == 'OK', 'has_noindex': False,
+                    'load_time': 0.1}
+            bot_results[bot] = {'status': status, 'reason': '', 'tests': [test],
+                                'summary': {'total': 1, 'ok': int(status == 'OK'),
+                                            'ko': int(status == 'KO'), 'na': 0}}
+        results.append({'url': url, 'original_url': url, 'results': bot_results,
+                        'robots_available': True, 'timestamp': '2025-01-01T00:00:00'})
+    return results
+
+
+def measure_reruns(reruns: int, sites: int) -> Dict:
+    """Premier rendu puis reruns successifs de app.py (médianes)"""
+    from streamlit.testing.v1 import AppTest
+    from datetime import datetime
+
+    app = AppTest.from_file(APP_PATH, default_timeout=300)
+    start = time.perf_counter()
+    app.run()
+    first_run = time.perf_counter() - start
+
+    def timed_reruns():
+        timings = []
+        for _ in range(reruns):
+            start = time.perf_counter()
+            app.run()
+            timings.append(time.perf_counter() - start)
+        return round(statistics.median(timings), 4)
+
+    rerun = timed_reruns()
+
+    bots = ['googlebot', 'openai', 'anthropic', 'perplexity']
+    app.session_state['results'] = synthetic_results(sites, bots)
+    app.session_state['results_version'] = 'benchmark'
+    app.session_state['selected_bots'] = bots
+    app.session_state['analysis_timestamp'] = datetime.now()
+    app.run()
+    rerun_with_results = timed_reruns()
+
+    return {
+        'first_run_seconds': round(first_run, 3),
+        'rerun_seconds': rerun,
+        'rerun_with_results_seconds': rerun_with_results,
+    }
+
+
+def compare(baseline: Dict, current: Dict) -> str:
+    lines = [f"{'mesure':<28} {'référence':>10} {'actuel':>10} {'écart':>9}"]
+    for metric in COMPARED_METRICS:
+        old, new = baseline.get(metric), current.get(metric)
+        if old is None or new is None:
+            continue
+        delta = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+        lines.append(f"{metric:<28} {old:>10} {new:>10} {delta:>9}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Temps d'import et coût des reruns de l'application")
+    parser.add_argument('--repeat', type=int, default=5, help="Processus neufs pour la mesure d'import")
+    parser.add_argument('--reruns', type=int, default=10, help="Reruns mesurés")
+    parser.add_argument('--sites', type=int, default=2000, help="Résultats synthétiques en session")
+    parser.add_argument('--output', help="Fichier JSON de sortie (stdout si absent)")
+    parser.add_argument('--compare', help="Rapport JSON de référence à comparer")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'config': {'repeat': args.repeat, 'reruns': args.reruns, 'sites': args.sites},
+        **measure_import(args.repeat),
+        **measure_reruns(args.reruns, args.sites),
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
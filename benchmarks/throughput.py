@@ -0,0 +1,179 @@
+"""
+Benchmark de débit de bout en bout contre le serveur de substitution local
+
+Chaque moteur (séquentiel, pool de threads comme dans app.py) s'exécute dans
+un processus séparé pour isoler son pic de mémoire. Mesures : URLs/s,
+latence par URL (p50/p95/p99/max), sockets ouverts (comptés côté serveur),
+requêtes émises et pic RSS. Le résultat JSON peut être comparé à une
+exécution précédente avec --compare.
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.throughput --sites 200 --output bench.json
+    python -m benchmarks.throughput --compare bench.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from benchmarks.stand_in_server import StandInServer
+
+
+ENGINES = ('sync', 'threads')
+COMPARED_METRICS = ('urls_per_sec', 'p50', 'p95', 'p99', 'sockets_opened', 'requests', 'peak_rss_mb')
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Percentile (méthode du rang le plus proche) d'une liste triée"""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def peak_rss_mb() -> float:
+    """Pic de mémoire résidente du processus courant (Mo)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss est en octets sous macOS, en kilo-octets ailleurs
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _timed_check(checker, url: str, bots: List[str], token) -> float:
+    start = time.perf_counter()
+    checker.check_robots_txt(url, bots, token)
+    return time.perf_counter() - start
+
+
+def run_engine(engine: str, urls: List[str], bots: List[str], workers: int,
+               deadline: Optional[float]) -> Dict:
+    """Exécute un moteur sur toutes les URLs et renvoie ses mesures (processus enfant)"""
+    from bots_checker import BotsChecker
+    from core.cancellation import CancellationToken
+
+    checker = BotsChecker()
+    token = CancellationToken.with_timeout(deadline) if deadline else None
+
+    start = time.perf_counter()
+    if engine == 'sync':
+        latencies = [_timed_check(checker, url, bots, token) for url in urls]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            latencies = list(executor.map(lambda url: _timed_check(checker, url, bots, token), urls))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'urls': len(urls),
+        'elapsed': round(elapsed, 3),
+        'urls_per_sec': round(len(urls) / elapsed, 2) if elapsed else 0.0,
+        'p50': round(percentile(latencies, 50), 4),
+        'p95': round(percentile(latencies, 95), 4),
+        'p99': round(percentile(latencies, 99), 4),
+        'max': round(latencies[-1], 4) if latencies else 0.0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def _engine_worker(queue, *args) -> None:
+    queue.put(run_engine(*args))
+
+
+def benchmark_engine(server: StandInServer, engine: str, urls: List[str], bots: List[str],
+                     workers: int, deadline: Optional[float]) -> Dict:
+    """Mesure un moteur dans un processus neuf, sockets et requêtes comptés côté serveur"""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    before = server.snapshot()
+    process = context.Process(target=_engine_worker,
+                              args=(queue, engine, urls, bots, workers, deadline))
+    process.start()
+    metrics = queue.get()
+    process.join()
+    after = server.snapshot()
+
+    metrics['sockets_opened'] = after['connections'] - before['connections']
+    metrics['requests'] = after['requests'] - before['requests']
+    return metrics
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict, current: Dict) -> str:
+    """Tableau des écarts entre deux rapports JSON, par moteur et par mesure"""
+    lines = [f"{'moteur':<8} {'mesure':<15} {'référence':>12} {'actuel':>12} {'écart':>9}"]
+    for engine, metrics in current['engines'].items():
+        base = baseline.get('engines', {}).get(engine)
+        if not base:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = base.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            delta = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+            lines.append(f"{engine:<8} {metric:<15} {old:>12} {new:>12} {delta:>9}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Benchmark de débit contre un serveur HTTP local")
+    parser.add_argument('--sites', type=int, default=100, help="Nombre de sites simulés")
+    parser.add_argument('--bots', nargs='+', default=['openai', 'anthropic', 'googlebot'])
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--workers', type=int, default=4, help="Taille du pool de threads")
+    parser.add_argument('--latency', type=float, default=0.02, help="Latence simulée par requête (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Variation de latence (s)")
+    parser.add_argument('--slow-loris', type=float, default=None,
+                        help="Proportion de sites à corps lent (défaut du serveur si absent)")
+    parser.add_argument('--deadline', type=float, default=None, help="Délai global par moteur (s)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Fichier JSON de sortie (stdout si absent)")
+    parser.add_argument('--compare', help="Rapport JSON de référence à comparer")
+    args = parser.parse_args(argv)
+
+    mix = {'slow_loris': args.slow_loris} if args.slow_loris is not None else None
+    with StandInServer(sites=args.sites, latency=args.latency, jitter=args.jitter,
+                       mix=mix, seed=args.seed) as server:
+        urls = server.urls()
+        report = {
+            'meta': {
+                'revision': git_revision(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            },
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+            'engines': {},
+        }
+        for engine in args.engines:
+            report['engines'][engine] = benchmark_engine(server, engine, urls, args.bots,
+                                                         args.workers, args.deadline)
+            print(f"{engine}: {report['engines'][engine]}", file=sys.stderr)
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
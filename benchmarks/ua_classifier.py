@@ -0,0 +1,114 @@
+"""
+Benchmark du classifieur de User-Agents (core.ua_classifier)
+
+Trafic synthétique : --distinct User-Agents de navigateurs tous différents,
+mélangés aux User-Agents de BOT_DEFINITIONS, tirés --requests fois.
+
+Mesures (classifications/s) :
+- cold : chaque chaîne est nouvelle (mémo désactivé) ;
+- memo : classify() appelé sur le trafic, mémo LRU chaud ;
+- array : classify_array() sur le trafic complet (valeurs distinctes seulement).
+
+Usage (depuis la racine du dépôt) :
+    python -m benchmarks.ua_classifier --output ua.json
+    python -m benchmarks.ua_classifier --compare ua.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.throughput import git_revision
+from core.bot_definitions import BOT_DEFINITIONS
+from core.ua_classifier import UAClassifier
+
+
+BROWSER_TEMPLATE = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                    '(KHTML, like Gecko) Chrome/{version}.0.{build}.0 Safari/537.36')
+COMPARED_METRICS = ('cold_per_sec', 'memo_per_sec', 'array_per_sec')
+
+
+def synthetic_traffic(distinct: int, requests: int, seed: int) -> List[str]:
+    """Trafic mêlant navigateurs (≈90 %) et bots de BOT_DEFINITIONS"""
+    rng = random.Random(seed)
+    browsers = [BROWSER_TEMPLATE.format(version=100 + i % 40, build=i) for i in range(distinct)]
+    bots = [ua for definition in BOT_DEFINITIONS.values() for ua in definition['user_agents'].values()]
+    return [rng.choice(bots) if rng.random() < 0.1 else rng.choice(browsers) for _ in range(requests)]
+
+
+def rate(func: Callable[[], object], count: int, repeat: int = 3) -> float:
+    """Classifications par seconde (meilleure de `repeat` exécutions)"""
+    best = min(_timed(func) for _ in range(repeat))
+    return round(count / best, 1)
+
+
+def _timed(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run(distinct: int, requests: int, seed: int) -> Dict:
+    traffic = synthetic_traffic(distinct, requests, seed)
+    unique = list(dict.fromkeys(traffic))
+    cold = UAClassifier(memo_size=0)
+    warm = UAClassifier()
+    warm.classify_many(unique)
+    return {
+        'cold_per_sec': rate(lambda: cold.classify_many(unique), len(unique)),
+        'memo_per_sec': rate(lambda: warm.classify_many(traffic), len(traffic)),
+        'array_per_sec': rate(lambda: warm.classify_array(traffic), len(traffic)),
+        'distinct_user_agents': len(unique),
+    }
+
+
+def compare(baseline: Dict, current: Dict) -> str:
+    lines = [f"{'mesure':<16} {'référence':>14} {'actuel':>14} {'écart':>9}"]
+    for metric in COMPARED_METRICS:
+        old, new = baseline.get(metric), current.get(metric)
+        if old is None or new is None:
+            continue
+        delta = f"{(new - old) / old * 100:+.1f}%" if old else 'n/a'
+        lines.append(f"{metric:<16} {old:>14} {new:>14} {delta:>9}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> Dict:
+    parser = argparse.ArgumentParser(description="Débit du classifieur de User-Agents")
+    parser.add_argument('--distinct', type=int, default=20000, help="User-Agents de navigateurs distincts")
+    parser.add_argument('--requests', type=int, default=1000000, help="Taille du trafic synthétique")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Fichier JSON de sortie (stdout si absent)")
+    parser.add_argument('--compare', help="Rapport JSON de référence à comparer")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'config': {'distinct': args.distinct, 'requests': args.requests, 'seed': args.seed},
+        **run(args.distinct, args.requests, args.seed),
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            print(compare(json.load(f), report), file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Interface en ligne de commande : analyse d'une liste d'URLs sans Streamlit
+
+Exemples :
+    python cli.py https://example.com https://example.org --bots openai anthropic
+    python cli.py --file urls.txt --format parquet --output resultats.parquet
+    python cli.py --file urls.txt --profile profil.txt
+    python cli.py --logs /var/log/nginx/access.log --output bots_logs.csv
+    python cli.py --update-ip-ranges
+    python cli.py --file urls.txt --shards 8 --queue /partage/file.db
+    python cli.py --worker 0 1 2 3 --shards 8 --queue /partage/file.db
+    python cli.py --watch-add --file clients.txt --bots openai anthropic
+    python cli.py --watch --watch-interval 3600
+    python cli.py --file domaines.txt --robots-only --paths / /blog/ /produits/ --format csv.gz --output audit.csv.gz
+    python cli.py --file urls.txt --record archive.uah
+    python cli.py --file urls.txt --replay archive.uah --format csv.gz --output rejeu.csv.gz
+    python cli.py --file domaines.txt --sample 40 --output couverture.csv
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+
+from bots_checker import BotsChecker
+from core import http_archive, instrumentation
+from core.bot_definitions import BOT_DEFINITIONS
+from core.cancellation import CancellationToken
+from core.export import EXPORTERS, get_exporter
+from core.ip_ranges import download_ip_ranges
+from core.log_analyzer import LogAnalyzer
+from core.monitoring import DEFAULT_INTERVAL, RobotsWatcher, WatchStore
+from core.parse_pool import create_html_parser
+from core.robots_audit import DEFAULT_AUDIT_WORKERS, RobotsAudit
+from core.sampling import SamplingPlanner, coverage_frame, run_sampling
+from core.profiling import RunProfiler
+from core.results_frame import ResultsFrame
+from core.sharding import ShardQueue, ShardWorker, run_sharded
+
+
+DEFAULT_BOTS = ['googlebot', 'openai', 'anthropic', 'perplexity']
+DEFAULT_WORKERS = 4
+
+
+def read_urls(urls: List[str], path: Optional[str]) -> List[str]:
+    """URLs passées en argument puis lues dans le fichier (une par ligne, # = commentaire)"""
+    collected = list(urls)
+    if path:
+        with open(path, encoding='utf-8') as f:
+            collected += [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return [url if url.startswith(('http://', 'https://')) else f'https://{url}' for url in collected]
+
+
+def run_checks(urls: List[str], selected_bots: List[str], workers: int = DEFAULT_WORKERS,
+               deadline: Optional[float] = None, quiet: bool = False,
+               parse_workers: Optional[int] = None) -> List[Dict]:
+    """Analyse les URLs avec un pool de threads ; résultats dans l'ordre de saisie
+
+    Avec parse_workers > 1, le parsing HTML est déporté dans un pool de
+    processus, sauf pour les petites analyses où il reste dans ce processus.
+    """
+    pages = len(urls) * sum(len(BOT_DEFINITIONS[bot].get('user_agents', {}))
+                            for bot in selected_bots if bot in BOT_DEFINITIONS)
+    html_parser = create_html_parser(parse_workers, pages)
+    checker = BotsChecker(html_parser=html_parser)
+    token = CancellationToken.with_timeout(deadline)
+
+    def check(url):
+        result = checker.check_robots_txt(url, selected_bots, token)
+        result['original_url'] = url
+        return result
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for result in executor.map(check, urls):
+                results.append(result)
+                if not quiet:
+                    print(f"\r{len(results)}/{len(urls)} URLs analysées", end='', file=sys.stderr)
+        except KeyboardInterrupt:
+            token.cancel()
+            raise
+        finally:
+            if hasattr(html_parser, 'close'):
+                html_parser.close()
+    if not quiet:
+        print(file=sys.stderr)
+    instrumentation.flush()
+    return results
+
+
+def run_sharded_checks(urls: List[str], selected_bots: List[str], shards: int, queue_path: Optional[str],
+                       local_workers: Optional[int], threads: int, deadline: Optional[float] = None,
+                       quiet: bool = False) -> List[Dict]:
+    """Analyse répartie par hôte entre processus workers (locaux et/ou lancés avec --worker)"""
+    def progress(done, total):
+        print(f"\r{done}/{total} URLs analysées", end='', file=sys.stderr)
+
+    token = CancellationToken.with_timeout(deadline)
+    try:
+        results = run_sharded(urls, selected_bots, shards, queue_path, local_workers, threads,
+                              None if quiet else progress, token)
+    except KeyboardInterrupt:
+        token.cancel()
+        raise
+    if not quiet:
+        print(file=sys.stderr)
+    return results
+
+
+def run_robots_audit(urls: List[str], selected_bots: List[str], paths: List[str], workers: int,
+                     deadline: Optional[float] = None, quiet: bool = False) -> List[Dict]:
+    """Audit par robots.txt seul : une requête par hôte, verdict de chaque bot sur l'URL et les chemins"""
+    def progress(done, total):
+        print(f"\r{done}/{total} hôtes audités", end='', file=sys.stderr)
+
+    token = CancellationToken.with_timeout(deadline)
+    try:
+        results = RobotsAudit(paths, selected_bots, workers).run(urls, None if quiet else progress, token)
+    except KeyboardInterrupt:
+        token.cancel()
+        raise
+    if not quiet:
+        print(file=sys.stderr)
+    instrumentation.flush()
+    return results
+
+
+def run_sampled_checks(urls: List[str], selected_bots: List[str], sample_size: int, workers: int,
+                       output: Optional[str] = None, deadline: Optional[float] = None, quiet: bool = False) -> int:
+    """Mode échantillonnage : couverture estimée par bot et User-Agent sur un échantillon stratifié de chaque site"""
+    def progress(done, total):
+        print(f"\r{done}/{total} URLs échantillonnées vérifiées", end='', file=sys.stderr)
+
+    token = CancellationToken.with_timeout(deadline)
+    try:
+        coverages = run_sampling(urls, selected_bots, SamplingPlanner(sample_size=sample_size), workers,
+                                 None if quiet else progress, token)
+    except KeyboardInterrupt:
+        token.cancel()
+        raise
+    if not quiet:
+        print(file=sys.stderr)
+    instrumentation.flush()
+
+    for coverage in coverages:
+        plan = coverage.plan
+        print(f"{plan.site}  {len(plan.sample)} URLs tirées, {len(plan.strata)} strates, "
+              f"{plan.sitemap_urls} URLs de sitemap{' (tronqué)' if plan.truncated else ''}"
+              f"{f'  [{plan.error}]' if plan.error else ''}")
+        for estimate in coverage.estimates.values():
+            print(f"  {estimate.bot:<12} {estimate.user_agent_name:<20} {estimate.estimate:>6.1%} "
+                  f"[{estimate.low:.1%} - {estimate.high:.1%}]  n={estimate.tested}")
+    if output:
+        coverage_frame(coverages).to_csv(output, index=False)
+        print(f"Export : {output}")
+    return 0
+
+
+def run_shard_worker(queue_path: str, shards: List[int], threads: int) -> int:
+    """Mode worker : traite les shards donnés de la file partagée jusqu'à ce qu'elle reste vide"""
+    processed = ShardWorker(ShardQueue(queue_path), shards, threads=threads, idle_timeout=60).run()
+    print(f"{processed} URLs traitées (shards {' '.join(map(str, shards))})")
+    return 0
+
+
+def print_changes(changes: List[Dict]) -> None:
+    for change in changes:
+        moment = datetime.fromtimestamp(change['changed_at']).isoformat(timespec='seconds')
+        print(f"{moment}  {change['url']}  {change['bot']:<12} {change['previous_status']} -> {change['status']} "
+              f"({change['previous_reason']} -> {change['reason']})", flush=True)
+
+
+def run_watch(args, urls: List[str]) -> int:
+    """Mode surveillance : gestion de la liste et passages planifiés sur les robots.txt"""
+    store = WatchStore(args.watch_db)
+    if args.watch_add:
+        if not urls:
+            build_parser().error("aucune URL à ajouter à la surveillance")
+        added = store.add_sites(urls, args.bots, args.watch_interval)
+        print(f"{added} site(s) ajouté(s), {store.count()} sous surveillance ({store.path})")
+    if args.watch_changes:
+        print_changes(store.changes())
+    if not (args.watch or args.watch_once):
+        return 0
+
+    watcher = RobotsWatcher(store, interval=args.watch_interval)
+    if args.watch_once:
+        print_changes(watcher.run_once())
+    else:
+        print(f"Surveillance de {store.count()} site(s), intervalle {args.watch_interval:.0f} s (Ctrl+C pour arrêter)",
+              file=sys.stderr)
+        token = CancellationToken()
+        try:
+            watcher.run_forever(token, on_changes=print_changes)
+        except KeyboardInterrupt:
+            token.cancel()
+    stats = watcher.stats
+    if not args.quiet:
+        print(f"Passages : {stats['checked']} (304 : {stats['not_modified']}, inchangés : {stats['unchanged']}, "
+              f"réévalués : {stats['evaluated']}, erreurs : {stats['errors']})", file=sys.stderr)
+    return 0
+
+
+def write_profile(profiler: Optional[RunProfiler], path: Optional[str]) -> None:
+    if profiler is not None:
+        profiler.report.write(path)
+        print(f"Rapport de profilage : {path}")
+
+
+def print_summary(frame: ResultsFrame) -> None:
+    counts = frame.status_counts()
+    print(f"URLs analysées : {len(frame.sites)}")
+    print(f"Tests : {counts['total']} (OK {counts['ok']}, KO {counts['ko']}, NA {counts['na']})")
+    for bot, row in frame.bot_status_counts().iterrows():
+        print(f"  {bot:<12} OK {row['OK']:>5}  KO {row['KO']:>5}  NA {row['NA']:>5}")
+
+
+def run_log_analysis(paths: List[str], workers: Optional[int], output: Optional[str], quiet: bool,
+                     verify_dns: bool = False) -> int:
+    """Mode journaux : bots qui visitent réellement le site (agrégats exportés en CSV)"""
+    def progress(done, total):
+        print(f"\r{done}/{total} tranches analysées", end='', file=sys.stderr)
+
+    analysis = LogAnalyzer(workers=workers, verify_dns=verify_dns).analyze(paths, progress=None if quiet else progress)
+    if not quiet:
+        print(file=sys.stderr)
+    stats = analysis.stats
+    print(f"Fichiers : {len(analysis.files)}  Lignes : {stats.lines}  Requêtes de bots : {stats.bot_lines}  "
+          f"IP hors plages : {stats.spoofed_lines}  Hors format : {stats.malformed}  ({analysis.seconds:.1f} s)")
+    if not analysis.aggregates.empty:
+        for bot, row in analysis.by_bot().iterrows():
+            print(f"  {bot:<12} {row['hits']:>10} requêtes  {row['bytes'] / 1024 ** 2:>10.1f} Mo")
+    if output:
+        analysis.aggregates.to_csv(output, index=False)
+        print(f"Export : {output}")
+    return 0 if analysis.files else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Vérifie l'accès des crawlers (IA et moteurs) à une liste d'URLs")
+    parser.add_argument('urls', nargs='*', help="URLs à analyser")
+    parser.add_argument('--file', help="Fichier d'URLs (une par ligne)")
+    parser.add_argument('--bots', nargs='+', choices=sorted(BOT_DEFINITIONS),
+                        help=f"Crawlers à tester ({' '.join(DEFAULT_BOTS)} par défaut ; tous avec --robots-only)")
+    parser.add_argument('--workers', type=int,
+                        help=f"URLs vérifiées en parallèle ({DEFAULT_WORKERS} par défaut, {DEFAULT_AUDIT_WORKERS} hôtes "
+                             "avec --robots-only) ou, avec --logs, "
+                             "processus d'analyse (un par cœur par défaut)")
+    parser.add_argument('--robots-only', action='store_true',
+                        help="Audit par robots.txt seul (une requête par hôte, sans requête vers les pages)")
+    parser.add_argument('--paths', nargs='+', default=[], metavar='CHEMIN',
+                        help="Avec --robots-only : chemins évalués sur chaque hôte en plus de l'URL saisie")
+    parser.add_argument('--sample', type=int, metavar='N',
+                        help="Estime la part d'URLs autorisées par bot sur un échantillon stratifié de N URLs "
+                             "par site (strates robots.txt et sitemaps ; export CSV avec --output)")
+    parser.add_argument('--parse-workers', type=int,
+                        help="Processus de parsing HTML (par défaut : parsing dans le processus principal ; "
+                             "ignoré pour les petites analyses)")
+    parser.add_argument('--deadline', type=float, help="Durée maximale de l'analyse (s)")
+    parser.add_argument('--output', help="Fichier d'export des résultats")
+    parser.add_argument('--format', default='xlsx', choices=sorted(EXPORTERS), help="Format d'export")
+    parser.add_argument('--profile', metavar='RAPPORT',
+                        help="Profile l'analyse (CPU par échantillonnage + tracemalloc) et écrit le rapport")
+    parser.add_argument('--logs', nargs='+', metavar='CHEMIN',
+                        help="Analyse des journaux d'accès (fichiers, dossiers, motifs glob) au lieu des URLs")
+    parser.add_argument('--verify-dns', action='store_true',
+                        help="Avec --logs : vérifie par DNS inverse et direct les bots sans plages IP publiées")
+    parser.add_argument('--update-ip-ranges', action='store_true',
+                        help="Télécharge les plages IP publiées par les éditeurs de crawlers puis quitte")
+    parser.add_argument('--shards', type=int,
+                        help="Répartit les URLs par hôte entre N shards traités par des processus workers")
+    parser.add_argument('--queue', metavar='FICHIER',
+                        help="Avec --shards ou --worker : file SQLite partagée (temporaire par défaut)")
+    parser.add_argument('--local-workers', type=int,
+                        help="Avec --shards : processus workers lancés localement (un par shard par défaut, "
+                             "0 pour ne compter que sur des workers externes)")
+    parser.add_argument('--worker', nargs='+', type=int, metavar='SHARD',
+                        help="Lance un worker pour ces shards de la file --queue (autre processus ou autre nœud)")
+    parser.add_argument('--record', metavar='ARCHIVE',
+                        help="Enregistre chaque échange HTTP de l'analyse dans l'archive (ajout)")
+    parser.add_argument('--replay', metavar='ARCHIVE',
+                        help="Rejoue l'analyse hors ligne depuis une archive enregistrée avec --record")
+    parser.add_argument('--watch-add', action='store_true',
+                        help="Ajoute les URLs (et --bots) à la liste de surveillance")
+    parser.add_argument('--watch', action='store_true',
+                        help="Surveille la liste en continu : changements de verdict robots.txt par bot")
+    parser.add_argument('--watch-once', action='store_true',
+                        help="Vérifie les sites de la liste arrivés à échéance puis quitte (tâche cron)")
+    parser.add_argument('--watch-changes', action='store_true', help="Affiche l'historique des changements")
+    parser.add_argument('--watch-db', metavar='FICHIER', help="Base de la liste de surveillance")
+    parser.add_argument('--watch-interval', type=float, default=DEFAULT_INTERVAL,
+                        help=f"Intervalle entre deux passages sur un site en secondes ({DEFAULT_INTERVAL} par défaut)")
+    parser.add_argument('--quiet', action='store_true', help="Pas de progression sur stderr")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    args.bots = args.bots or (sorted(BOT_DEFINITIONS) if args.robots_only else DEFAULT_BOTS)
+    if args.update_ip_ranges:
+        statuses = download_ip_ranges()
+        for filename, status in statuses.items():
+            print(f"  {filename:<22} {status}")
+        return 0 if any(status.endswith('préfixes') for status in statuses.values()) else 1
+    if args.logs:
+        return run_log_analysis(args.logs, args.workers, args.output, args.quiet, args.verify_dns)
+    if args.worker is not None:
+        if not args.queue:
+            build_parser().error("--worker nécessite --queue")
+        return run_shard_worker(args.queue, args.worker, args.workers or DEFAULT_WORKERS)
+
+    urls = read_urls(args.urls, args.file)
+    if args.watch_add or args.watch or args.watch_once or args.watch_changes:
+        return run_watch(args, urls)
+    if not urls:
+        build_parser().error("aucune URL à analyser")
+
+    if args.record or args.replay:
+        if args.shards or (args.record and args.replay):
+            build_parser().error("--record et --replay s'excluent et ne s'appliquent qu'au processus courant "
+                                 "(incompatibles avec --shards)")
+        if args.record:
+            http_archive.record_to(args.record)
+        else:
+            try:
+                http_archive.replay_from(args.replay)
+            except ValueError as e:
+                build_parser().error(str(e))
+
+    instrumentation.configure_from_env()
+    profiler = RunProfiler() if args.profile else None
+    if args.sample is not None:
+        if args.sample < 1:
+            build_parser().error("--sample doit être au moins 1")
+        # Quelques dizaines de pages par site : le parsing déporté ne s'applique pas
+        if args.robots_only or args.shards or args.parse_workers:
+            build_parser().error("--sample est incompatible avec --robots-only, --shards et --parse-workers")
+        with profiler or nullcontext():
+            code = run_sampled_checks(urls, args.bots, args.sample, args.workers or DEFAULT_WORKERS, args.output,
+                                      args.deadline, args.quiet)
+        http_archive.disable()
+        write_profile(profiler, args.profile)
+        return code
+
+    # Le profil couvre la vérification, la construction des tables et l'export
+    with profiler or nullcontext():
+        if args.robots_only:
+            results = run_robots_audit(urls, args.bots, args.paths, args.workers or DEFAULT_AUDIT_WORKERS,
+                                       args.deadline, args.quiet)
+        elif args.shards:
+            results = run_sharded_checks(urls, args.bots, args.shards, args.queue, args.local_workers,
+                                         args.workers or DEFAULT_WORKERS, args.deadline, args.quiet)
+        else:
+            results = run_checks(urls, args.bots, args.workers or DEFAULT_WORKERS, args.deadline, args.quiet,
+                                 args.parse_workers)
+        frame = ResultsFrame.from_results(results)
+        if args.output:
+            get_exporter(args.format).write(frame, args.output)
+
+    http_archive.disable()
+    print_summary(frame)
+    if args.output:
+        print(f"Export : {args.output}")
+    write_profile(profiler, args.profile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,3 @@
+"""
+Configuration pytest : la racine du dépôt est ajoutée au chemin d'import (core, bots_checker, cli)
+"""
@@ -27,6 +27,9 @@ BOT_DEFINITIONS = {
     },
     'googlebot': {
         'user_agent_pattern': r'googlebot',
+        # Domaines acceptés en DNS inverse (suivi d'une confirmation DNS directe) ; seul le sous-domaine
+        # gae. de googleusercontent.com (fetchers déclenchés par l'utilisateur) : le reste couvre les VM Google Cloud
+        'reverse_dns_domains': ('googlebot.com', 'google.com', 'gae.googleusercontent.com'),
         'user_agents': {
             'Googlebot': 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
             'Googlebot-Mobile': 'Mozilla/5.0 (Linux; Android 6.0.1; Nexus 5X Build/MMB29P) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/W.X.Y.Z Mobile Safari/537.36 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
@@ -34,6 +37,7 @@ BOT_DEFINITIONS = {
     },
     'bingbot': {
         'user_agent_pattern': r'bingbot',
+        'reverse_dns_domains': ('search.msn.com',),
         'user_agents': {
             'BingBot': 'Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)',
             'BingBot-Mobile': 'Mozilla/5.0 (iPhone; CPU iPhone OS 7_0 like Mac OS X) AppleWebKit/537.51.1 (KHTML, like Gecko) Version/7.0 Mobile/11A465 Safari/9537.53 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)'
@@ -41,6 +45,7 @@ BOT_DEFINITIONS = {
     },
     'yandexbot': {
         'user_agent_pattern': r'yandexbot',
+        'reverse_dns_domains': ('yandex.ru', 'yandex.net', 'yandex.com'),
         'user_agents': {
             'YandexBot': 'Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)',
             'YandexMobileBot': 'Mozilla/5.0 (iPhone; CPU iPhone OS 8_1 like Mac OS X) AppleWebKit/600.1.4 (KHTML, like Gecko) Version/8.0 Mobile/12B411 Safari/600.1.4 (compatible; YandexMobileBot/3.0; +http://yandex.com/bots)'
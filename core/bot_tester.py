@@ -2,46 +2,94 @@
 Module de test d'accès des bots
 """
 
-import time
 import requests
-from typing import Dict, List
+from typing import Dict, List, Optional
 from datetime import datetime
 
+from . import instrumentation, reason_codes
+from .cancellation import CancellationToken, OperationStopped, read_response_text
 from .html_parser import HTMLParser
 from .robots_parser import RobotsParser
+from .timings import PhaseTimer, timed_get
 
 
 class BotTester:
     """Gestionnaire pour les tests d'accès des bots"""
     
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, html_parser=None):
         self.timeout = timeout
         self.robots_parser = RobotsParser()
-        self.html_parser = HTMLParser()
+        # HTMLParser ou ParsePool (parsing déporté dans un pool de processus)
+        self.html_parser = html_parser or HTMLParser()
     
     def test_bot_access(self, url: str, bot_name: str, user_agent_name: str, 
-                       user_agent: str, robots_parser) -> Dict:
-        """Test d'accès pour un user agent spécifique"""
+                       user_agent: str, robots_parser,
+                       token: Optional[CancellationToken] = None) -> Dict:
+        """Test d'accès pour un user agent spécifique
+        
+        Avec un jeton d'annulation, le timeout est borné par l'échéance de l'analyse
+        et la réponse est lue par blocs pour pouvoir être interrompue. Le résultat
+        contient la durée de chaque phase (DNS, connexion, TLS, TTFB, téléchargement,
+        parsing) en millisecondes.
+        """
+        with instrumentation.span('probe', url=url, bot=bot_name, user_agent=user_agent_name) as span:
+            result = self._probe(url, bot_name, user_agent_name, user_agent, robots_parser, token)
+            span.set(status=result['status'], reason_code=result['reason_code'],
+                     status_code=result['status_code'])
+        if instrumentation.enabled():
+            self._record_metrics(result)
+        return result
+    
+    def _record_metrics(self, result: Dict) -> None:
+        """Compteurs et histogrammes d'un test terminé"""
+        instrumentation.inc('ua_checker_tests_total', status=result['status'],
+                            reason_code=result['reason_code'])
+        if result['reason_code'] == reason_codes.TIMEOUT:
+            instrumentation.inc('ua_checker_timeouts_total', kind='probe')
+        timings = result.get('timings') or {}
+        if timings:
+            instrumentation.observe('ua_checker_probe_duration_seconds',
+                                    sum(timings.values()) / 1000, bot=result['bot_name'])
+            for phase, milliseconds in timings.items():
+                instrumentation.observe('ua_checker_phase_duration_seconds', milliseconds / 1000, phase=phase)
+    
+    def _probe(self, url: str, bot_name: str, user_agent_name: str, user_agent: str,
+               robots_parser, token: Optional[CancellationToken]) -> Dict:
+        timer = PhaseTimer()
         try:
             # Vérifier robots.txt
             robots_allowed = self.robots_parser.check_robots_permission(robots_parser, user_agent, url)
             
             # Test d'accès HTTP
             headers = {'User-Agent': user_agent}
-            start_time = time.time()
-            response = requests.get(url, headers=headers, timeout=self.timeout)
-            load_time = time.time() - start_time
+            timeout = token.timeout(self.timeout) if token is not None else self.timeout
+            with timer.request():
+                response = timed_get(url, token, headers=headers, timeout=timeout, stream=True)
+            with timer.phase('download'):
+                html = read_response_text(response, token)
+            instrumentation.record_response('probe', response, timer.load_time())
             
             # Parser le HTML
-            title, robots_meta, has_noindex = self.html_parser.parse_html(response.text)
+            with timer.phase('parse'):
+                title, robots_meta, has_noindex = self.html_parser.parse_html(html)
+            
+            x_robots_tag = response.headers.get('X-Robots-Tag', '')
+            # Lignes d'en-tête séparées : un préfixe « bot: » ne porte que sur sa propre ligne
+            raw_headers = getattr(response.raw, 'headers', None)
+            x_robots_lines = (raw_headers.getlist('X-Robots-Tag') if hasattr(raw_headers, 'getlist')
+                              else [x_robots_tag])
+            x_robots_noindex = reason_codes.has_noindex_header(x_robots_lines, user_agent_name, user_agent)
             
             # Calculer is_allowed: statut 200 + robots.txt autorise + pas de noindex
-            is_allowed = (response.status_code == 200 and robots_allowed and not has_noindex)
+            codes = reason_codes.blocking_codes(response.status_code, robots_allowed,
+                                                has_noindex, x_robots_noindex)
+            is_allowed = not codes
             
             # Déterminer le statut final
             if is_allowed:
                 status = 'OK'
                 reason = 'Accès autorisé'
+                codes = [reason_codes.ALLOWED]
             else:
                 status = 'KO'
                 reasons = []
@@ -51,6 +99,8 @@ class BotTester:
                     reasons.append('Robots.txt bloque')
                 if has_noindex:
                     reasons.append('Meta noindex')
+                if x_robots_noindex:
+                    reasons.append('X-Robots-Tag noindex')
                 reason = ', '.join(reasons) if reasons else 'Bloqué'
             
             return {
@@ -59,39 +109,69 @@ class BotTester:
                 'user_agent': user_agent,
                 'status': status,
                 'reason': reason,
+                'reason_code': codes[0],
+                'reason_codes': codes,
                 'status_code': response.status_code,
                 'robots_allowed': robots_allowed,
                 'robots_meta': robots_meta,
                 'has_noindex': has_noindex,
+                'x_robots_tag': x_robots_tag,
                 'title': title,
-                'load_time': round(load_time, 2),
+                'load_time': round(timer.load_time(), 2),
+                'timings': timer.as_dict(),
                 'is_allowed': is_allowed
             }
             
+        except OperationStopped as e:
+            return self._create_stopped_result(bot_name, user_agent_name, user_agent,
+                                               e.reason, robots_parser, url, timer)
         except requests.exceptions.Timeout:
+            if token is not None and token.stopped:
+                return self._create_stopped_result(bot_name, user_agent_name, user_agent,
+                                                   token.reason, robots_parser, url, timer)
             return self._create_error_result(bot_name, user_agent_name, user_agent, 
-                                           'NA', 'Timeout', 408, robots_parser, url)
-        except requests.exceptions.RequestException as e:
+                                           'NA', 'Timeout', 408, robots_parser, url,
+                                           reason_codes.TIMEOUT, timer)
+        except Exception as e:
+            # Réponse fermée par l'annulation : l'erreur levée dépend de l'étape interrompue
+            if token is not None and token.stopped:
+                return self._create_stopped_result(bot_name, user_agent_name, user_agent,
+                                                   token.reason, robots_parser, url, timer)
+            if not isinstance(e, requests.exceptions.RequestException):
+                raise
             return self._create_error_result(bot_name, user_agent_name, user_agent, 
                                            'NA', f'Erreur réseau: {str(e)[:50]}', 0, 
-                                           robots_parser, url)
+                                           robots_parser, url, reason_codes.exception_code(e), timer)
+    
+    def _create_stopped_result(self, bot_name: str, user_agent_name: str, user_agent: str,
+                               stop_reason: str, robots_parser, url: str,
+                               timer: Optional[PhaseTimer] = None) -> Dict:
+        """Résultat NA d'un test non terminé (analyse annulée ou délai dépassé)"""
+        reason = 'Annulé' if stop_reason == reason_codes.CANCELLED else 'Délai dépassé'
+        return self._create_error_result(bot_name, user_agent_name, user_agent,
+                                         'NA', reason, 0, robots_parser, url, stop_reason, timer)
     
     def _create_error_result(self, bot_name: str, user_agent_name: str, user_agent: str,
                            status: str, reason: str, status_code: int, 
-                           robots_parser, url: str) -> Dict:
-        """Crée un résultat d'erreur standardisé"""
+                           robots_parser, url: str, reason_code: str,
+                           timer: Optional[PhaseTimer] = None) -> Dict:
+        """Crée un résultat d'erreur standardisé (durées mesurées jusqu'à l'erreur)"""
         return {
             'bot_name': bot_name,
             'user_agent_name': user_agent_name,
             'user_agent': user_agent,
             'status': status,
             'reason': reason,
+            'reason_code': reason_code,
+            'reason_codes': [reason_code],
             'status_code': status_code,
             'robots_allowed': self.robots_parser.check_robots_permission(robots_parser, user_agent, url),
             'robots_meta': 'Erreur' if status_code != 408 else 'Timeout',
             'has_noindex': False,
+            'x_robots_tag': '',
             'title': 'Erreur' if status_code != 408 else 'Timeout',
-            'load_time': self.timeout if status_code == 408 else 0,
+            'load_time': round(timer.load_time(), 2) if timer is not None else 0,
+            'timings': timer.as_dict() if timer is not None else {},
             'is_allowed': False
         }
     
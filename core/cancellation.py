@@ -0,0 +1,139 @@
+"""
+Annulation et délai global d'une analyse
+"""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Optional
+
+
+CANCELLED = 'cancelled'
+DEADLINE_EXCEEDED = 'deadline_exceeded'
+
+
+class OperationStopped(Exception):
+    """Levée quand une analyse est annulée ou dépasse son délai"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancellationToken:
+    """Jeton partagé par toutes les étapes d'une analyse (annulation + échéance)"""
+
+    def __init__(self, deadline: Optional[float] = None):
+        self.deadline = deadline
+        self._cancelled = False
+        self._callbacks = set()
+        self._lock = threading.Lock()
+        self._watchdog = None
+
+    @classmethod
+    def with_timeout(cls, seconds: Optional[float]) -> 'CancellationToken':
+        """Jeton dont l'échéance tombe dans `seconds` secondes (None = pas d'échéance)"""
+        return cls(time.monotonic() + seconds if seconds else None)
+
+    def cancel(self) -> None:
+        """Annule l'analyse et interrompt les requêtes en cours"""
+        with self._lock:
+            self._cancelled = True
+        self._run_callbacks()
+
+    def _run_callbacks(self) -> None:
+        with self._lock:
+            callbacks = list(self._callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Motif d'arrêt ('cancelled' ou 'deadline_exceeded'), None si l'analyse continue"""
+        if self._cancelled:
+            return CANCELLED
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return DEADLINE_EXCEEDED
+        return None
+
+    @property
+    def stopped(self) -> bool:
+        return self.reason is not None
+
+    def raise_if_stopped(self) -> None:
+        reason = self.reason
+        if reason:
+            raise OperationStopped(reason)
+
+    def timeout(self, default: float) -> float:
+        """Timeout d'une requête, borné par le temps restant avant l'échéance"""
+        self.raise_if_stopped()
+        if self.deadline is None:
+            return default
+        return max(0.001, min(default, self.deadline - time.monotonic()))
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], None]):
+        """Enregistre `callback` (ex: fermeture d'une réponse) le temps d'un bloc"""
+        with self._lock:
+            self._callbacks.add(callback)
+            # Un seul minuteur par jeton déclenche les interruptions à l'échéance
+            if self.deadline is not None and self._watchdog is None:
+                self._watchdog = threading.Timer(max(0.0, self.deadline - time.monotonic()),
+                                                 self._run_callbacks)
+                self._watchdog.daemon = True
+                self._watchdog.start()
+        if self.stopped:
+            callback()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._callbacks.discard(callback)
+
+
+def abort_response(response) -> None:
+    """Coupe la connexion d'une réponse en cours de lecture, y compris depuis un autre thread"""
+    # Socket de lecture de http.client (urllib3 détache connection.sock une fois les en-têtes reçus)
+    http_response = getattr(response.raw, '_fp', None)
+    socket_io = getattr(getattr(http_response, 'fp', None), 'raw', None)
+    sock = getattr(socket_io, '_sock', None)
+    if sock is None:
+        sock = getattr(getattr(response.raw, 'connection', None), 'sock', None)
+    if sock is not None:
+        try:
+            # shutdown réveille un recv() bloqué, ce que close() seul ne garantit pas
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+    response.close()
+
+
+def read_response_bytes(response, token: Optional[CancellationToken] = None, chunk_size: int = 65536,
+                        limit: Optional[int] = None) -> bytes:
+    """Lit le corps brut d'une réponse `stream=True` par blocs, jusqu'à `limit` octets, en vérifiant le jeton"""
+    chunks, size = [], 0
+    with token.on_cancel(lambda: abort_response(response)) if token is not None else nullcontext():
+        for chunk in response.iter_content(chunk_size):
+            if token is not None:
+                token.raise_if_stopped()
+            chunks.append(chunk)
+            size += len(chunk)
+            if limit is not None and size >= limit:
+                response.close()
+                break
+    if token is not None:
+        token.raise_if_stopped()
+    return b''.join(chunks)
+
+
+def read_response_text(response, token: Optional[CancellationToken] = None,
+                       chunk_size: int = 65536) -> str:
+    """Lit le corps d'une réponse `stream=True` par blocs, en vérifiant le jeton entre chaque bloc"""
+    if token is None:
+        return response.text
+    return read_response_bytes(response, token, chunk_size).decode(response.encoding or 'utf-8', errors='replace')
@@ -0,0 +1,221 @@
+"""
+Vérification DNS des crawlers : DNS inverse de l'IP puis confirmation DNS directe du nom obtenu
+"""
+
+import ipaddress
+import socket
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .bot_definitions import BOT_DEFINITIONS
+from .result_cache import CacheBackend, MemoryCacheBackend
+
+
+class TemporaryDNSError(Exception):
+    """Échec transitoire (délai, serveur indisponible) : la réponse n'est pas mise en cache"""
+
+
+class Resolver:
+    """Interface d'un résolveur : noms PTR d'une IP et adresses d'un nom
+
+    Une liste vide est une réponse négative définitive (NXDOMAIN, pas de PTR) ;
+    un échec transitoire lève TemporaryDNSError.
+    """
+
+    def reverse(self, ip: str) -> List[str]:
+        raise NotImplementedError
+
+    def forward(self, hostname: str) -> List[str]:
+        raise NotImplementedError
+
+
+class SystemResolver(Resolver):
+    """Résolveur du système (gethostbyaddr / getaddrinfo)"""
+
+    TEMPORARY_ERRORS = {getattr(socket, name) for name in ('EAI_AGAIN', 'EAI_FAIL') if hasattr(socket, name)}
+
+    def reverse(self, ip: str) -> List[str]:
+        try:
+            hostname, aliases, _ = socket.gethostbyaddr(ip)
+        except socket.herror as e:
+            # h_errno TRY_AGAIN (2) : serveur indisponible, à retenter
+            if e.errno == 2:
+                raise TemporaryDNSError(str(e)) from e
+            return []
+        except (socket.gaierror, socket.timeout) as e:
+            raise TemporaryDNSError(str(e)) from e
+        return [hostname, *aliases]
+
+    def forward(self, hostname: str) -> List[str]:
+        try:
+            infos = socket.getaddrinfo(hostname, None, proto=socket.IPPROTO_TCP)
+        except socket.gaierror as e:
+            if e.errno in self.TEMPORARY_ERRORS:
+                raise TemporaryDNSError(str(e)) from e
+            return []
+        except socket.timeout as e:
+            raise TemporaryDNSError(str(e)) from e
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+
+class StaticResolver(Resolver):
+    """Résolveur local à tables fixes (tests, benchmarks), avec latence simulée optionnelle"""
+
+    def __init__(self, ptr: Optional[Dict[str, List[str]]] = None,
+                 addresses: Optional[Dict[str, List[str]]] = None, delay: float = 0.0):
+        self.ptr = ptr or {}
+        self.addresses = addresses or {}
+        self.delay = delay
+        self.queries = 0
+        self._lock = threading.Lock()
+
+    def _query(self, table: Dict[str, List[str]], key: str) -> List[str]:
+        with self._lock:
+            self.queries += 1
+        if self.delay:
+            threading.Event().wait(self.delay)
+        return list(table.get(key, []))
+
+    def reverse(self, ip: str) -> List[str]:
+        return self._query(self.ptr, ip)
+
+    def forward(self, hostname: str) -> List[str]:
+        return self._query(self.addresses, hostname)
+
+
+def _normalize_ip(value: str) -> Optional[str]:
+    """Forme canonique d'une IP, IPv4 mappée en IPv6 ramenée en IPv4 (comme ip_ranges.parse_ip)"""
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except (ValueError, AttributeError):
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        address = address.ipv4_mapped
+    return str(address)
+
+
+def hostname_matches(hostname: str, domains: Iterable[str]) -> bool:
+    """Le nom (normalisé) appartient-il à l'un des domaines (crawl-66-249-66-1.googlebot.com -> googlebot.com) ?"""
+    return any(hostname == domain or hostname.endswith('.' + domain) for domain in domains)
+
+
+class DNSVerifier:
+    """Vérification DNS inverse + directe, concurrente et mise en cache
+
+    Le résultat de la double résolution dépend seulement de l'IP : il est mis
+    en cache par IP (positif ou négatif, chacun avec sa durée de vie) puis
+    confronté aux domaines de la famille annoncée. Les résolutions simultanées
+    d'une même IP sont fusionnées, les échecs transitoires ne sont pas mis en
+    cache.
+    """
+
+    def __init__(self, resolver: Optional[Resolver] = None, cache: Optional[CacheBackend] = None,
+                 positive_ttl: float = 3600, negative_ttl: float = 300, max_workers: int = 16):
+        self.resolver = resolver or SystemResolver()
+        self.cache = cache or MemoryCacheBackend(max_entries=200000)
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_workers = max_workers
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    @staticmethod
+    def domains(family: str) -> Tuple[str, ...]:
+        """Domaines DNS inverses reconnus pour la famille (vide : pas de vérification DNS publiée)"""
+        return tuple(BOT_DEFINITIONS.get(family, {}).get('reverse_dns_domains', ()))
+
+    def lookup(self, ip: str) -> Dict:
+        """Noms PTR de l'IP confirmés par résolution directe (résultat en cache si disponible)"""
+        ip = _normalize_ip(ip) or ip
+        key = f'dns|{ip}'
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            record = self._resolve(ip)
+            if record['error'] is None:
+                ttl = self.positive_ttl if record['confirmed_hostnames'] else self.negative_ttl
+                self.cache.set(key, record, ttl)
+            future.set_result(record)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+        return record
+
+    def _resolve(self, ip: str) -> Dict:
+        record = {'ip': ip, 'hostnames': [], 'confirmed_hostnames': [], 'error': None, 'cached': False}
+        try:
+            record['hostnames'] = [hostname.rstrip('.').lower() for hostname in self.resolver.reverse(ip)]
+            for hostname in record['hostnames']:
+                addresses = {_normalize_ip(address) for address in self.resolver.forward(hostname)}
+                if ip in addresses:
+                    record['confirmed_hostnames'].append(hostname)
+        except TemporaryDNSError as e:
+            record['error'] = str(e) or 'temporary_failure'
+        return record
+
+    def verify(self, family: str, ip: str) -> Dict:
+        """Authenticité DNS d'une IP pour une famille
+
+        is_authentic vaut None si l'éditeur ne publie pas de domaines DNS ou si
+        la résolution a échoué temporairement.
+        """
+        domains = self.domains(family)
+        if not domains:
+            return {'is_authentic': None, 'hostname': None, 'forward_confirmed': False,
+                    'reason': 'no_dns_rule', 'cached': False}
+        record = self.lookup(ip)
+        if record['error'] is not None:
+            return {'is_authentic': None, 'hostname': None, 'forward_confirmed': False,
+                    'reason': 'dns_error', 'cached': False}
+        matching = [hostname for hostname in record['confirmed_hostnames'] if hostname_matches(hostname, domains)]
+        if matching:
+            reason = 'verified'
+        elif not record['hostnames']:
+            reason = 'no_ptr'
+        elif not record['confirmed_hostnames']:
+            reason = 'forward_mismatch'
+        else:
+            reason = 'foreign_domain'
+        return {
+            'is_authentic': bool(matching),
+            'hostname': (matching or record['hostnames'] or [None])[0],
+            'forward_confirmed': bool(record['confirmed_hostnames']),
+            'reason': reason,
+            'cached': record['cached'],
+        }
+
+    def verify_many(self, pairs: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], Dict]:
+        """Vérifie des couples (famille, IP) : une résolution par IP distincte, en parallèle bornée"""
+        pairs = list(dict.fromkeys(pairs))
+        ips = list(dict.fromkeys(ip for family, ip in pairs if self.domains(family)))
+        if len(ips) > 1:
+            list(self._get_executor().map(self.lookup, ips))
+        return {(family, ip): self.verify(family, ip) for family, ip in pairs}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='dns')
+            return self._executor
+
+
+@lru_cache(maxsize=1)
+def get_dns_verifier() -> DNSVerifier:
+    """Vérificateur partagé par le processus (résolveur système)"""
+    return DNSVerifier()
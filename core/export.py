@@ -0,0 +1,269 @@
+"""
+Module d'export des résultats (Excel, Parquet, CSV compressé, JSONL)
+"""
+
+import gzip
+import io
+from typing import Dict, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .lazy_imports import is_installed, optional_import
+from .results_frame import ResultsFrame
+
+
+EXPORT_COLUMNS = ['URL', 'Status', 'Error', 'Bot', 'Test_Details', 'Timestamp']
+
+
+def iter_test_chunks(frame: ResultsFrame, chunk_size: int = 50000) -> Iterator[pd.DataFrame]:
+    """Parcourt les tests par blocs de sites, sites en erreur inclus, dans l'ordre d'analyse"""
+    sites = frame.sites
+    tests = frame.tests
+    site_ids = tests['site_id'].to_numpy()
+
+    start = 0
+    while start < len(sites):
+        # Découpage par sites pour que chaque bloc contienne environ chunk_size tests
+        first_test = np.searchsorted(site_ids, start, side='left')
+        if first_test + chunk_size < len(tests):
+            stop = max(int(site_ids[first_test + chunk_size]), start + 1)
+        else:
+            stop = len(sites)
+        last_test = np.searchsorted(site_ids, stop, side='left')
+
+        chunk_sites = sites.iloc[start:stop]
+        chunk_tests = tests.iloc[first_test:last_test]
+        site_info = chunk_sites.set_index('site_id')
+
+        rows = pd.DataFrame({
+            'site_id': chunk_tests['site_id'].to_numpy(),
+            'site': site_info['site'].reindex(chunk_tests['site_id']).to_numpy(),
+            'timestamp': site_info['timestamp'].reindex(chunk_tests['site_id']).to_numpy(),
+            'error': None,
+            'bot': chunk_tests['bot'].to_numpy(),
+            'user_agent_name': chunk_tests['user_agent_name'].to_numpy(),
+            'status': chunk_tests['status'].to_numpy(),
+            'reason': chunk_tests['reason'].to_numpy(),
+            'reason_code': chunk_tests['reason_code'].to_numpy(),
+            'status_code': chunk_tests['status_code'].to_numpy(),
+            'load_time': chunk_tests['load_time'].to_numpy(),
+        })
+
+        errors = chunk_sites[chunk_sites['error'].notna()]
+        if not errors.empty:
+            rows = pd.concat([rows, pd.DataFrame({
+                'site_id': errors['site_id'].to_numpy(),
+                'site': errors['site'].to_numpy(),
+                'timestamp': errors['timestamp'].to_numpy(),
+                'error': errors['error'].to_numpy(),
+            })], ignore_index=True).sort_values('site_id', kind='stable')
+
+        rows = rows.astype({'status_code': 'Int32'})
+        yield rows.drop(columns='site_id').reset_index(drop=True)
+        start = stop
+
+
+def to_report_rows(rows: pd.DataFrame) -> pd.DataFrame:
+    """Met un bloc de tests au format lisible du rapport (une ligne par test)"""
+    is_error = rows['error'].notna()
+    bot = rows['bot'].astype(str) + '_' + rows['user_agent_name'].astype(str)
+    details = 'Status: ' + rows['status'].astype(str) + ', Reason: ' + rows['reason'].astype(str)
+    return pd.DataFrame({
+        'URL': rows['site'],
+        'Status': np.where(is_error, 'Error', 'Success'),
+        'Error': rows['error'].fillna(''),
+        'Bot': bot.where(~is_error, ''),
+        'Test_Details': details.where(~is_error, ''),
+        'Timestamp': rows['timestamp'].fillna(''),
+    }, columns=EXPORT_COLUMNS)
+
+
+def bot_pivot(frame: ResultsFrame, bot: str) -> pd.DataFrame:
+    """Tableau site × User-Agent des statuts d'un bot"""
+    tests = frame.tests[frame.tests['bot'] == bot]
+    pivot = tests.pivot_table(index='site_id', columns='user_agent_name', values='status',
+                              aggfunc='first', observed=True)
+    pivot = pivot.astype('object')
+    pivot.insert(0, 'Site', frame.sites.set_index('site_id')['site'].reindex(pivot.index).to_numpy())
+    pivot.columns.name = None
+    return pivot.reset_index(drop=True)
+
+
+class Exporter:
+    """Interface commune des exports : écriture incrémentale bloc par bloc"""
+
+    label = ''
+    extension = ''
+    mime = 'application/octet-stream'
+
+    def __init__(self, chunk_size: int = 50000):
+        self.chunk_size = chunk_size
+
+    def is_available(self) -> bool:
+        """Indique si les dépendances de l'export sont installées"""
+        return True
+
+    def write(self, frame: ResultsFrame, path: str) -> str:
+        """Écrit l'export dans path et retourne le chemin"""
+        raise NotImplementedError
+
+
+class ExcelExporter(Exporter):
+    """Export Excel en mode write-only d'openpyxl (mémoire constante)"""
+
+    label = 'Excel (.xlsx)'
+    extension = 'xlsx'
+    mime = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+    def is_available(self) -> bool:
+        return is_installed('openpyxl')
+
+    def write(self, frame: ResultsFrame, path: str) -> str:
+        """Écrit le rapport dans path et retourne le chemin"""
+        openpyxl = optional_import('openpyxl')
+        if not openpyxl:
+            raise RuntimeError("openpyxl est requis pour l'export Excel")
+
+        workbook = openpyxl.Workbook(write_only=True)
+
+        sheet = workbook.create_sheet('Results')
+        sheet.append(EXPORT_COLUMNS)
+        for rows in iter_test_chunks(frame, self.chunk_size):
+            for row in to_report_rows(rows).itertuples(index=False, name=None):
+                sheet.append(row)
+
+        # Une feuille pivot par bot : statut de chaque User-Agent par site
+        for bot in frame.tests['bot'].cat.categories:
+            pivot = bot_pivot(frame, bot)
+            if pivot.empty:
+                continue
+            sheet = workbook.create_sheet(f'Bot - {bot}'[:31])
+            sheet.append(list(pivot.columns))
+            for row in pivot.itertuples(index=False, name=None):
+                sheet.append(['' if pd.isna(value) else value for value in row])
+
+        workbook.save(path)
+        return path
+
+
+class ParquetExporter(Exporter):
+    """Export Parquet typé, colonnes bot/UA/statut encodées en dictionnaire"""
+
+    label = 'Parquet'
+    extension = 'parquet'
+    mime = 'application/vnd.apache.parquet'
+
+    def is_available(self) -> bool:
+        return is_installed('pyarrow')
+
+    @staticmethod
+    def schema():
+        """Schéma Arrow des lignes de tests"""
+        pa = optional_import('pyarrow')
+        dictionary = pa.dictionary(pa.int32(), pa.string())
+        return pa.schema([
+            ('site', pa.string()),
+            ('timestamp', pa.string()),
+            ('error', pa.string()),
+            ('bot', dictionary),
+            ('user_agent_name', dictionary),
+            ('status', dictionary),
+            ('reason', dictionary),
+            ('reason_code', dictionary),
+            ('status_code', pa.int32()),
+            ('load_time', pa.float64()),
+        ])
+
+    def write(self, frame: ResultsFrame, path: str) -> str:
+        pa, pq = optional_import('pyarrow'), optional_import('pyarrow.parquet')
+        if not pq:
+            raise RuntimeError("pyarrow est requis pour l'export Parquet")
+
+        schema = self.schema()
+        with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+            for rows in iter_test_chunks(frame, self.chunk_size):
+                table = pa.Table.from_pandas(rows, preserve_index=False)
+                writer.write_table(table.select(schema.names).cast(schema))
+        return path
+
+
+class CSVExporter(Exporter):
+    """Export CSV compressé (gzip ou zstd) écrit en flux"""
+
+    mime = 'text/csv'
+
+    def __init__(self, compression: str = 'gzip', chunk_size: int = 50000):
+        super().__init__(chunk_size)
+        self.compression = compression
+        self.extension = 'csv.zst' if compression == 'zstd' else 'csv.gz'
+        self.label = f'CSV ({compression})'
+
+    def is_available(self) -> bool:
+        return self.compression != 'zstd' or is_installed('zstandard')
+
+    def write(self, frame: ResultsFrame, path: str) -> str:
+        with _open_compressed(path, self.compression) as handle:
+            for index, rows in enumerate(iter_test_chunks(frame, self.chunk_size)):
+                rows.to_csv(handle, header=index == 0, index=False)
+        return path
+
+
+class JSONLExporter(Exporter):
+    """Export JSON Lines (une ligne par test), compressé en gzip"""
+
+    label = 'JSONL (gzip)'
+    extension = 'jsonl.gz'
+    mime = 'application/gzip'
+
+    def write(self, frame: ResultsFrame, path: str) -> str:
+        with _open_compressed(path, 'gzip') as handle:
+            for rows in iter_test_chunks(frame, self.chunk_size):
+                rows.to_json(handle, orient='records', lines=True, force_ascii=False)
+        return path
+
+
+def _open_compressed(path: str, compression: str):
+    """Ouvre un flux texte compressé en écriture"""
+    if compression == 'zstd':
+        zstandard = optional_import('zstandard')
+        if not zstandard:
+            raise RuntimeError("zstandard est requis pour la compression zstd")
+        raw = open(path, 'wb')
+        stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    return gzip.open(path, 'wt', encoding='utf-8', newline='')
+
+
+EXPORTERS = {
+    'xlsx': ExcelExporter,
+    'parquet': ParquetExporter,
+    'csv.gz': lambda: CSVExporter('gzip'),
+    'csv.zst': lambda: CSVExporter('zstd'),
+    'jsonl.gz': JSONLExporter,
+}
+
+
+# Dépendances optionnelles par format (chargées à la demande, listées dans requirements.txt)
+EXPORT_REQUIREMENTS = {
+    'parquet': 'pyarrow',
+    'csv.zst': 'zstandard',
+}
+
+
+def get_exporter(name: str) -> Exporter:
+    """Instancie l'export correspondant à un format ('xlsx', 'parquet', 'csv.gz'...)"""
+    if name not in EXPORTERS:
+        raise ValueError(f"Format d'export inconnu: {name}")
+    return EXPORTERS[name]()
+
+
+def available_exporters() -> Dict[str, Exporter]:
+    """Exports dont les dépendances sont installées, par format"""
+    exporters = {name: factory() for name, factory in EXPORTERS.items()}
+    return {name: exporter for name, exporter in exporters.items() if exporter.is_available()}
+
+
+def missing_requirements() -> Dict[str, str]:
+    """Formats indisponibles et paquet à installer pour les activer"""
+    return {name: package for name, package in EXPORT_REQUIREMENTS.items() if not is_installed(package)}
@@ -5,10 +5,7 @@ Module de parsing HTML pour extraire les informations des pages
 import re
 from typing import Tuple
 
-try:
-    from bs4 import BeautifulSoup
-except ImportError:
-    BeautifulSoup = None
+from .lazy_imports import optional_import
 
 
 class HTMLParser:
@@ -17,11 +14,13 @@ class HTMLParser:
     @staticmethod
     def parse_html(html_content: str) -> Tuple[str, str, bool]:
         """Parse le HTML pour extraire titre, meta robots et noindex"""
-        if not BeautifulSoup:
+        # bs4 n'est importé qu'au premier parsing
+        bs4 = optional_import('bs4')
+        if not bs4:
             return HTMLParser._parse_html_fallback(html_content)
         
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = bs4.BeautifulSoup(html_content, 'html.parser')
             
             title_tag = soup.find('title')
             title = title_tag.get_text().strip() if title_tag else 'No title'
@@ -0,0 +1,329 @@
+"""
+Archive HTTP : enregistrement des échanges d'une analyse et rejeu hors ligne, déterministe
+
+Format : fichier binaire en ajout seul, une entrée par échange (redirections
+comprises) :
+
+    en-tête  >4sII  (MAGIC, taille des métadonnées, taille du corps)
+    métadonnées     JSON compressé zlib (méthode, URL, User-Agent, code, en-têtes, durées, erreur)
+    corps           compressé zlib ; pour les pages, seulement jusqu'à </head>
+
+L'index (clé -> positions) est reconstruit à l'ouverture en sautant les
+corps ; une dernière entrée incomplète (arrêt brutal) est ignorée.
+"""
+
+import io
+import json
+import re
+import struct
+import threading
+import time
+import zlib
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPHeaderDict
+from urllib3.response import HTTPResponse
+
+from .result_cache import normalize_url
+
+
+MAGIC = b'UAH1'
+HEADER = struct.Struct('>4sII')
+# Les pages ne servent qu'au titre et à la meta robots : le reste du corps n'est pas archivé
+PAGE_BODY_LIMIT = 65536
+ROBOTS_BODY_LIMIT = 4 * 1024 * 1024
+HEAD_END = re.compile(rb'</head\s*>', re.IGNORECASE)
+# En-têtes décrivant l'encodage de transfert : le corps archivé est déjà décodé
+DROPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+# Exceptions rejouées telles qu'enregistrées (sinon ConnectionError)
+REPLAYED_ERRORS = {
+    cls.__name__: cls for cls in (
+        requests.exceptions.ConnectTimeout, requests.exceptions.ReadTimeout, requests.exceptions.Timeout,
+        requests.exceptions.SSLError, requests.exceptions.ProxyError, requests.exceptions.TooManyRedirects,
+        requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError,
+        requests.exceptions.ConnectionError,
+    )
+}
+
+
+def exchange_key(method: str, url: str, user_agent: Optional[str]) -> str:
+    return f'{method.upper()}|{normalize_url(url)}|{user_agent or ""}'
+
+
+def body_limit(url: str) -> int:
+    """Taille maximale du corps à conserver avant de chercher </head> (robots.txt : contenu entier)"""
+    return ROBOTS_BODY_LIMIT if url.split('?', 1)[0].endswith('/robots.txt') else PAGE_BODY_LIMIT
+
+
+def archived_body(url: str, content: bytes) -> Tuple[bytes, bool]:
+    """Partie du corps conservée (robots.txt entier, page jusqu'à </head>) et indicateur de troncature"""
+    limit = body_limit(url)
+    if limit == PAGE_BODY_LIMIT:
+        match = HEAD_END.search(content, 0, PAGE_BODY_LIMIT)
+        limit = match.end() if match else PAGE_BODY_LIMIT
+    return content[:limit], len(content) > limit
+
+
+class HTTPArchive:
+    """Fichier d'archive : ajout d'entrées (enregistrement) et lecture indexée (rejeu)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writer = None
+        self._index: Dict[str, List[Tuple[int, int, int]]] = {}
+        self._served: Dict[str, int] = {}
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Parcourt les en-têtes d'entrées, lit les métadonnées et saute les corps"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return
+        with f:
+            size = f.seek(0, io.SEEK_END)
+            f.seek(0)
+            while True:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    break
+                magic, meta_size, body_size = HEADER.unpack(header)
+                if magic != MAGIC:
+                    raise ValueError(f"{self.path} : entrée invalide à l'octet {f.tell() - HEADER.size}")
+                meta_offset = f.tell()
+                if meta_offset + meta_size + body_size > size:
+                    break
+                meta = json.loads(zlib.decompress(f.read(meta_size)))
+                f.seek(body_size, io.SEEK_CUR)
+                self._index.setdefault(meta['key'], []).append((meta_offset, meta_size, body_size))
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._index.values())
+
+    def append(self, meta: Dict, body: bytes = b'') -> None:
+        """Ajoute une entrée (thread-safe), écrite d'un bloc puis vidée sur disque"""
+        meta_bytes = zlib.compress(json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+        body_bytes = zlib.compress(body) if body else b''
+        record = HEADER.pack(MAGIC, len(meta_bytes), len(body_bytes)) + meta_bytes + body_bytes
+        with self._lock:
+            if self._writer is None:
+                self._writer = open(self.path, 'ab')
+            offset = self._writer.tell()
+            self._writer.write(record)
+            self._writer.flush()
+            self._index.setdefault(meta['key'], []).append(
+                (offset + HEADER.size, len(meta_bytes), len(body_bytes)))
+
+    def lookup(self, key: str) -> Optional[Tuple[Dict, bytes]]:
+        """Prochaine entrée enregistrée pour la clé
+
+        Une clé enregistrée plusieurs fois (réponse 429 puis 200...) est
+        rejouée dans l'ordre d'enregistrement ; la dernière entrée est ensuite
+        servie à nouveau.
+        """
+        with self._lock:
+            entries = self._index.get(key)
+            if not entries:
+                return None
+            position = self._served.get(key, 0)
+            self._served[key] = position + 1
+            meta_offset, meta_size, body_size = entries[min(position, len(entries) - 1)]
+        with open(self.path, 'rb') as f:
+            f.seek(meta_offset)
+            meta = json.loads(zlib.decompress(f.read(meta_size)))
+            body = zlib.decompress(f.read(body_size)) if body_size else b''
+        return meta, body
+
+    def rewind(self) -> None:
+        """Rejoue à nouveau depuis la première entrée de chaque clé"""
+        with self._lock:
+            self._served.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+class _TeeRaw:
+    """Enveloppe de la réponse urllib3 qui copie les blocs lus par l'appelant, jusqu'à la limite d'archive
+
+    Le corps n'est pas lu par l'enregistreur : l'appelant le lit comme
+    d'habitude (par blocs avec read_response_text, annulable), et l'entrée
+    est archivée à la fin de la lecture ou à la fermeture de la réponse.
+    Les autres attributs sont ceux de la réponse urllib3.
+    """
+
+    def __init__(self, raw, limit: int, on_done):
+        self._raw = raw
+        self._limit = limit
+        self._on_done = on_done
+        self._chunks: List[bytes] = []
+        self._captured = 0
+        self._size = 0
+        self._done = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def _capture(self, chunk: bytes) -> None:
+        self._size += len(chunk)
+        if self._captured <= self._limit:
+            self._chunks.append(chunk)
+            self._captured += len(chunk)
+
+    def _finish(self, complete: bool) -> None:
+        if not self._done:
+            self._done = True
+            self._on_done(b''.join(self._chunks), self._size, complete)
+
+    def stream(self, amt=None, decode_content=None):
+        complete = False
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):
+                self._capture(chunk)
+                yield chunk
+            complete = True
+        finally:
+            self._finish(complete)
+
+    def read(self, amt=None, *args, **kwargs):
+        chunk = self._raw.read(amt, *args, **kwargs)
+        self._capture(chunk)
+        if amt is None or not chunk:
+            self._finish(True)
+        return chunk
+
+    def close(self):
+        self._raw.close()
+        self._finish(False)
+
+
+class RecordingAdapter(HTTPAdapter):
+    """Adaptateur qui transmet la requête à l'adaptateur réel et archive l'échange
+
+    Le corps archivé est copié au fil de la lecture faite par l'analyse, sans
+    lecture supplémentaire ni mise en mémoire du corps entier.
+    """
+
+    def __init__(self, archive: HTTPArchive, inner: HTTPAdapter):
+        super().__init__()
+        self.archive = archive
+        self.inner = inner
+
+    def send(self, request, **kwargs):
+        user_agent = request.headers.get('User-Agent')
+        meta = {'key': exchange_key(request.method, request.url, user_agent), 'method': request.method,
+                'url': request.url, 'user_agent': user_agent, 'recorded_at': time.time()}
+        start = time.perf_counter()
+        try:
+            response = self.inner.send(request, **kwargs)
+        except requests.exceptions.RequestException as e:
+            self.archive.append({**meta, 'error': type(e).__name__, 'message': str(e)[:500],
+                                 'elapsed': time.perf_counter() - start})
+            raise
+        headers_received = time.perf_counter() - start
+        meta.update({
+            'status': response.status_code,
+            'reason': response.reason,
+            # En-têtes urllib3 ligne par ligne : les en-têtes répétés (X-Robots-Tag) restent distincts
+            'headers': [[name, value] for name, value in response.raw.headers.items()
+                        if name.lower() not in DROPPED_HEADERS],
+            'encoding': response.encoding,
+            'elapsed': headers_received,
+        })
+
+        def on_done(content: bytes, size: int, complete: bool):
+            body, _ = archived_body(request.url, content)
+            # Corps interrompu (annulation, erreur de lecture) : archivé tel que lu, marqué incomplet
+            self.archive.append({**meta, 'download': time.perf_counter() - start - headers_received,
+                                 'size': size, 'truncated': size > len(body) or not complete,
+                                 'complete': complete}, body)
+
+        response.raw = _TeeRaw(response.raw, body_limit(request.url), on_done)
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Adaptateur qui sert les réponses de l'archive, sans réseau
+
+    Une requête absente de l'archive lève ConnectionError (test NA), une
+    erreur enregistrée (délai, connexion refusée) est levée à l'identique.
+    """
+
+    def __init__(self, archive: HTTPArchive):
+        super().__init__()
+        self.archive = archive
+
+    def send(self, request, **kwargs):
+        found = self.archive.lookup(exchange_key(request.method, request.url, request.headers.get('User-Agent')))
+        if found is None:
+            raise requests.exceptions.ConnectionError(f'Absent de l\'archive : {request.url}', request=request)
+        meta, body = found
+        if meta.get('error'):
+            error = REPLAYED_ERRORS.get(meta['error'], requests.exceptions.ConnectionError)
+            raise error(meta.get('message', ''), request=request)
+
+        headers = HTTPHeaderDict()
+        for name, value in meta['headers']:
+            headers.add(name, value)
+        headers['Content-Length'] = str(len(body))
+        raw = HTTPResponse(body=io.BytesIO(body), headers=headers, status=meta['status'],
+                           reason=meta.get('reason'), preload_content=False, decode_content=False)
+        response = self.build_response(request, raw)
+        response.elapsed = timedelta(seconds=meta.get('elapsed', 0.0))
+        return response
+
+
+# Mode actif du processus : None, ('record', archive) ou ('replay', archive)
+_active: Optional[Tuple[str, HTTPArchive]] = None
+
+
+def record_to(path: str) -> HTTPArchive:
+    """Archive désormais chaque échange des requêtes de l'analyse (ajout à l'archive existante)"""
+    global _active
+    archive = HTTPArchive(path)
+    _active = ('record', archive)
+    return archive
+
+
+def replay_from(path: str) -> HTTPArchive:
+    """Sert désormais les requêtes de l'analyse depuis l'archive, sans réseau"""
+    global _active
+    archive = HTTPArchive(path)
+    if not len(archive):
+        raise ValueError(f"{path} : archive vide ou introuvable")
+    _active = ('replay', archive)
+    return archive
+
+
+def disable() -> None:
+    global _active
+    if _active is not None:
+        _active[1].close()
+    _active = None
+
+
+def transport(adapter: HTTPAdapter) -> HTTPAdapter:
+    """Adaptateur à monter sur une session selon le mode actif (réel, enregistreur ou rejeu)"""
+    if _active is None:
+        return adapter
+    mode, archive = _active
+    return RecordingAdapter(archive, adapter) if mode == 'record' else ReplayAdapter(archive)
+
+
+def get(url: str, adapter: Optional[HTTPAdapter] = None, **kwargs) -> requests.Response:
+    """Équivalent de requests.get passant par l'adaptateur du mode actif"""
+    with requests.Session() as session:
+        mounted = transport(adapter or HTTPAdapter())
+        session.mount('http://', mounted)
+        session.mount('https://', mounted)
+        return session.get(url, **kwargs)
@@ -0,0 +1,363 @@
+"""
+Instrumentation du vérificateur : compteurs, histogrammes et événements de span
+
+Désactivée par défaut : chaque point d'instrumentation se réduit alors à un
+test sur `_registry`. Activation par configure() ou par la variable
+d'environnement UA_CHECKER_METRICS (ex: « prometheus:9464 »,
+« json:/tmp/metrics.json », ou les deux séparés par une virgule).
+"""
+
+import http.server
+import itertools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Métriques connues : type et description (exposées dans le format Prometheus)
+METRICS = {
+    'ua_checker_http_requests_total': ('counter', "Requêtes HTTP émises (kind=robots|probe)"),
+    'ua_checker_http_redirects_total': ('counter', "Redirections suivies"),
+    'ua_checker_bytes_downloaded_total': ('counter', "Octets reçus (corps, avant décompression)"),
+    'ua_checker_cache_hits_total': ('counter', "Résultats servis par le cache (kind=robots|test)"),
+    'ua_checker_cache_misses_total': ('counter', "Résultats absents du cache (kind=robots|test)"),
+    'ua_checker_timeouts_total': ('counter', "Requêtes expirées"),
+    'ua_checker_tests_total': ('counter', "Tests terminés par statut et code de raison"),
+    'ua_checker_urls_total': ('counter', "URLs vérifiées (outcome=success|error)"),
+    'ua_checker_probe_duration_seconds': ('histogram', "Durée d'un test d'User-Agent"),
+    'ua_checker_phase_duration_seconds': ('histogram', "Durée par phase d'un test"),
+    'ua_checker_robots_fetch_duration_seconds': ('histogram', "Durée de récupération d'un robots.txt"),
+    'ua_checker_url_duration_seconds': ('histogram', "Durée de vérification complète d'une URL"),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Histogramme à seaux cumulatifs (format Prometheus)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(borne « le », effectif cumulé) de chaque seau, +Inf compris"""
+        bounds = [repr(bound) for bound in self.buckets] + ['+Inf']
+        return list(zip(bounds, itertools.accumulate(self.counts)))
+
+
+class Span:
+    """Événement chronométré (URL, test...) rattaché au span parent du même thread"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, attributes: Dict):
+        self.registry = registry
+        self.name = name
+        self.attributes = attributes
+        self.span_id = next(self._ids)
+        self.parent_id = None
+        self._start = 0.0
+        self._wall_start = 0.0
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> 'Span':
+        stack = self.registry._span_stack()
+        self.parent_id = stack[-1].span_id if stack else None
+        stack.append(self)
+        self._wall_start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        duration = time.perf_counter() - self._start
+        self.registry._span_stack().pop()
+        if exc_type is not None:
+            self.attributes['error'] = exc_type.__name__
+        self.registry.emit({
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self._wall_start,
+            'duration': round(duration, 6),
+            'attributes': self.attributes,
+        })
+
+
+class _NullSpan:
+    """Span sans effet, partagé, renvoyé quand l'instrumentation est désactivée"""
+
+    def set(self, **attributes) -> None:
+        pass
+
+    def __enter__(self) -> '_NullSpan':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class MetricsRegistry:
+    """Compteurs, histogrammes et derniers spans d'un processus"""
+
+    def __init__(self, max_spans: int = 10000):
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.spans = deque(maxlen=max_spans)
+        self.listeners: List[Callable[[Dict], None]] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def _key(labels: Dict) -> LabelKey:
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(value)
+
+    def _span_stack(self) -> List[Span]:
+        stack = getattr(self._local, 'spans', None)
+        if stack is None:
+            stack = self._local.spans = []
+        return stack
+
+    def emit(self, event: Dict) -> None:
+        """Conserve un événement de span et le transmet aux écouteurs"""
+        self.spans.append(event)
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception:
+                pass
+
+    def to_prometheus(self) -> str:
+        """Exposition au format texte Prometheus 0.0.4"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                lines += self._header(name, 'counter')
+                for key, value in series.items():
+                    lines.append(f"{name}{self._labels(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                lines += self._header(name, 'histogram')
+                for key, histogram in series.items():
+                    for bound, count in histogram.cumulative():
+                        lines.append(f"{name}_bucket{self._labels(key + (('le', bound),))} {count}")
+                    lines.append(f"{name}_sum{self._labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{self._labels(key)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _header(name: str, kind: str) -> List[str]:
+        description = METRICS.get(name, (kind, ''))[1]
+        return [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+
+    @staticmethod
+    def _labels(key: LabelKey) -> str:
+        if not key:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in key)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(key, escaped)) + '}'
+
+    def to_dict(self) -> Dict:
+        """Instantané JSON : compteurs, histogrammes (seaux cumulés) et spans"""
+        with self._lock:
+            return {
+                'counters': {
+                    name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                    for name, series in self.counters.items()
+                },
+                'histograms': {
+                    name: [{'labels': dict(key), 'count': histogram.count, 'sum': histogram.sum,
+                            'buckets': dict(histogram.cumulative())}
+                           for key, histogram in series.items()]
+                    for name, series in self.histograms.items()
+                },
+                'spans': list(self.spans),
+            }
+
+
+class MetricsExporter:
+    """Interface d'un exporteur de métriques"""
+
+    def start(self, registry: MetricsRegistry) -> None:
+        pass
+
+    def flush(self, registry: MetricsRegistry) -> None:
+        """Appelé en fin d'analyse"""
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class PrometheusExporter(MetricsExporter):
+    """Expose /metrics au format texte Prometheus sur un port local"""
+
+    def __init__(self, port: int = 9464, host: str = '127.0.0.1'):
+        self.port = port
+        self.host = host
+        self._server = None
+
+    def start(self, registry: MetricsRegistry) -> None:
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class JSONExporter(MetricsExporter):
+    """Écrit l'instantané des métriques et des spans dans un fichier JSON en fin d'analyse"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def flush(self, registry: MetricsRegistry) -> None:
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(registry.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+_registry: Optional[MetricsRegistry] = None
+_exporters: List[MetricsExporter] = []
+
+
+def configure(exporters: List[MetricsExporter], registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """Active l'instrumentation avec les exporteurs donnés (remplace la configuration précédente)"""
+    global _registry, _exporters
+    disable()
+    registry = registry or MetricsRegistry()
+    for exporter in exporters:
+        exporter.start(registry)
+    _exporters = list(exporters)
+    _registry = registry
+    return registry
+
+
+def configure_from_env(variable: str = 'UA_CHECKER_METRICS') -> Optional[MetricsRegistry]:
+    """Active l'instrumentation selon la variable d'environnement, si elle est définie"""
+    spec = os.environ.get(variable, '').strip()
+    if not spec:
+        return None
+    exporters = []
+    for item in spec.split(','):
+        kind, _, argument = item.strip().partition(':')
+        if kind == 'prometheus':
+            exporters.append(PrometheusExporter(int(argument or 9464)))
+        elif kind == 'json':
+            exporters.append(JSONExporter(argument or 'ua_checker_metrics.json'))
+        else:
+            raise ValueError(f"Exporteur de métriques inconnu : {kind}")
+    return configure(exporters)
+
+
+def disable() -> None:
+    """Désactive l'instrumentation et ferme les exporteurs"""
+    global _registry, _exporters
+    for exporter in _exporters:
+        exporter.close()
+    _registry, _exporters = None, []
+
+
+def get_registry() -> Optional[MetricsRegistry]:
+    return _registry
+
+
+def enabled() -> bool:
+    return _registry is not None
+
+
+def flush() -> None:
+    """Fin d'analyse : transmet l'état courant aux exporteurs (ex: écriture du JSON)"""
+    if _registry is None:
+        return
+    for exporter in _exporters:
+        exporter.flush(_registry)
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    if _registry is not None:
+        _registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    if _registry is not None:
+        _registry.observe(name, value, **labels)
+
+
+def span(name: str, **attributes):
+    """Span chronométré (à utiliser avec `with`), sans effet si l'instrumentation est désactivée"""
+    if _registry is None:
+        return NULL_SPAN
+    return Span(_registry, name, attributes)
+
+
+def record_response(kind: str, response, duration: float) -> None:
+    """Requête terminée : compteurs de requêtes, redirections, octets reçus et histogramme de durée"""
+    if _registry is None:
+        return
+    _registry.inc('ua_checker_http_requests_total', kind=kind, status=f'{response.status_code // 100}xx')
+    if response.history:
+        _registry.inc('ua_checker_http_redirects_total', len(response.history), kind=kind)
+    try:
+        # Octets lus sur le réseau par urllib3 (corps compressé le cas échéant)
+        received = response.raw.tell()
+    except Exception:
+        # Jamais response.content ici : lire le corps bloquerait sans jeton d'annulation
+        try:
+            received = int(response.headers.get('Content-Length') or 0)
+        except (TypeError, ValueError):
+            received = 0
+    _registry.inc('ua_checker_bytes_downloaded_total', received, kind=kind)
+    if kind == 'robots':
+        _registry.observe('ua_checker_robots_fetch_duration_seconds', duration)
@@ -0,0 +1,253 @@
+"""
+Plages IP publiées par les éditeurs de crawlers (Googlebot, Bingbot, GPTBot, ClaudeBot, PerplexityBot)
+"""
+
+import ipaddress
+import json
+import logging
+import os
+import socket
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+logger = logging.getLogger(__name__)
+
+# Dossier des fichiers JSON de plages (surchargeable par UA_CHECKER_IP_RANGES)
+DEFAULT_RANGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'ip_ranges')
+
+# Fichiers locaux par famille de BOT_DEFINITIONS, et URL de publication (None : fichier à déposer à la main)
+VENDOR_RANGE_FILES = {
+    'googlebot': {'googlebot.json': 'https://developers.google.com/static/search/apis/ipranges/googlebot.json'},
+    'bingbot': {'bingbot.json': 'https://www.bing.com/toolbox/bingbot.json'},
+    'openai': {
+        'gptbot.json': 'https://openai.com/gptbot.json',
+        'searchbot.json': 'https://openai.com/searchbot.json',
+        'chatgpt-user.json': 'https://openai.com/chatgpt-user.json',
+    },
+    'anthropic': {'claudebot.json': None},
+    'perplexity': {
+        'perplexitybot.json': 'https://www.perplexity.ai/perplexitybot.json',
+        'perplexity-user.json': 'https://www.perplexity.ai/perplexity-user.json',
+    },
+}
+
+
+def parse_ip(value: str) -> Optional[ipaddress._BaseAddress]:
+    """Adresse IPv4 ou IPv6 (IPv4 mappée en IPv6 ramenée en IPv4), None si invalide"""
+    try:
+        address = ipaddress.ip_address(value.strip())
+    except (ValueError, AttributeError):
+        return None
+    if address.version == 6 and address.ipv4_mapped:
+        return address.ipv4_mapped
+    return address
+
+
+def read_prefixes(content) -> Tuple[List[str], Optional[str]]:
+    """Préfixes CIDR et date de création d'un fichier de plages
+
+    Format des éditeurs : {"creationTime": ..., "prefixes": [{"ipv4Prefix": ...}, {"ipv6Prefix": ...}]} ;
+    une simple liste de CIDR est aussi acceptée.
+    """
+    if isinstance(content, list):
+        return [str(prefix) for prefix in content], None
+    prefixes = []
+    for entry in content.get('prefixes', []):
+        if isinstance(entry, str):
+            prefixes.append(entry)
+        else:
+            prefixes.extend(entry[key] for key in ('ipv4Prefix', 'ipv6Prefix') if entry.get(key))
+    return prefixes, content.get('creationTime')
+
+
+class IntervalIndex:
+    """Intervalles d'adresses fusionnés et triés, interrogés par recherche dichotomique
+
+    IPv4 : bornes uint32. IPv6 : bornes sur 16 octets big-endian (dtype S16),
+    dont l'ordre lexicographique est l'ordre numérique.
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[int, int]], version: int):
+        self.version = version
+        merged = []
+        for start, end in sorted(intervals):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.size = len(merged)
+        self.starts = self._encode([start for start, _ in merged])
+        self.ends = self._encode([end for _, end in merged])
+
+    def _encode(self, values: List[int]) -> np.ndarray:
+        if self.version == 4:
+            return np.array(values, dtype=np.uint32)
+        return np.array([value.to_bytes(16, 'big') for value in values], dtype='S16')
+
+    def contains_encoded(self, addresses: np.ndarray) -> np.ndarray:
+        """Appartenance d'adresses déjà encodées (uint32 ou S16) à l'un des intervalles"""
+        if not self.size or not len(addresses):
+            return np.zeros(len(addresses), dtype=bool)
+        positions = np.searchsorted(self.starts, addresses, side='right') - 1
+        inside = positions >= 0
+        inside[inside] = addresses[inside] <= self.ends[positions[inside]]
+        return inside
+
+
+@dataclass
+class RangeSource:
+    """Provenance des plages d'une famille (fichiers lus, nombre de préfixes, date éditeur)"""
+    files: List[str] = field(default_factory=list)
+    prefixes: int = 0
+    created: Optional[str] = None
+
+
+class IPRanges:
+    """Plages publiées par famille de bot, en IPv4 et IPv6, avec recherche unitaire et en masse"""
+
+    def __init__(self, prefixes: Dict[str, Iterable[str]], sources: Optional[Dict[str, RangeSource]] = None):
+        self.sources = sources or {}
+        self._indexes = {}
+        for family, family_prefixes in prefixes.items():
+            intervals = {4: [], 6: []}
+            for prefix in family_prefixes:
+                try:
+                    network = ipaddress.ip_network(prefix.strip(), strict=False)
+                except ValueError:
+                    continue
+                intervals[network.version].append(
+                    (int(network.network_address), int(network.broadcast_address)))
+            if intervals[4] or intervals[6]:
+                self._indexes[family] = {version: IntervalIndex(values, version)
+                                         for version, values in intervals.items()}
+
+    @classmethod
+    def from_directory(cls, directory: Optional[str] = None) -> 'IPRanges':
+        """Charge les fichiers de VENDOR_RANGE_FILES présents dans le dossier (les absents sont ignorés)"""
+        directory = directory or os.environ.get('UA_CHECKER_IP_RANGES') or DEFAULT_RANGES_DIR
+        prefixes, sources = {}, {}
+        for family, files in VENDOR_RANGE_FILES.items():
+            for filename in files:
+                path = os.path.join(directory, filename)
+                try:
+                    with open(path, encoding='utf-8') as f:
+                        file_prefixes, created = read_prefixes(json.load(f))
+                except (OSError, ValueError):
+                    continue
+                prefixes.setdefault(family, []).extend(file_prefixes)
+                source = sources.setdefault(family, RangeSource())
+                source.files.append(path)
+                source.prefixes += len(file_prefixes)
+                source.created = max(filter(None, [source.created, created]), default=None)
+        return cls(prefixes, sources)
+
+    @property
+    def families(self) -> List[str]:
+        """Familles dont les plages sont connues"""
+        return list(self._indexes)
+
+    def has_ranges(self, family: str) -> bool:
+        return family in self._indexes
+
+    def contains(self, family: str, ip: str) -> Optional[bool]:
+        """L'IP appartient-elle aux plages de la famille ? None si plages inconnues ou IP invalide"""
+        indexes = self._indexes.get(family)
+        address = parse_ip(ip) if indexes else None
+        if address is None:
+            return None
+        index = indexes[address.version]
+        encoded = (np.array([int(address)], dtype=np.uint32) if address.version == 4
+                   else np.array([address.packed], dtype='S16'))
+        return bool(index.contains_encoded(encoded)[0])
+
+    def contains_many(self, family: str, ips) -> np.ndarray:
+        """Vérification en masse : True/False par IP, None si plages inconnues ou IP invalide
+
+        Les IPs sont dédoublonnées avant décodage (les journaux répètent les
+        mêmes adresses) ; la recherche est vectorisée par version d'IP.
+        """
+        codes, uniques = pd.factorize(pd.Series(ips, dtype='object'), use_na_sentinel=True)
+        verdicts = np.full(len(uniques) + 1, None, dtype=object)
+        indexes = self._indexes.get(family)
+        if indexes is not None and len(uniques):
+            v4_positions, v4_values, v6_positions, v6_values = [], [], [], []
+            for position, value in enumerate(uniques):
+                packed, version = _pack(value)
+                if version == 4:
+                    v4_positions.append(position)
+                    v4_values.append(packed)
+                elif version == 6:
+                    v6_positions.append(position)
+                    v6_values.append(packed)
+            if v4_positions:
+                encoded = np.frombuffer(b''.join(v4_values), dtype='>u4').astype(np.uint32)
+                verdicts[v4_positions] = indexes[4].contains_encoded(encoded)
+            if v6_positions:
+                verdicts[v6_positions] = indexes[6].contains_encoded(np.array(v6_values, dtype='S16'))
+        # Le code -1 (valeur manquante) désigne le dernier élément : None
+        return verdicts[codes]
+
+
+def _pack(value) -> Tuple[Optional[bytes], Optional[int]]:
+    """Adresse sous forme binaire (4 ou 16 octets) et sa version, (None, None) si invalide"""
+    if not isinstance(value, str):
+        return None, None
+    try:
+        return socket.inet_pton(socket.AF_INET, value), 4
+    except OSError:
+        pass
+    try:
+        packed = socket.inet_pton(socket.AF_INET6, value)
+    except OSError:
+        return None, None
+    # IPv4 mappée (::ffff:a.b.c.d) : comparée aux plages IPv4
+    if packed[:12] == b'\x00' * 10 + b'\xff\xff':
+        return packed[12:], 4
+    return packed, 6
+
+
+def download_ip_ranges(directory: Optional[str] = None, timeout: float = 15) -> Dict[str, str]:
+    """Télécharge les fichiers publiés par les éditeurs dans le dossier local ; statut par fichier"""
+    import requests
+
+    directory = directory or os.environ.get('UA_CHECKER_IP_RANGES') or DEFAULT_RANGES_DIR
+    os.makedirs(directory, exist_ok=True)
+    statuses = {}
+    for files in VENDOR_RANGE_FILES.values():
+        for filename, url in files.items():
+            if url is None:
+                statuses[filename] = 'non publié : fichier à déposer manuellement'
+                continue
+            try:
+                response = requests.get(url, timeout=timeout)
+                response.raise_for_status()
+                prefixes, _ = read_prefixes(response.json())
+            except (requests.RequestException, ValueError) as e:
+                statuses[filename] = f'échec : {e}'
+                continue
+            # Écriture atomique : un fichier partiel ne remplace jamais une version valide
+            path = os.path.join(directory, filename)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                f.write(response.text)
+            os.replace(path + '.tmp', path)
+            statuses[filename] = f'{len(prefixes)} préfixes'
+    get_ip_ranges.cache_clear()
+    return statuses
+
+
+@lru_cache(maxsize=1)
+def get_ip_ranges() -> IPRanges:
+    """Plages chargées une fois par processus depuis le dossier configuré"""
+    ranges = IPRanges.from_directory()
+    if not ranges.families:
+        # Sans plages, toute vérification d'IP retombe sur le DNS inverse (ou reste indéterminée)
+        logger.warning(
+            "Aucune plage IP de crawler chargée depuis %s : lancez `python cli.py --update-ip-ranges` "
+            "ou définissez UA_CHECKER_IP_RANGES",
+            os.environ.get('UA_CHECKER_IP_RANGES') or DEFAULT_RANGES_DIR)
+    return ranges
@@ -0,0 +1,27 @@
+"""
+Imports différés des dépendances lourdes ou optionnelles (bs4, protego, openpyxl, pyarrow...)
+"""
+
+import importlib
+import importlib.util
+from functools import lru_cache
+from types import ModuleType
+from typing import Optional
+
+
+@lru_cache(maxsize=None)
+def optional_import(name: str) -> Optional[ModuleType]:
+    """Module importé au premier appel puis mémorisé, None s'il n'est pas installé"""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+
+@lru_cache(maxsize=None)
+def is_installed(name: str) -> bool:
+    """Indique si un module est installé, sans l'importer"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -0,0 +1,388 @@
+"""
+Analyse des journaux d'accès (format combined nginx/Apache) : quels bots visitent réellement le site
+"""
+
+import glob
+import gzip
+import mmap
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .cancellation import CancellationToken
+from .dns_verification import DNSVerifier, get_dns_verifier
+from .ip_ranges import get_ip_ranges
+from .ua_classifier import get_classifier
+
+
+# Ligne combined : ip - user [jour:heure zone] "MÉTHODE chemin PROTO" statut octets "referer" "user-agent"
+# Appliquée en mode MULTILINE sur des blocs entiers : aucun groupe ne doit franchir un saut de ligne
+COMBINED_LOG_PATTERN = re.compile(
+    rb'^(?P<ip>\S+) \S+ \S+ \[(?P<day>[^:\]\n]+):[^\]\n]*\] '
+    rb'"(?:[A-Z]+ )?(?P<path>[^" \n]*)[^"\n]*" '
+    rb'(?P<status>\d{3}) (?P<bytes>\d+|-) '
+    rb'"[^"\n]*" "(?P<ua>[^"\n]*)"',
+    re.MULTILINE
+)
+# Fichiers d'une rotation : access.log.1, access.log.2.gz...
+ROTATED_SUFFIX = re.compile(r'\.\d+(\.gz)?$')
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+READ_BLOCK_SIZE = 8 * 1024 * 1024
+DEFAULT_PREFIX_DEPTH = 1
+AGGREGATE_COLUMNS = ['bot', 'path_prefix', 'day', 'status', 'ip_verdict', 'hits', 'bytes']
+# Adresse source comparée aux plages publiées par l'éditeur du bot annoncé
+IP_VERDICTS = ['verified', 'spoofed', 'unknown']
+IP_VERDICT_LABELS = {
+    'verified': "IP dans les plages publiées",
+    'spoofed': "IP hors plages (usurpation probable)",
+    'unknown': "Non vérifiable",
+}
+# Mois du format combined, toujours en anglais quelle que soit la locale
+MONTHS = {name: index for index, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1)}
+
+
+@dataclass(frozen=True)
+class LogChunk:
+    """Tranche d'un journal confiée à un processus : octets [start, end) d'un fichier texte,
+    ou le fichier entier (end=None) pour un journal compressé"""
+    path: str
+    start: int = 0
+    end: Optional[int] = None
+
+
+@dataclass
+class ChunkStats:
+    lines: int = 0
+    bot_lines: int = 0
+    spoofed_lines: int = 0
+    malformed: int = 0
+    bytes_read: int = 0
+
+    def merge(self, other: 'ChunkStats') -> None:
+        self.lines += other.lines
+        self.bot_lines += other.bot_lines
+        self.spoofed_lines += other.spoofed_lines
+        self.malformed += other.malformed
+        self.bytes_read += other.bytes_read
+
+
+@dataclass
+class LogAnalysis:
+    """Agrégats d'une analyse : une ligne par bot, préfixe de chemin, jour et code HTTP"""
+    aggregates: pd.DataFrame
+    files: List[str]
+    stats: ChunkStats = field(default_factory=ChunkStats)
+    seconds: float = 0.0
+    stopped: Optional[str] = None
+
+    def by_bot(self) -> pd.DataFrame:
+        """Requêtes et octets servis par bot, du plus actif au moins actif"""
+        return (self.aggregates.groupby('bot', observed=True)[['hits', 'bytes']].sum()
+                .sort_values('hits', ascending=False))
+
+    def by_day(self) -> pd.DataFrame:
+        """Requêtes par jour (lignes) et par bot (colonnes)"""
+        return self.aggregates.pivot_table(index='day', columns='bot', values='hits',
+                                           aggfunc='sum', fill_value=0, observed=True)
+
+    def by_prefix(self, limit: int = 50) -> pd.DataFrame:
+        """Préfixes de chemin les plus visités, avec le détail par bot"""
+        table = self.aggregates.pivot_table(index='path_prefix', columns='bot', values='hits',
+                                            aggfunc='sum', fill_value=0, observed=True)
+        table['total'] = table.sum(axis=1)
+        return table.sort_values('total', ascending=False).head(limit)
+
+    def ip_verification(self) -> pd.DataFrame:
+        """Requêtes par bot (lignes) et verdict de l'adresse source (colonnes)"""
+        return self.aggregates.pivot_table(index='bot', columns='ip_verdict', values='hits',
+                                           aggfunc='sum', fill_value=0, observed=False)
+
+    def by_status(self) -> pd.DataFrame:
+        """Requêtes par bot (lignes) et code HTTP (colonnes)"""
+        return self.aggregates.pivot_table(index='bot', columns='status', values='hits',
+                                           aggfunc='sum', fill_value=0, observed=True)
+
+
+def expand_log_paths(paths: Iterable[str], include_rotated: bool = True) -> List[str]:
+    """Fichiers désignés par des chemins, motifs glob ou dossiers
+
+    Un dossier apporte tous ses fichiers ; un journal apporte aussi, si
+    `include_rotated`, les fichiers de sa rotation (access.log.1, access.log.2.gz...).
+    """
+    files = []
+    for path in paths:
+        path = os.path.expanduser(path.strip())
+        if not path:
+            continue
+        if os.path.isdir(path):
+            matches = [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            matches = glob.glob(path) or [path]
+            if include_rotated:
+                matches += [candidate for match in list(matches) for candidate in glob.glob(glob.escape(match) + '.*')
+                            if ROTATED_SUFFIX.search(candidate[len(match):])]
+        files.extend(match for match in matches if os.path.isfile(match))
+    return sorted(dict.fromkeys(files))
+
+
+def plan_chunks(files: Iterable[str], chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[LogChunk]:
+    """Découpe les fichiers texte en tranches de `chunk_size` octets ; un fichier .gz reste entier"""
+    chunks = []
+    for path in files:
+        if path.endswith('.gz'):
+            chunks.append(LogChunk(path))
+            continue
+        size = os.path.getsize(path)
+        chunks.extend(LogChunk(path, start, min(start + chunk_size, size))
+                      for start in range(0, size, chunk_size))
+    return chunks
+
+
+def path_prefix(path: bytes, depth: int = DEFAULT_PREFIX_DEPTH) -> bytes:
+    """Préfixe des `depth` premiers segments : /blog/2024/article -> /blog/ (depth=1)"""
+    path = path.split(b'?', 1)[0]
+    segments = path.split(b'/', depth + 1)
+    if len(segments) > depth + 1:
+        return b'/'.join(segments[:depth + 1]) + b'/'
+    return path or b'/'
+
+
+def parse_day(raw: bytes) -> Optional[date]:
+    """Jour d'un horodatage combined (10/Oct/2024), None s'il est illisible"""
+    try:
+        day, month, year = raw.split(b'/')
+        return date(int(year), MONTHS[month.decode('ascii')], int(day))
+    except (ValueError, KeyError, UnicodeDecodeError):
+        return None
+
+
+class ChunkMemo:
+    """Mémos propres à un processus : le décodage, la classification et la vérification
+    d'IP ne sont faits qu'une fois par User-Agent brut et par couple (famille, IP)
+
+    Avec un vérificateur DNS, les IPs des familles sans plages publiées sont
+    vérifiées par DNS inverse et direct, en parallèle, avant l'agrégation de
+    chaque bloc ; le cache du vérificateur vaut pour tout le processus.
+    """
+
+    def __init__(self, dns_verifier: Optional[DNSVerifier] = None):
+        self.families: Dict[bytes, Optional[str]] = {}
+        self.ip_verdicts: Dict[Tuple[str, bytes], str] = {}
+        self.dns_verifier = dns_verifier
+
+    def family(self, user_agent: bytes) -> Optional[str]:
+        try:
+            return self.families[user_agent]
+        except KeyError:
+            family = self.families[user_agent] = get_classifier().classify(user_agent.decode('latin-1'))
+            return family
+
+    def ip_verdict(self, family: str, ip: bytes) -> str:
+        key = (family, ip)
+        verdict = self.ip_verdicts.get(key)
+        if verdict is None:
+            valid = get_ip_ranges().contains(family, ip.decode('latin-1'))
+            verdict = self.ip_verdicts[key] = 'unknown' if valid is None else ('verified' if valid else 'spoofed')
+        return verdict
+
+    def prefetch_dns(self, rows: List[Tuple[bytes, ...]]) -> None:
+        """Vérifie par DNS, en une passe concurrente, les couples (famille, IP) encore indécis d'un bloc"""
+        pending = set()
+        for row in rows:
+            family = self.family(row[-1])
+            if family is not None and DNSVerifier.domains(family) and (family, row[0]) not in self.ip_verdicts:
+                if self.ip_verdict(family, row[0]) == 'unknown':
+                    pending.add((family, row[0]))
+        if not pending:
+            return
+        results = self.dns_verifier.verify_many((family, ip.decode('latin-1')) for family, ip in pending)
+        for family, ip in pending:
+            authentic = results[(family, ip.decode('latin-1'))]['is_authentic']
+            if authentic is not None:
+                self.ip_verdicts[(family, ip)] = 'verified' if authentic else 'spoofed'
+
+
+def aggregate_buffer(data: bytes, counts: Dict[Tuple, List[int]], stats: ChunkStats,
+                     memo: ChunkMemo, depth: int) -> None:
+    """Ajoute à `counts` les lignes de bots d'un bloc de lignes complètes"""
+    families = memo.families
+    lines = data.count(b'\n') + (not data.endswith(b'\n') and bool(data))
+    matched = 0
+    rows = COMBINED_LOG_PATTERN.findall(data)
+    if memo.dns_verifier is not None:
+        memo.prefetch_dns(rows)
+    for ip, day, path, status, size, user_agent in rows:
+        matched += 1
+        try:
+            family = families[user_agent]
+        except KeyError:
+            family = memo.family(user_agent)
+        if family is None:
+            continue
+        stats.bot_lines += 1
+        verdict = memo.ip_verdict(family, ip)
+        if verdict == 'spoofed':
+            stats.spoofed_lines += 1
+        key = (family, path_prefix(path, depth), day, status, verdict)
+        entry = counts.get(key)
+        if entry is None:
+            entry = counts[key] = [0, 0]
+        entry[0] += 1
+        if size != b'-':
+            entry[1] += int(size)
+    stats.lines += lines
+    stats.malformed += lines - matched
+    stats.bytes_read += len(data)
+
+
+def _aggregate_mapped(chunk: LogChunk, counts, stats, memo, depth) -> None:
+    """Tranche d'un fichier texte lue par mmap : lignes qui commencent dans [start, end)"""
+    with open(chunk.path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            size = len(mapped)
+            end = size if chunk.end is None else min(chunk.end, size)
+            start = 0 if chunk.start == 0 else mapped.find(b'\n', chunk.start - 1) + 1
+            if chunk.start and start == 0:
+                return
+            stop = mapped.find(b'\n', end - 1) + 1 or size
+            # Traitement par blocs pour borner la mémoire des grosses tranches
+            while start < stop:
+                block_end = min(start + READ_BLOCK_SIZE, stop)
+                if block_end < stop:
+                    block_end = mapped.rfind(b'\n', start, block_end) + 1 or stop
+                aggregate_buffer(mapped[start:block_end], counts, stats, memo, depth)
+                start = block_end
+
+
+def _aggregate_gzip(chunk: LogChunk, counts, stats, memo, depth) -> None:
+    """Journal compressé lu séquentiellement par blocs (les lignes coupées sont reportées)"""
+    remainder = b''
+    with gzip.open(chunk.path, 'rb') as f:
+        while True:
+            block = f.read(READ_BLOCK_SIZE)
+            if not block:
+                break
+            block = remainder + block
+            cut = block.rfind(b'\n') + 1
+            remainder = block[cut:]
+            if cut:
+                aggregate_buffer(block[:cut], counts, stats, memo, depth)
+    if remainder:
+        aggregate_buffer(remainder, counts, stats, memo, depth)
+
+
+def analyze_chunk(chunk: LogChunk, depth: int = DEFAULT_PREFIX_DEPTH,
+                  verify_dns: bool = False) -> Tuple[Dict, ChunkStats]:
+    """Agrégats d'une tranche (exécuté dans un processus du pool)"""
+    counts, stats, memo = {}, ChunkStats(), ChunkMemo(get_dns_verifier() if verify_dns else None)
+    if chunk.path.endswith('.gz'):
+        _aggregate_gzip(chunk, counts, stats, memo, depth)
+    else:
+        _aggregate_mapped(chunk, counts, stats, memo, depth)
+    return counts, stats
+
+
+class LogAnalyzer:
+    """Analyse parallèle de journaux d'accès
+
+    Les fichiers texte sont découpés en tranches lues par mmap, les fichiers
+    compressés sont traités entiers ; chaque tranche est agrégée dans un
+    processus du pool, puis les agrégats partiels sont fusionnés.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 prefix_depth: int = DEFAULT_PREFIX_DEPTH, verify_dns: bool = False):
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.prefix_depth = prefix_depth
+        self.verify_dns = verify_dns
+
+    def analyze(self, paths: Iterable[str], include_rotated: bool = True,
+                progress: Optional[Callable[[int, int], None]] = None,
+                token: Optional[CancellationToken] = None) -> LogAnalysis:
+        """Analyse les journaux désignés par `paths` (fichiers, motifs glob, dossiers)
+
+        `progress(faites, total)` est appelé après chaque tranche. Si le jeton
+        est annulé, les tranches non commencées sont abandonnées et l'analyse
+        porte sur ce qui a déjà été lu (`stopped` indique le motif).
+        """
+        started = time.perf_counter()
+        files = expand_log_paths(paths, include_rotated)
+        chunks = plan_chunks(files, self.chunk_size)
+        counts, stats, stopped = {}, ChunkStats(), None
+
+        def merge(partial):
+            partial_counts, partial_stats = partial
+            for key, (hits, size) in partial_counts.items():
+                entry = counts.get(key)
+                if entry is None:
+                    counts[key] = [hits, size]
+                else:
+                    entry[0] += hits
+                    entry[1] += size
+            stats.merge(partial_stats)
+
+        if self.workers <= 1 or len(chunks) <= 1:
+            for done, chunk in enumerate(chunks, 1):
+                if token is not None and token.reason:
+                    stopped = token.reason
+                    break
+                merge(analyze_chunk(chunk, self.prefix_depth, self.verify_dns))
+                if progress:
+                    progress(done, len(chunks))
+        else:
+            # spawn : un fork depuis un serveur multithread (Streamlit) peut se bloquer
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(chunks)), mp_context=context) as executor:
+                pending = {executor.submit(analyze_chunk, chunk, self.prefix_depth, self.verify_dns) for chunk in chunks}
+                try:
+                    while pending:
+                        done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            merge(future.result())
+                        if progress and done:
+                            progress(len(chunks) - len(pending), len(chunks))
+                        if token is not None and token.reason:
+                            stopped = token.reason
+                            break
+                finally:
+                    for future in pending:
+                        future.cancel()
+
+        return LogAnalysis(self._to_frame(counts), files, stats,
+                           round(time.perf_counter() - started, 3), stopped)
+
+    @staticmethod
+    def _to_frame(counts: Dict[Tuple, List[int]]) -> pd.DataFrame:
+        """Agrégats fusionnés en DataFrame typé (bot et préfixe catégoriels, jour en date)"""
+        if not counts:
+            frame = pd.DataFrame({column: [] for column in AGGREGATE_COLUMNS})
+            return frame.astype({'hits': 'int64', 'bytes': 'int64', 'status': 'int16',
+                                 'ip_verdict': pd.CategoricalDtype(IP_VERDICTS)})
+        keys = list(counts)
+        values = list(counts.values())
+        frame = pd.DataFrame({
+            'bot': pd.Categorical([key[0] for key in keys]),
+            'path_prefix': pd.Categorical([key[1].decode('utf-8', errors='replace') for key in keys]),
+            'day': [key[2] for key in keys],
+            'status': pd.array([int(key[3]) for key in keys], dtype='int16'),
+            'ip_verdict': pd.Categorical([key[4] for key in keys], categories=IP_VERDICTS),
+            'hits': pd.array([value[0] for value in values], dtype='int64'),
+            'bytes': pd.array([value[1] for value in values], dtype='int64'),
+        })
+        # Un seul décodage par jour distinct (10/Oct/2024 -> date)
+        frame['day'] = frame['day'].map({raw: parse_day(raw) for raw in frame['day'].unique()})
+        # Ordre total : le résultat ne dépend pas de l'ordre de fusion des tranches
+        return frame.sort_values(['day', 'bot', 'hits', 'path_prefix', 'status', 'ip_verdict'],
+                                 ascending=[True, True, False, True, True, True], ignore_index=True)
@@ -0,0 +1,296 @@
+"""
+Surveillance planifiée d'une liste de sites : changements de verdict robots.txt par bot, horodatés
+"""
+
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import requests
+
+from .cancellation import CancellationToken
+from .robots_parser import RobotsParser
+
+
+# Base de la liste de surveillance (surchargeable par UA_CHECKER_WATCHLIST)
+DEFAULT_WATCH_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'watchlist.db')
+DEFAULT_INTERVAL = 3600
+# Variation aléatoire de l'intervalle (± 10 %) : les sites ne se resynchronisent pas au fil des passages
+DEFAULT_JITTER = 0.1
+# Réponses transitoires : le verdict précédent est conservé
+TRANSIENT_STATUSES = {429} | set(range(500, 600))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sites (
+    url TEXT PRIMARY KEY,
+    bots TEXT NOT NULL,
+    added REAL NOT NULL,
+    next_due REAL NOT NULL,
+    last_checked REAL,
+    etag TEXT,
+    last_modified TEXT,
+    robots_hash TEXT,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS sites_due ON sites (next_due);
+CREATE TABLE IF NOT EXISTS verdicts (
+    url TEXT NOT NULL,
+    bot TEXT NOT NULL,
+    status TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    since REAL NOT NULL,
+    PRIMARY KEY (url, bot)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    change_id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    bot TEXT NOT NULL,
+    previous_status TEXT NOT NULL,
+    previous_reason TEXT NOT NULL,
+    status TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    changed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS changes_time ON changes (changed_at);
+"""
+
+
+def robots_url_for(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/robots.txt"
+
+
+def content_hash(status_code: int, content: str) -> str:
+    """Empreinte d'un robots.txt : un changement de code (200 -> 404) compte comme un changement"""
+    return hashlib.sha256(f'{status_code}\n{content}'.encode('utf-8')).hexdigest()
+
+
+class WatchStore:
+    """Stockage SQLite local : sites surveillés, validateurs HTTP, verdicts courants et historique"""
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 30):
+        self.path = path or os.environ.get('UA_CHECKER_WATCHLIST') or DEFAULT_WATCH_DB
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connexion propre au thread (sqlite3 n'autorise pas le partage entre threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def add_sites(self, urls: Sequence[str], bots: List[str], interval: float = DEFAULT_INTERVAL,
+                  now: Optional[float] = None) -> int:
+        """Ajoute (ou met à jour les bots de) sites ; renvoie le nombre de sites nouveaux
+
+        Le premier passage d'un site est placé à une position stable de
+        l'intervalle, tirée du hachage de son URL : les sites sont répartis
+        sur l'intervalle au lieu d'être vérifiés tous ensemble. Un site déjà
+        surveillé dont les bots changent perd ses validateurs et son
+        empreinte et passe dû tout de suite : sans cela, un 304 ou un
+        robots.txt inchangé empêcherait d'évaluer les nouveaux bots.
+        """
+        now = time.time() if now is None else now
+        connection = self._connection()
+        before = self.count()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                """INSERT INTO sites (url, bots, added, next_due) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (url) DO UPDATE SET bots = excluded.bots, etag = NULL, last_modified = NULL,
+                       robots_hash = NULL, next_due = excluded.added
+                   WHERE sites.bots != excluded.bots""",
+                [(url, json.dumps(bots), now, now + zlib.crc32(url.encode('utf-8')) / 2 ** 32 * interval)
+                 for url in urls]
+            )
+        return self.count() - before
+
+    def remove_sites(self, urls: Sequence[str]) -> None:
+        with self._connection() as connection:
+            for table in ('sites', 'verdicts'):
+                connection.executemany(f'DELETE FROM {table} WHERE url = ?', [(url,) for url in urls])
+
+    def count(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM sites').fetchone()[0]
+
+    def sites(self) -> List[Dict]:
+        return [dict(row) for row in self._connection().execute('SELECT * FROM sites ORDER BY url')]
+
+    def due(self, now: float) -> List[Dict]:
+        """Sites dont l'échéance est passée, les plus en retard d'abord"""
+        rows = self._connection().execute('SELECT * FROM sites WHERE next_due <= ? ORDER BY next_due', (now,))
+        return [dict(row) for row in rows]
+
+    def next_due(self) -> Optional[float]:
+        return self._connection().execute('SELECT MIN(next_due) FROM sites').fetchone()[0]
+
+    def mark_checked(self, url: str, checked_at: float, next_due: float, etag: Optional[str] = None,
+                     last_modified: Optional[str] = None, robots_hash: Optional[str] = None,
+                     error: Optional[str] = None) -> None:
+        """Enregistre un passage ; les validateurs et l'empreinte ne sont remplacés que s'ils sont fournis"""
+        with self._connection() as connection:
+            connection.execute(
+                """UPDATE sites SET last_checked = ?, next_due = ?, last_error = ?,
+                       etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified),
+                       robots_hash = COALESCE(?, robots_hash)
+                   WHERE url = ?""",
+                (checked_at, next_due, error, etag, last_modified, robots_hash, url)
+            )
+
+    def verdicts(self, url: Optional[str] = None) -> List[Dict]:
+        """Verdicts courants (statut, raison, date depuis laquelle il est en vigueur)"""
+        query, params = 'SELECT * FROM verdicts', ()
+        if url is not None:
+            query, params = query + ' WHERE url = ?', (url,)
+        return [dict(row) for row in self._connection().execute(query + ' ORDER BY url, bot', params)]
+
+    def record_verdicts(self, url: str, verdicts: Dict[str, Dict], checked_at: float) -> List[Dict]:
+        """Compare aux verdicts courants ; enregistre et renvoie les changements
+
+        Le statut et la raison sont comparés : GPTBot bloqué alors que
+        ChatGPT-User reste autorisé laisse OpenAI en OK mais change la raison
+        (« 2/3 UA autorisés »). Le premier verdict d'un bot est enregistré
+        sans changement associé.
+        """
+        connection = self._connection()
+        changes = []
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            current = {row['bot']: (row['status'], row['reason']) for row in connection.execute(
+                'SELECT bot, status, reason FROM verdicts WHERE url = ?', (url,))}
+            for bot, verdict in verdicts.items():
+                previous = current.get(bot)
+                if previous == (verdict['status'], verdict['reason']):
+                    continue
+                connection.execute('INSERT OR REPLACE INTO verdicts VALUES (?, ?, ?, ?, ?)',
+                                   (url, bot, verdict['status'], verdict['reason'], checked_at))
+                if previous is not None:
+                    change = {'url': url, 'bot': bot, 'previous_status': previous[0], 'previous_reason': previous[1],
+                              'status': verdict['status'], 'reason': verdict['reason'], 'changed_at': checked_at}
+                    connection.execute(
+                        'INSERT INTO changes (url, bot, previous_status, previous_reason, status, reason, changed_at) '
+                        'VALUES (:url, :bot, :previous_status, :previous_reason, :status, :reason, :changed_at)',
+                        change)
+                    changes.append(change)
+        return changes
+
+    def changes(self, since: Optional[float] = None, url: Optional[str] = None) -> List[Dict]:
+        """Historique des changements de verdict, du plus ancien au plus récent"""
+        query, params = 'SELECT * FROM changes WHERE changed_at >= ?', [since or 0]
+        if url is not None:
+            query += ' AND url = ?'
+            params.append(url)
+        return [dict(row) for row in self._connection().execute(query + ' ORDER BY change_id', params)]
+
+
+class RobotsWatcher:
+    """Passages planifiés sur la liste de surveillance, à requêtes conditionnelles
+
+    Chaque passage envoie une requête conditionnelle (If-None-Match /
+    If-Modified-Since) pour le robots.txt : un site inchangé coûte une
+    réponse 304. Sans validateurs côté serveur, l'empreinte du contenu évite
+    de réévaluer un robots.txt identique. Les verdicts ne sont recalculés
+    qu'en cas de changement, sans requête vers les pages.
+    """
+
+    def __init__(self, store: WatchStore, interval: float = DEFAULT_INTERVAL, jitter: float = DEFAULT_JITTER,
+                 timeout: float = 10, workers: int = 8):
+        self.store = store
+        self.interval = interval
+        self.jitter = jitter
+        self.timeout = timeout
+        self.workers = workers
+        self.robots_parser = RobotsParser(timeout=timeout)
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'BotsChecker/1.0 (+https://github.com/bots-checker)'})
+        self.stats = {'checked': 0, 'not_modified': 0, 'unchanged': 0, 'evaluated': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _next_due(self, now: float) -> float:
+        return now + self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _count(self, outcome: str) -> None:
+        with self._stats_lock:
+            self.stats['checked'] += 1
+            self.stats[outcome] += 1
+
+    def check_site(self, site: Dict, now: Optional[float] = None) -> List[Dict]:
+        """Un passage sur un site ; renvoie les changements de verdict détectés"""
+        now = time.time() if now is None else now
+        url = site['url']
+        headers = {}
+        if site.get('etag'):
+            headers['If-None-Match'] = site['etag']
+        if site.get('last_modified'):
+            headers['If-Modified-Since'] = site['last_modified']
+        try:
+            response = self.session.get(robots_url_for(url), headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            self._count('errors')
+            self.store.mark_checked(url, now, self._next_due(now), error=f'{type(e).__name__}: {str(e)[:200]}')
+            return []
+
+        if response.status_code == 304:
+            self._count('not_modified')
+            self.store.mark_checked(url, now, self._next_due(now))
+            return []
+        if response.status_code in TRANSIENT_STATUSES:
+            self._count('errors')
+            self.store.mark_checked(url, now, self._next_due(now), error=f'HTTP {response.status_code}')
+            return []
+
+        robots_hash = content_hash(response.status_code, response.text)
+        validators = {'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        if robots_hash == site.get('robots_hash'):
+            self._count('unchanged')
+            self.store.mark_checked(url, now, self._next_due(now), **validators)
+            return []
+
+        self._count('evaluated')
+        rules = self.robots_parser.parse_robots(response.status_code, response.text)
+        verdicts = self.robots_parser.bot_verdicts(rules, url, json.loads(site['bots']))
+        changes = self.store.record_verdicts(url, verdicts, now)
+        self.store.mark_checked(url, now, self._next_due(now), robots_hash=robots_hash, **validators)
+        return changes
+
+    def run_once(self, now: Optional[float] = None, force: bool = False) -> List[Dict]:
+        """Vérifie les sites arrivés à échéance (tous avec force) ; renvoie les changements"""
+        now = time.time() if now is None else now
+        sites = self.store.sites() if force else self.store.due(now)
+        if not sites:
+            return []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            batches = list(executor.map(lambda site: self.check_site(site, now), sites))
+        return [change for batch in batches for change in batch]
+
+    def run_forever(self, token: Optional[CancellationToken] = None,
+                    on_changes: Optional[Callable[[List[Dict]], None]] = None,
+                    max_sleep: float = 60) -> None:
+        """Boucle de surveillance : attend la prochaine échéance, vérifie les sites dus, recommence"""
+        token = token or CancellationToken()
+        wake = threading.Event()
+        with token.on_cancel(wake.set):
+            while not token.stopped:
+                changes = self.run_once()
+                if changes and on_changes:
+                    on_changes(changes)
+                next_due = self.store.next_due()
+                delay = max_sleep if next_due is None else min(max_sleep, max(0.0, next_due - time.time()))
+                wake.wait(delay)
@@ -0,0 +1,144 @@
+"""
+Parsing HTML déporté dans un pool de processus, alimenté par les threads de téléchargement
+"""
+
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from typing import List, Optional, Tuple
+
+from .html_parser import HTMLParser
+
+
+DEFAULT_BATCH_SIZE = 32
+# Attente maximale pour compléter un lot avant de l'envoyer incomplet
+DEFAULT_FLUSH_INTERVAL = 0.01
+# Seuls titre et meta robots sont extraits : au-delà de </head>, le corps n'est pas transmis
+HEAD_LIMIT = 65536
+# En dessous de ce nombre de pages, le coût de démarrage du pool dépasse le gain
+MIN_OFFLOAD_PAGES = 200
+
+HEAD_END = re.compile(r'</head\s*>', re.IGNORECASE)
+
+
+def extract_head(html: str, limit: int = HEAD_LIMIT) -> str:
+    """Début du document jusqu'à </head> inclus, ou ses `limit` premiers caractères"""
+    match = HEAD_END.search(html, 0, limit)
+    return html[:match.end()] if match else html[:limit]
+
+
+def parse_batch(heads: List[str]) -> List[Tuple[str, str, bool]]:
+    """Point d'entrée des processus du pool : un lot d'en-têtes HTML, un résultat par page"""
+    return [HTMLParser.parse_html(head) for head in heads]
+
+
+class ParsePool:
+    """Étage de parsing HTML en processus séparés, interchangeable avec HTMLParser
+
+    Les threads de téléchargement appellent parse_html comme avec HTMLParser :
+    seule la partie <head> de la page est mise en file, regroupée en lots par
+    un thread répartiteur puis parsée dans le pool. La file et le nombre de
+    lots en cours sont bornés : quand le pool ne suit pas, les threads de
+    téléchargement attendent au lieu d'accumuler les pages en mémoire.
+    """
+
+    def __init__(self, workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_batches: Optional[int] = None, flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 head_limit: int = HEAD_LIMIT):
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.max_batches = max_batches or 2 * self.workers
+        self.flush_interval = flush_interval
+        self.head_limit = head_limit
+        self._queue = queue.Queue(maxsize=batch_size * self.max_batches)
+        self._slots = threading.BoundedSemaphore(self.max_batches)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._dispatcher = None
+        self._closed = False
+
+    def parse_html(self, html_content: str) -> Tuple[str, str, bool]:
+        """Titre, meta robots et noindex de la page, parsés dans le pool"""
+        self._start()
+        future = Future()
+        self._queue.put((extract_head(html_content, self.head_limit), future))
+        return future.result()
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._closed:
+                raise RuntimeError('ParsePool fermé')
+            if self._dispatcher is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+                self._dispatcher = threading.Thread(target=self._dispatch, name='parse-dispatch', daemon=True)
+                self._dispatcher.start()
+
+    def _dispatch(self) -> None:
+        """Regroupe les pages en lots (taille ou délai atteint) et les soumet au pool"""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            # Contre-pression : pas plus de max_batches lots envoyés au pool à la fois
+            self._slots.acquire()
+            try:
+                submitted = self._executor.submit(parse_batch, [head for head, _ in batch])
+            except RuntimeError:
+                self._slots.release()
+                self._deliver(batch, None)
+                continue
+            submitted.add_done_callback(partial(self._deliver, batch))
+
+    def _deliver(self, batch: List[Tuple[str, Future]], submitted: Optional[Future]) -> None:
+        if submitted is not None:
+            self._slots.release()
+        try:
+            parsed = submitted.result() if submitted is not None else None
+        except Exception:
+            parsed = None
+        # Pool indisponible (processus tué, arrêt en cours) : parsing dans ce processus
+        if parsed is None:
+            parsed = parse_batch([head for head, _ in batch])
+        for (_, future), value in zip(batch, parsed):
+            future.set_result(value)
+
+    def close(self) -> None:
+        """Termine les lots en cours puis arrête le répartiteur et le pool"""
+        with self._lock:
+            self._closed = True
+            dispatcher, executor = self._dispatcher, self._executor
+        if dispatcher is not None:
+            self._queue.put(None)
+            dispatcher.join()
+            executor.shutdown(wait=True)
+
+    def __enter__(self) -> 'ParsePool':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def create_html_parser(workers: Optional[int], pages: int, min_pages: int = MIN_OFFLOAD_PAGES):
+    """ParsePool si le parsing déporté est demandé (workers > 1) et l'analyse assez grande, sinon HTMLParser"""
+    if workers is not None and workers > 1 and pages >= min_pages:
+        return ParsePool(workers)
+    return HTMLParser()
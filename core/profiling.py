@@ -0,0 +1,195 @@
+"""
+Mode profilage d'une analyse : échantillonnage CPU de tous les threads et tracemalloc
+"""
+
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+
+# Composant d'un échantillon : premier fichier reconnu en remontant la pile depuis le sommet
+COMPONENTS = [
+    ('Réseau', ('/socket.py', '/ssl.py', '/selectors.py', '/http/client.py', '/urllib3/', '/requests/')),
+    ('BeautifulSoup', ('/bs4/', '/html/parser.py', '/_markupbase.py')),
+    ('Protego', ('/protego',)),
+    ('pandas / numpy', ('/pandas/', '/numpy/')),
+    ('Export', ('/openpyxl/', '/pyarrow/', '/zstandard/', '/gzip.py')),
+    ('Rendu Streamlit', ('/streamlit/', '/altair/')),
+    ('Code du projet', ('/core/', '/ui/', '/app.py', '/bots_checker.py', '/cli.py')),
+]
+
+# Fonctions au sommet de la pile d'un thread inactif (attente de tâche ou de verrou)
+IDLE_FRAMES = {
+    ('threading.py', 'wait'), ('threading.py', '_wait_for_tstate_lock'),
+    ('thread.py', '_worker'), ('_base.py', 'wait'), ('queue.py', 'get'),
+}
+
+FrameKey = Tuple[str, int, str]
+
+
+def _component(filename: str) -> Optional[str]:
+    filename = filename.replace('\\', '/')
+    for name, patterns in COMPONENTS:
+        if any(pattern in filename for pattern in patterns):
+            return name
+    return None
+
+
+class ProfileReport:
+    """Résultat d'une session : composants, fonctions les plus coûteuses et sites d'allocation"""
+
+    def __init__(self, duration: float, samples: int, components: Counter,
+                 self_counts: Counter, total_counts: Counter,
+                 allocations: List[Tuple[str, int, int]], peak_memory: int, top: int):
+        self.duration = duration
+        self.samples = samples
+        self.components = components
+        self.self_counts = self_counts
+        self.total_counts = total_counts
+        self.allocations = allocations
+        self.peak_memory = peak_memory
+        self.top = top
+
+    @staticmethod
+    def _location(key: FrameKey) -> str:
+        filename, lineno, function = key
+        return f"{function} ({filename}:{lineno})"
+
+    def _share(self, count: int) -> float:
+        return 100 * count / self.samples if self.samples else 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'duration': round(self.duration, 3),
+            'samples': self.samples,
+            'components': {name: round(self._share(count), 1) for name, count in self.components.most_common()},
+            'functions': [
+                {'function': self._location(key), 'self_pct': round(self._share(count), 1),
+                 'total_pct': round(self._share(self.total_counts[key]), 1)}
+                for key, count in self.self_counts.most_common(self.top)
+            ],
+            'allocations': [
+                {'site': site, 'size_kb': round(size / 1024, 1), 'count': count}
+                for site, size, count in self.allocations
+            ],
+            'peak_memory_mb': round(self.peak_memory / 1024 / 1024, 1),
+        }
+
+    def to_text(self) -> str:
+        data = self.to_dict()
+        lines = [
+            f"Durée : {data['duration']} s — {data['samples']} échantillons actifs — "
+            f"pic mémoire tracé : {data['peak_memory_mb']} Mo",
+            "",
+            "Répartition par composant (% des échantillons actifs) :",
+        ]
+        lines += [f"  {share:6.1f}%  {name}" for name, share in data['components'].items()]
+        lines += ["", "Fonctions les plus coûteuses (propre / cumulé) :"]
+        lines += [f"  {item['self_pct']:6.1f}% {item['total_pct']:6.1f}%  {item['function']}"
+                  for item in data['functions']]
+        lines += ["", "Sites d'allocation (mémoire encore allouée en fin de session) :"]
+        lines += [f"  {item['size_kb']:10.1f} Ko {item['count']:8d} blocs  {item['site']}"
+                  for item in data['allocations']]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.to_text())
+
+
+class RunProfiler:
+    """Profileur par échantillonnage (temps réel) du thread appelant et des threads qu'il lance
+
+    Un thread d'arrière-plan relève la pile de chaque thread suivi toutes les
+    `interval` secondes : les threads du pool d'analyse sont couverts, contrairement
+    à cProfile qui ne suit que le thread qui l'active. Les attentes réseau restent
+    visibles (composant « Réseau ») ; les threads inactifs sont ignorés.
+    tracemalloc est activé pendant la session pour relever les sites d'allocation.
+    """
+
+    def __init__(self, interval: float = 0.005, top: int = 25, trace_memory: bool = True):
+        self.interval = interval
+        self.top = top
+        self.trace_memory = trace_memory
+        self._self_counts = Counter()
+        self._total_counts = Counter()
+        self._components = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._excluded = set()
+        self._owner = None
+        self._started_tracemalloc = False
+        self._start = 0.0
+        self.report = None
+
+    def start(self) -> 'RunProfiler':
+        # Seuls le thread appelant et les threads créés pendant la session sont échantillonnés
+        self._owner = threading.get_ident()
+        self._excluded = {thread.ident for thread in threading.enumerate()} - {self._owner}
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name='run-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample_loop(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self._excluded:
+                    continue
+                self._record(frame)
+
+    def _record(self, frame) -> None:
+        code = frame.f_code
+        if (code.co_filename.replace('\\', '/').rsplit('/', 1)[-1], code.co_name) in IDLE_FRAMES:
+            return
+
+        self._samples += 1
+        self._self_counts[(code.co_filename, code.co_firstlineno, code.co_name)] += 1
+        component = None
+        seen = set()
+        while frame is not None:
+            code = frame.f_code
+            key = (code.co_filename, code.co_firstlineno, code.co_name)
+            if key not in seen:
+                seen.add(key)
+                self._total_counts[key] += 1
+            if component is None:
+                component = _component(code.co_filename)
+            frame = frame.f_back
+        self._components[component or 'Autre'] += 1
+
+    def stop(self) -> ProfileReport:
+        self._stop.set()
+        self._thread.join()
+        duration = time.perf_counter() - self._start
+
+        allocations, peak = [], 0
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            ])
+            peak = tracemalloc.get_traced_memory()[1]
+            for stat in snapshot.statistics('lineno')[:self.top]:
+                frame = stat.traceback[0]
+                allocations.append((f"{frame.filename}:{frame.lineno}", stat.size, stat.count))
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        return ProfileReport(duration, self._samples, self._components, self._self_counts,
+                             self._total_counts, allocations, peak, self.top)
+
+    def __enter__(self) -> 'RunProfiler':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        if not self._stop.is_set():
+            self.report = self.stop()
@@ -0,0 +1,145 @@
+"""
+Codes de raison normalisés pour les résultats de tests
+"""
+
+import re
+from typing import List, Sequence, Set, Union
+
+import requests
+
+from .cancellation import CANCELLED, DEADLINE_EXCEEDED
+
+
+ALLOWED = 'allowed'
+HTTP_3XX = 'http_3xx'
+HTTP_403 = 'http_403'
+HTTP_404 = 'http_404'
+HTTP_429 = 'http_429'
+HTTP_4XX = 'http_4xx'
+HTTP_5XX = 'http_5xx'
+HTTP_OTHER = 'http_other'
+ROBOTS_BLOCK = 'robots_block'
+META_NOINDEX = 'meta_noindex'
+X_ROBOTS_TAG = 'x_robots_tag'
+TIMEOUT = 'timeout'
+DNS_ERROR = 'dns_error'
+TLS_ERROR = 'tls_error'
+CONNECTION_ERROR = 'connection_error'
+NETWORK_ERROR = 'network_error'
+BLOCKED = 'blocked'
+
+REASON_CODES = [
+    ALLOWED, HTTP_3XX, HTTP_403, HTTP_404, HTTP_429, HTTP_4XX, HTTP_5XX, HTTP_OTHER,
+    ROBOTS_BLOCK, META_NOINDEX, X_ROBOTS_TAG,
+    TIMEOUT, DNS_ERROR, TLS_ERROR, CONNECTION_ERROR, NETWORK_ERROR, BLOCKED,
+    CANCELLED, DEADLINE_EXCEEDED,
+]
+
+_NOINDEX_DIRECTIVES = {'noindex', 'none'}
+# Directives dont la valeur suit « : » (ce ne sont pas des préfixes de User-Agent)
+_VALUED_DIRECTIVES = {'unavailable_after', 'max-snippet', 'max-image-preview', 'max-video-preview'}
+_SCOPED_DIRECTIVE = re.compile(r'^\s*([A-Za-z][\w.-]*)\s*:\s*(.*)$')
+_PRODUCT_TOKEN = re.compile(r'(?:^|[\s;(])([A-Za-z][\w-]*)/\d')
+# Jetons produit des navigateurs, présents dans les User-Agents mais jamais visés par X-Robots-Tag
+_BROWSER_TOKENS = {'mozilla', 'applewebkit', 'chrome', 'safari', 'gecko', 'version', 'mobile'}
+
+HTTP_CODES = [HTTP_3XX, HTTP_403, HTTP_404, HTTP_429, HTTP_4XX, HTTP_5XX, HTTP_OTHER]
+
+REASON_LABELS = {
+    HTTP_3XX: 'Redirection (3xx)',
+    HTTP_403: 'Code 403 (Forbidden)',
+    HTTP_404: 'Code 404 (Not Found)',
+    HTTP_429: 'Code 429 (Rate limit)',
+    HTTP_4XX: 'Autre code 4xx',
+    HTTP_5XX: 'Code 5xx (Server Error)',
+    HTTP_OTHER: 'Autre code HTTP',
+    ROBOTS_BLOCK: 'Robots.txt Disallow',
+    META_NOINDEX: 'Meta noindex',
+    X_ROBOTS_TAG: 'X-Robots-Tag noindex',
+    TIMEOUT: 'Timeout',
+    DNS_ERROR: 'Erreur DNS',
+    TLS_ERROR: 'Erreur TLS/SSL',
+    CONNECTION_ERROR: 'Connection Error',
+    NETWORK_ERROR: 'Erreur réseau',
+    BLOCKED: 'Bloqué',
+    CANCELLED: 'Annulé',
+    DEADLINE_EXCEEDED: 'Délai dépassé',
+}
+
+
+def http_code(status_code: int) -> str:
+    """Code de raison correspondant à un statut HTTP différent de 200"""
+    if status_code in (403, 404, 429):
+        return f'http_{status_code}'
+    if 300 <= status_code < 400:
+        return HTTP_3XX
+    if 400 <= status_code < 500:
+        return HTTP_4XX
+    if 500 <= status_code < 600:
+        return HTTP_5XX
+    return HTTP_OTHER
+
+
+def product_tokens(user_agent_name: str, user_agent: str = '') -> Set[str]:
+    """Noms sous lesquels un User-Agent peut être visé (nom du test et jetons produit de la chaîne)"""
+    tokens = {token.lower() for token in _PRODUCT_TOKEN.findall(user_agent)} - _BROWSER_TOKENS
+    if user_agent_name:
+        tokens.add(user_agent_name.lower())
+    return tokens
+
+
+def has_noindex_header(x_robots_tag: Union[str, Sequence[str]], user_agent_name: str = '',
+                       user_agent: str = '') -> bool:
+    """Vérifie si un en-tête X-Robots-Tag interdit l'indexation pour le User-Agent testé
+
+    Accepte une valeur ou la liste des lignes d'en-tête (requests fusionne
+    les lignes répétées avec « , », ce qui ferait hériter une directive sans
+    préfixe du préfixe de la ligne précédente). Dans une ligne, les
+    directives sont séparées par des virgules ; un préfixe « nom: » réserve
+    la directive, et les suivantes jusqu'au prochain préfixe ou à la fin de
+    la ligne, au User-Agent nommé (« googlebot: noindex, nofollow »). Seules
+    comptent les directives sans préfixe et celles visant un jeton produit du
+    User-Agent.
+    """
+    lines = [x_robots_tag] if isinstance(x_robots_tag, str) else x_robots_tag
+    tokens = product_tokens(user_agent_name, user_agent)
+    for line in lines:
+        scope = None
+        for part in line.split(','):
+            directive = part.strip().lower()
+            match = _SCOPED_DIRECTIVE.match(directive)
+            if match and match.group(1) not in _VALUED_DIRECTIVES:
+                scope, directive = match.group(1), match.group(2).strip()
+            if directive in _NOINDEX_DIRECTIVES and (scope is None or scope in tokens):
+                return True
+    return False
+
+
+def exception_code(error: Exception) -> str:
+    """Code de raison correspondant à une exception requests"""
+    if isinstance(error, requests.exceptions.Timeout):
+        return TIMEOUT
+    if isinstance(error, requests.exceptions.SSLError):
+        return TLS_ERROR
+    if isinstance(error, requests.exceptions.ConnectionError):
+        message = str(error)
+        if ('NameResolutionError' in message or 'Name or service not known' in message
+                or 'getaddrinfo failed' in message or 'nodename nor servname' in message):
+            return DNS_ERROR
+        return CONNECTION_ERROR
+    return NETWORK_ERROR
+
+
+def blocking_codes(status_code: int, robots_allowed: bool, has_noindex: bool,
+                   x_robots_noindex: bool) -> List[str]:
+    """Liste ordonnée des causes de blocage d'une réponse HTTP"""
+    codes = []
+    if status_code != 200:
+        codes.append(http_code(status_code))
+    if not robots_allowed:
+        codes.append(ROBOTS_BLOCK)
+    if has_noindex:
+        codes.append(META_NOINDEX)
+    if x_robots_noindex:
+        codes.append(X_ROBOTS_TAG)
+    return codes
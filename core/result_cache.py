@@ -0,0 +1,128 @@
+"""
+Cache des résultats de tests, partagé entre sessions
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+
+class CacheBackend:
+    """Interface d'un backend de cache clé/valeur avec expiration"""
+
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """Backend en mémoire, borné en taille avec éviction LRU"""
+
+    def __init__(self, max_entries: int = 50000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def normalize_url(url: str) -> str:
+    """Forme canonique d'une URL : schéma et hôte en minuscules, port par défaut et fragment retirés"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or 'https'
+    netloc = parts.netloc.lower()
+    if (scheme, netloc.rsplit(':', 1)[-1]) in (('http', '80'), ('https', '443')):
+        netloc = netloc.rsplit(':', 1)[0]
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+class ResultCache:
+    """Cache des tests par (URL normalisée, User-Agent, version du robots.txt) et des robots.txt par URL
+
+    La version est une empreinte du (code, contenu) du robots.txt sur lequel
+    le test a été évalué : dès que robots.txt est récupéré à nouveau avec
+    d'autres règles, les tests de l'hôte ne sont plus servis depuis le cache.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: float = 3600):
+        self.backend = backend or MemoryCacheBackend()
+        self.ttl = ttl
+
+    @staticmethod
+    def test_key(url: str, user_agent: str, robots_version: str = '') -> str:
+        return f'test|{normalize_url(url)}|{user_agent}|{robots_version}'
+
+    @staticmethod
+    def robots_key(robots_url: str) -> str:
+        return f'robots|{normalize_url(robots_url)}'
+
+    @staticmethod
+    def robots_fingerprint(status_code: int, content: str) -> str:
+        return hashlib.sha1(f'{status_code}|{content}'.encode('utf-8', 'replace')).hexdigest()[:16]
+
+    def get_test(self, url: str, user_agent: str, robots_version: str = '') -> Optional[dict]:
+        """Résultat de test en cache pour cette version du robots.txt, ou None"""
+        return self.backend.get(self.test_key(url, user_agent, robots_version))
+
+    def set_test(self, url: str, user_agent: str, result: dict, robots_version: str = '') -> None:
+        self.backend.set(self.test_key(url, user_agent, robots_version), result, self.ttl)
+
+    def get_robots(self, robots_url: str) -> Optional[tuple]:
+        """(status_code, contenu) du robots.txt en cache, ou None"""
+        return self.backend.get(self.robots_key(robots_url))
+
+    def set_robots(self, robots_url: str, status_code: int, content: str) -> None:
+        self.backend.set(self.robots_key(robots_url), (status_code, content), self.ttl)
+        self.backend.set(f'{self.robots_key(robots_url)}|version',
+                         self.robots_fingerprint(status_code, content), self.ttl)
+
+    def robots_version(self, robots_url: Optional[str]) -> str:
+        """Empreinte du robots.txt en cache (vide s'il est injoignable ou expiré)"""
+        if robots_url is None:
+            return ''
+        version = self.backend.get(f'{self.robots_key(robots_url)}|version')
+        if version is None:
+            cached = self.get_robots(robots_url)
+            version = self.robots_fingerprint(*cached) if cached else ''
+        return version
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def __len__(self) -> int:
+        return len(self.backend)
@@ -0,0 +1,275 @@
+"""
+Module de mise à plat des résultats en DataFrames typés (format long)
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from . import reason_codes
+from .reason_codes import REASON_CODES
+from .timings import PHASES
+
+
+STATUS_CATEGORIES = ['OK', 'KO', 'NA']
+# Colonnes des durées par phase (ms), NaN pour les résultats sans décomposition
+PHASE_COLUMNS = [f'{phase}_ms' for phase in PHASES]
+
+
+class ResultsFrame:
+    """Vue tabulaire des résultats : une ligne par test, par bot et par site"""
+
+    def __init__(self, sites: pd.DataFrame, bots: pd.DataFrame, tests: pd.DataFrame,
+                 reasons: pd.DataFrame):
+        self.sites = sites
+        self.bots = bots
+        self.tests = tests
+        self.reasons = reasons
+        self._views = {}
+
+    def cached(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Vue dérivée calculée une seule fois pour ces résultats (les tables sont immuables)"""
+        if key not in self._views:
+            self._views[key] = compute()
+        return self._views[key]
+
+    @classmethod
+    def from_results(cls, results: List[Dict]) -> 'ResultsFrame':
+        """Construit les trois tables en un seul passage sur les résultats"""
+        sites = {'site_id': [], 'site': [], 'error': [], 'robots_available': [], 'timestamp': []}
+        bots = {'site_id': [], 'bot': [], 'status': [], 'reason': [],
+                'ok': [], 'ko': [], 'na': [], 'total': []}
+        tests = {'site_id': [], 'bot': [], 'user_agent_name': [], 'status': [], 'reason': [],
+                 'reason_code': [], 'status_code': [], 'robots_allowed': [], 'has_noindex': [],
+                 'load_time': [], **{column: [] for column in PHASE_COLUMNS}}
+        # Une ligne par cause de blocage (un test KO peut en cumuler plusieurs)
+        reasons = {'test_id': [], 'reason_code': []}
+
+        for site_id, result in enumerate(results):
+            sites['site_id'].append(site_id)
+            sites['site'].append(result.get('original_url', result.get('url', '')))
+            sites['error'].append(result.get('error'))
+            sites['robots_available'].append(result.get('robots_available', False))
+            sites['timestamp'].append(result.get('timestamp', ''))
+
+            if 'error' in result:
+                continue
+
+            for bot, bot_result in result.get('results', {}).items():
+                summary = bot_result.get('summary', {})
+                bots['site_id'].append(site_id)
+                bots['bot'].append(bot)
+                bots['status'].append(bot_result.get('status', 'NA'))
+                bots['reason'].append(bot_result.get('reason', ''))
+                bots['ok'].append(summary.get('ok', 0))
+                bots['ko'].append(summary.get('ko', 0))
+                bots['na'].append(summary.get('na', 0))
+                bots['total'].append(summary.get('total', 0))
+
+                for test in bot_result.get('tests', []):
+                    tests['site_id'].append(site_id)
+                    tests['bot'].append(bot)
+                    tests['user_agent_name'].append(test.get('user_agent_name', ''))
+                    tests['status'].append(test.get('status', 'NA'))
+                    tests['reason'].append(test.get('reason', ''))
+                    tests['reason_code'].append(test.get('reason_code'))
+                    if test.get('status') != 'OK':
+                        for code in test.get('reason_codes', ()):
+                            reasons['test_id'].append(len(tests['site_id']) - 1)
+                            reasons['reason_code'].append(code)
+                    tests['status_code'].append(test.get('status_code', 0))
+                    tests['robots_allowed'].append(test.get('robots_allowed', True))
+                    tests['has_noindex'].append(test.get('has_noindex', False))
+                    tests['load_time'].append(test.get('load_time', 0))
+                    timings = test.get('timings') or {}
+                    for phase, column in zip(PHASES, PHASE_COLUMNS):
+                        tests[column].append(timings.get(phase, np.nan))
+
+        sites_df = pd.DataFrame(sites)
+        bots_df = cls._typed(pd.DataFrame(bots), {
+            'site_id': 'int64', 'bot': 'category', 'reason': 'category',
+            'ok': 'int32', 'ko': 'int32', 'na': 'int32', 'total': 'int32'
+        })
+        tests_df = cls._typed(pd.DataFrame(tests), {
+            'site_id': 'int64', 'bot': 'category', 'user_agent_name': 'category',
+            'reason': 'category', 'status_code': 'int32', 'robots_allowed': 'bool',
+            'has_noindex': 'bool', 'load_time': 'float64',
+            **{column: 'float64' for column in PHASE_COLUMNS}
+        })
+        reasons_df = pd.DataFrame(reasons, columns=['test_id', 'reason_code'])
+
+        # Résultats antérieurs aux codes de raison : déduction à partir des champs du test
+        legacy = tests_df['reason_code'].isna().to_numpy()
+        if legacy.any():
+            derived = cls._derive_reason_codes(tests_df[legacy])
+            tests_df.loc[legacy, 'reason_code'] = derived
+            blocked = derived != reason_codes.ALLOWED
+            reasons_df = pd.concat([reasons_df, pd.DataFrame({
+                'test_id': np.flatnonzero(legacy)[blocked],
+                'reason_code': derived[blocked],
+            })], ignore_index=True)
+
+        tests_df['reason_code'] = pd.Categorical(tests_df['reason_code'], categories=REASON_CODES)
+        reasons_df = reasons_df.astype({'test_id': 'int64'})
+        reasons_df['reason_code'] = pd.Categorical(reasons_df['reason_code'], categories=REASON_CODES)
+
+        return cls(sites_df, bots_df, tests_df, reasons_df)
+
+    @staticmethod
+    def _typed(df: pd.DataFrame, dtypes: Dict[str, str]) -> pd.DataFrame:
+        """Applique les types de colonnes et la catégorie de statut"""
+        df = df.astype(dtypes)
+        df['status'] = pd.Categorical(df['status'], categories=STATUS_CATEGORIES)
+        return df
+
+    @staticmethod
+    def _derive_reason_codes(tests: pd.DataFrame) -> np.ndarray:
+        """Déduit le code de raison principal de chaque test à partir de ses champs"""
+        status = tests['status'].to_numpy()
+        status_code = tests['status_code'].to_numpy()
+        conditions = [
+            status == 'OK',
+            (status == 'NA') & (status_code == 408),
+            status == 'NA',
+            status_code != 200,
+            ~tests['robots_allowed'].to_numpy(),
+            tests['has_noindex'].to_numpy(),
+        ]
+        http_codes = np.select(
+            [status_code == 403, status_code == 404, status_code == 429,
+             (status_code >= 300) & (status_code < 400),
+             (status_code >= 400) & (status_code < 500),
+             (status_code >= 500) & (status_code < 600)],
+            [reason_codes.HTTP_403, reason_codes.HTTP_404, reason_codes.HTTP_429,
+             reason_codes.HTTP_3XX, reason_codes.HTTP_4XX, reason_codes.HTTP_5XX],
+            default=reason_codes.HTTP_OTHER
+        )
+        choices = [reason_codes.ALLOWED, reason_codes.TIMEOUT, reason_codes.NETWORK_ERROR,
+                   http_codes, reason_codes.ROBOTS_BLOCK, reason_codes.META_NOINDEX]
+        return np.select(conditions, choices, default=reason_codes.BLOCKED).astype(object)
+
+    def reason_counts(self) -> pd.Series:
+        """Nombre de causes de blocage par code, tous tests KO/NA confondus"""
+        counts = self.reasons['reason_code'].value_counts()
+        return counts[counts > 0]
+
+    def bot_status_counts(self) -> pd.DataFrame:
+        """Nombre de sites par bot et par statut (colonnes OK/KO/NA)"""
+        return (
+            self.bots.groupby(['bot', 'status'], observed=False).size()
+            .unstack('status', fill_value=0)
+            .reindex(columns=STATUS_CATEGORIES, fill_value=0)
+        )
+
+    def status_counts(self) -> Dict[str, int]:
+        """Nombre de tests par statut (OK/KO/NA) et total"""
+        return self.cached('status_counts', self._status_counts)
+
+    def _status_counts(self) -> Dict[str, int]:
+        counts = self.tests['status'].value_counts()
+        return {
+            'ok': int(counts.get('OK', 0)),
+            'ko': int(counts.get('KO', 0)),
+            'na': int(counts.get('NA', 0)),
+            'total': len(self.tests)
+        }
+
+    def bot_labels(self, bots: Optional[pd.DataFrame] = None) -> pd.Series:
+        """Libellé affiché pour chaque couple site × bot (ex: 'OK (2/3 UA)')"""
+        if bots is None:
+            bots = self.bots
+        if bots.empty:
+            return pd.Series([], dtype='object', index=bots.index)
+
+        # Raison de blocage dominante par couple site × bot, calculée sur les tests KO
+        ko_tests = self.tests[(self.tests['status'] == 'KO')
+                              & self.tests['site_id'].isin(bots['site_id'].unique())]
+        dominant = (
+            ko_tests.groupby(['site_id', 'bot', 'reason_code'], observed=True).size()
+            .rename('count').reset_index()
+            .sort_values(['site_id', 'bot', 'count'], ascending=[True, True, False], kind='stable')
+            .drop_duplicates(['site_id', 'bot'])
+        )
+        ko_code = (
+            bots[['site_id', 'bot']].astype({'bot': 'object'})
+            .merge(dominant.astype({'bot': 'object', 'reason_code': 'object'}),
+                   on=['site_id', 'bot'], how='left')['reason_code']
+            .to_numpy()
+        )
+
+        ok_partial = 'OK (' + bots['ok'].astype(str) + '/' + bots['total'].astype(str) + ' UA)'
+        conditions = [
+            (bots['status'] == 'OK') & (bots['total'] > 1) & (bots['ok'] == bots['total']),
+            (bots['status'] == 'OK') & (bots['total'] > 1),
+            bots['status'] == 'OK',
+            (bots['status'] == 'KO') & (bots['ko'] == bots['total']) & (bots['total'] > 0),
+            (bots['status'] == 'KO') & (ko_code == reason_codes.ROBOTS_BLOCK),
+            (bots['status'] == 'KO') & np.isin(ko_code, reason_codes.HTTP_CODES),
+            (bots['status'] == 'KO') & (ko_code == reason_codes.META_NOINDEX),
+            (bots['status'] == 'KO') & (ko_code == reason_codes.X_ROBOTS_TAG),
+            bots['status'] == 'KO',
+        ]
+        choices = [
+            'OK (Tous UA)', ok_partial, 'OK',
+            'KO (Tous bloqués)', 'KO (Robots.txt)', 'KO (HTTP)', 'KO (Meta noindex)',
+            'KO (X-Robots-Tag)', 'KO (Bloqué)',
+        ]
+        labels = np.select(conditions, choices, default='NA (Test impossible)')
+        return pd.Series(labels, index=bots.index, dtype='object')
+
+    def phase_timings(self, by: str = 'bot') -> pd.DataFrame:
+        """Durée moyenne (ms) de chaque phase par bot ou par hôte ('bot' / 'host')"""
+        return self.cached(('phase_timings', by), lambda: self._phase_timings(by))
+
+    def _phase_timings(self, by: str) -> pd.DataFrame:
+        timed = self.tests.dropna(subset=PHASE_COLUMNS, how='all')
+        if by == 'host':
+            hosts = pd.Series(self.sites['site'].map(lambda site: urlsplit(site).netloc or site).to_numpy(),
+                              index=self.sites['site_id'])
+            keys = timed['site_id'].map(hosts)
+        else:
+            keys = timed['bot'].astype(str)
+        table = timed[PHASE_COLUMNS].groupby(keys.rename(by)).mean()
+        table.columns = PHASES
+        return table
+
+    def status_matrix(self, selected_bots: List[str]) -> pd.DataFrame:
+        """Statut OK/KO/NA brut de chaque site (lignes) pour chaque bot (colonnes)"""
+        return self.cached(('status_matrix', tuple(selected_bots)),
+                           lambda: self._status_matrix(selected_bots))
+
+    def _status_matrix(self, selected_bots: List[str]) -> pd.DataFrame:
+        bots = self.bots[self.bots['bot'].isin(selected_bots)]
+        table = bots.pivot(index='site_id', columns='bot', values='status')
+        table = table.reindex(index=self.sites['site_id'], columns=selected_bots)
+        # Sites en erreur et bots non testés : NA
+        return table.astype('object').fillna('NA')
+
+    def matrix(self, selected_bots: List[str], site_ids: Optional[Sequence[int]] = None) -> pd.DataFrame:
+        """Tableau site × crawler avec le libellé OK/KO/NA de chaque bot
+
+        site_ids limite le tableau (et le calcul des libellés) à un sous-ensemble
+        ordonné de sites, par exemple la page affichée.
+        """
+        sites = self.sites if site_ids is None else self.sites.set_index('site_id', drop=False).loc[site_ids]
+        bots = self.bots if site_ids is None else self.bots[self.bots['site_id'].isin(site_ids)]
+
+        columns = [bot.upper() for bot in selected_bots]
+        labelled = bots.assign(label=self.bot_labels(bots), column=bots['bot'].astype(str).str.upper())
+        labelled = labelled[labelled['column'].isin(columns)]
+
+        table = labelled.pivot(index='site_id', columns='column', values='label')
+        table = table.reindex(index=sites['site_id'], columns=columns).astype('object')
+
+        # Sites en erreur : tous les bots sont NA avec le message d'erreur
+        has_error = sites['error'].notna().to_numpy()
+        if has_error.any():
+            error_labels = 'NA (Erreur: ' + sites.loc[has_error, 'error'].astype(str).str[:30] + '...)'
+            table.iloc[has_error, :] = np.repeat(error_labels.to_numpy()[:, None], len(columns), axis=1)
+
+        table = table.fillna('NA (Non testé)')
+        table.insert(0, 'Site', sites['site'].to_numpy())
+        table.columns.name = None
+        return table.reset_index(drop=True)
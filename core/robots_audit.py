@@ -0,0 +1,140 @@
+"""
+Audit robots.txt seul : un robots.txt par hôte, verdict de chaque bot sur une liste de chemins
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from . import reason_codes
+from .bot_definitions import BOT_DEFINITIONS
+from .cancellation import CancellationToken
+from .robots_parser import RobotsParser
+
+
+DEFAULT_AUDIT_WORKERS = 32
+
+
+def audit_urls(url: str, paths: Sequence[str], same_host: Sequence[str] = ()) -> List[str]:
+    """URLs évaluées pour un site : l'URL saisie, les autres URLs saisies du même hôte, puis les chemins configurés"""
+    parts = urlsplit(url)
+    origin = f'{parts.scheme}://{parts.netloc}'
+    candidates = [url, *same_host, *(origin + (path if path.startswith('/') else '/' + path) for path in paths)]
+    return list(dict.fromkeys(candidates))
+
+
+class RobotsAudit:
+    """Vérification par robots.txt seul, sans requête vers les pages
+
+    Chaque hôte coûte une requête (son robots.txt), quel que soit le nombre
+    de bots, de User-Agents et de chemins évalués. Les résultats ont le
+    format de BotsChecker.check_robots_txt (une entrée par URL évaluée) : les
+    tests sont OK ou KO selon robots.txt uniquement (code HTTP 0, page non
+    demandée).
+    """
+
+    def __init__(self, paths: Sequence[str] = (), bots: Optional[Sequence[str]] = None,
+                 workers: int = DEFAULT_AUDIT_WORKERS, timeout: int = 10, cache=None):
+        self.paths = list(paths)
+        self.bots = list(bots) if bots else list(BOT_DEFINITIONS)
+        self.workers = workers
+        self.robots_parser = RobotsParser(timeout=timeout, cache=cache)
+
+    def check_site(self, url: str, token: Optional[CancellationToken] = None,
+                   same_host: Sequence[str] = ()) -> List[Dict]:
+        """Résultats de l'URL et des chemins configurés de son hôte, à partir d'un seul robots.txt"""
+        urls = audit_urls(url, self.paths, same_host)
+        timestamp = datetime.now().isoformat()
+        if token is not None and token.stopped:
+            return [self._error_result(page, 'Annulé' if token.reason == reason_codes.CANCELLED
+                                       else 'Délai dépassé', timestamp) for page in urls]
+        robots, robots_url = self.robots_parser.get_robots_parser(url, token)
+        if robots_url is None:
+            return [self._error_result(page, 'robots.txt injoignable', timestamp) for page in urls]
+        return [self._page_result(page, robots, robots_url, timestamp) for page in urls]
+
+    def _page_result(self, url: str, robots, robots_url: str, timestamp: str) -> Dict:
+        results, all_tests = {}, []
+        for bot, verdict in self.robots_parser.bot_verdicts(robots, url, self.bots).items():
+            user_agents = BOT_DEFINITIONS[bot]['user_agents']
+            tests = [self._test(bot, name, user_agents[name], allowed)
+                     for name, allowed in verdict['user_agents'].items()]
+            ok = sum(test['status'] == 'OK' for test in tests)
+            results[bot] = {
+                'status': verdict['status'],
+                'reason': verdict['reason'],
+                'tests': tests,
+                'summary': {'total': len(tests), 'ok': ok, 'ko': len(tests) - ok, 'na': 0},
+            }
+            all_tests.extend(tests)
+        return {
+            'url': robots_url,
+            'original_url': url,
+            'status': 'success',
+            'robots_available': robots is not None,
+            'robots_only': True,
+            'results': results,
+            'all_tests': all_tests,
+            'timestamp': timestamp,
+        }
+
+    @staticmethod
+    def _test(bot: str, user_agent_name: str, user_agent: str, allowed: bool) -> Dict:
+        code = reason_codes.ALLOWED if allowed else reason_codes.ROBOTS_BLOCK
+        return {
+            'bot_name': bot,
+            'user_agent_name': user_agent_name,
+            'user_agent': user_agent,
+            'status': 'OK' if allowed else 'KO',
+            'reason': 'Robots.txt autorise' if allowed else 'Robots.txt bloque',
+            'reason_code': code,
+            'reason_codes': [code],
+            'status_code': 0,
+            'robots_allowed': allowed,
+            'robots_meta': 'Non vérifié',
+            'has_noindex': False,
+            'x_robots_tag': '',
+            'title': 'Non vérifié',
+            'load_time': 0,
+            'timings': {},
+            'is_allowed': allowed,
+        }
+
+    @staticmethod
+    def _error_result(url: str, message: str, timestamp: str) -> Dict:
+        return {
+            'url': url,
+            'original_url': url,
+            'robots_only': True,
+            'error': f'Erreur lors de la vérification: {message}',
+            'timestamp': timestamp,
+        }
+
+    def run(self, urls: Sequence[str], progress: Optional[Callable[[int, int], None]] = None,
+            token: Optional[CancellationToken] = None) -> List[Dict]:
+        """Audit concurrent des sites ; résultats dans l'ordre de saisie (chemins à la suite de chaque site)
+
+        Les URLs saisies d'un même hôte sont évaluées ensemble, sur un seul
+        robots.txt.
+        """
+        by_origin: Dict[str, List[int]] = {}
+        for position, url in enumerate(urls):
+            parts = urlsplit(url)
+            by_origin.setdefault(f'{parts.scheme}://{parts.netloc}'.lower(), []).append(position)
+
+        site_results: Dict[int, List[Dict]] = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                executor.submit(self.check_site, urls[positions[0]], token,
+                                [urls[position] for position in positions[1:]]): positions[0]
+                for positions in by_origin.values()
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    site_results[futures[future]] = future.result()
+                if progress:
+                    progress(len(site_results), len(futures))
+        return [result for position in sorted(site_results) for result in site_results[position]]
@@ -2,34 +2,62 @@
 Module de parsing et vérification des robots.txt
 """
 
+import time
 import requests
 from urllib.parse import urlparse
-from typing import Optional, Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
-try:
-    from protego import Protego
-except ImportError:
-    Protego = None
+from . import instrumentation
+from .bot_definitions import BOT_DEFINITIONS
+from .cancellation import CancellationToken, read_response_text
+from .lazy_imports import optional_import
+from .timings import timed_get
 
 
 class RobotsParser:
     """Gestionnaire pour le parsing des robots.txt"""
     
-    def __init__(self, timeout: int = 10):
+    def __init__(self, timeout: int = 10, cache=None):
         self.timeout = timeout
+        self.cache = cache
     
-    def get_robots_parser(self, url: str) -> Tuple[Optional[object], Optional[str]]:
+    def get_robots_parser(self, url: str,
+                          token: Optional[CancellationToken] = None) -> Tuple[Optional[object], Optional[str]]:
         """Récupère et parse le robots.txt avec Protego"""
-        try:
-            parsed = urlparse(url)
-            robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-            
-            response = requests.get(robots_url, timeout=self.timeout)
-            if response.status_code == 200 and Protego:
-                return Protego.parse(response.text), robots_url
-            return None, robots_url
-        except Exception:
-            return None, None
+        with instrumentation.span('robots', url=url) as span:
+            try:
+                parsed = urlparse(url)
+                robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+                
+                cached = self.cache.get_robots(robots_url) if self.cache is not None else None
+                if cached:
+                    instrumentation.inc('ua_checker_cache_hits_total', kind='robots')
+                    status_code, content = cached
+                else:
+                    if self.cache is not None:
+                        instrumentation.inc('ua_checker_cache_misses_total', kind='robots')
+                    timeout = token.timeout(self.timeout) if token is not None else self.timeout
+                    start_time = time.perf_counter()
+                    response = timed_get(robots_url, token, timeout=timeout, stream=token is not None)
+                    status_code, content = response.status_code, read_response_text(response, token)
+                    instrumentation.record_response('robots', response, time.perf_counter() - start_time)
+                    if self.cache is not None:
+                        self.cache.set_robots(robots_url, status_code, content)
+                
+                span.set(status_code=status_code, cached=bool(cached))
+                return self.parse_robots(status_code, content), robots_url
+            except Exception as e:
+                if isinstance(e, requests.exceptions.Timeout):
+                    instrumentation.inc('ua_checker_timeouts_total', kind='robots')
+                span.set(error=type(e).__name__)
+                return None, None
+    
+    @staticmethod
+    def parse_robots(status_code: int, content: str) -> Optional[object]:
+        """Règles Protego d'un robots.txt récupéré, None s'il est absent (tout est alors autorisé)"""
+        # protego n'est importé qu'au premier robots.txt à parser
+        protego = optional_import('protego') if status_code == 200 else None
+        return protego.Protego.parse(content) if protego else None
     
     def check_robots_permission(self, robots_parser, user_agent: str, url: str) -> bool:
         """Vérifie la permission robots.txt avec Protego"""
@@ -41,6 +69,29 @@ class RobotsParser:
         except Exception:
             return False  # Erreur de parsing = bloqué par sécurité
     
+    def bot_verdicts(self, robots_parser, url: str, bots: Iterable[str]) -> Dict[str, Dict]:
+        """Verdict robots.txt de chaque bot pour l'URL, sans requête vers la page
+
+        Un bot est OK si au moins un de ses User-Agents est autorisé, comme
+        dans BotTester.determine_bot_status.
+        """
+        verdicts = {}
+        for bot in bots:
+            user_agents = BOT_DEFINITIONS.get(bot, {}).get('user_agents', {})
+            if not user_agents:
+                continue
+            allowed = {name: self.check_robots_permission(robots_parser, user_agent, url)
+                       for name, user_agent in user_agents.items()}
+            count = sum(allowed.values())
+            if count == len(allowed):
+                status, reason = 'OK', 'Tous les UA autorisés'
+            elif count:
+                status, reason = 'OK', f'{count}/{len(allowed)} UA autorisés'
+            else:
+                status, reason = 'KO', 'Tous les UA bloqués'
+            verdicts[bot] = {'status': status, 'reason': reason, 'user_agents': allowed}
+        return verdicts
+
     def is_blocked_by_robots(self, url: str, bot_rules: dict) -> bool:
         """Détermine si une URL est bloquée par robots.txt"""
         parsed_url = urlparse(url)
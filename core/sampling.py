@@ -0,0 +1,366 @@
+"""
+Échantillonnage stratifié des URLs d'un site : couverture autorisée par bot, avec intervalles de confiance
+"""
+
+import math
+import random
+import re
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+import requests
+
+from .cancellation import CANCELLED, CancellationToken, OperationStopped, read_response_bytes
+from .result_cache import ResultCache
+from .timings import timed_get
+
+
+DEFAULT_SAMPLE_SIZE = 30
+# Bornes de la phase de planification : le nombre de requêtes ne dépend pas de la taille du site
+DEFAULT_MAX_SITEMAPS = 5
+DEFAULT_MAX_SITEMAP_URLS = 50000
+SITEMAP_BYTES_LIMIT = 20 * 1024 * 1024
+Z_95 = 1.959963984540054
+OTHER_STRATUM = '(autres)'
+
+RULE_LINE = re.compile(r'^\s*(?:dis)?allow\s*:\s*([^\s#]+)', re.IGNORECASE | re.MULTILINE)
+SITEMAP_LINE = re.compile(r'^\s*sitemap\s*:\s*(\S+)', re.IGNORECASE | re.MULTILINE)
+LOC = re.compile(rb'<loc>\s*(?:<!\[CDATA\[)?\s*([^<\s\]]+)', re.IGNORECASE)
+
+
+def rule_prefixes(content: str) -> List[str]:
+    """Préfixes de chemin des règles Allow/Disallow (partie fixe avant * ou $), tous groupes confondus"""
+    prefixes = set()
+    for value in RULE_LINE.findall(content):
+        prefix = re.split(r'[*$]', value, maxsplit=1)[0]
+        if prefix.startswith('/') and prefix != '/':
+            prefixes.add(prefix)
+    return sorted(prefixes)
+
+
+class StrataIndex:
+    """Strate d'un chemin : plus long préfixe de règle robots.txt qui le couvre, sinon premier segment
+
+    Les préfixes sont indexés par longueur : une affectation coûte une
+    recherche par longueur distincte, quel que soit le nombre de règles.
+    """
+
+    def __init__(self, prefixes: Sequence[str]):
+        self.prefixes = set(prefixes)
+        self.lengths = sorted({len(prefix) for prefix in self.prefixes}, reverse=True)
+
+    def stratum_for(self, path: str) -> str:
+        for length in self.lengths:
+            if length <= len(path) and path[:length] in self.prefixes:
+                return path[:length]
+        segments = path.split('/')
+        if len(segments) > 2:
+            return f'/{segments[1]}/'
+        return '/'
+
+
+def allocate(populations: Dict[str, int], budget: int) -> Dict[str, int]:
+    """Taille d'échantillon par strate : au moins 1 par strate, reste proportionnel à la population
+
+    Les strates sont supposées triées par population décroissante ; le
+    reste est réparti au plus fort reste, sans dépasser la population.
+    """
+    keys = [key for key, population in populations.items() if population > 0]
+    budget = min(budget, sum(populations[key] for key in keys))
+    allocation = {key: 1 for key in keys[:budget]}
+    remaining = budget - len(allocation)
+    if remaining <= 0:
+        return allocation
+    total = sum(populations[key] for key in allocation)
+    quotas = {key: remaining * populations[key] / total for key in allocation}
+    for key in allocation:
+        allocation[key] += min(int(quotas[key]), populations[key] - 1)
+    left = budget - sum(allocation.values())
+    order = sorted(allocation, key=lambda key: quotas[key] - int(quotas[key]), reverse=True)
+    while left > 0:
+        for key in order:
+            if left and allocation[key] < populations[key]:
+                allocation[key] += 1
+                left -= 1
+    return allocation
+
+
+@dataclass
+class Stratum:
+    """Strate d'un site : population connue (URLs des sitemaps) et URLs tirées"""
+    key: str
+    population: int = 0
+    sample: List[str] = field(default_factory=list)
+    candidates: List[str] = field(default_factory=list, repr=False)
+
+
+@dataclass
+class SamplePlan:
+    """Plan d'échantillonnage d'un site et coût de sa préparation"""
+    site: str
+    strata: Dict[str, Stratum]
+    sitemaps: List[str] = field(default_factory=list)
+    sitemap_urls: int = 0
+    truncated: bool = False
+    requests: int = 0
+    error: Optional[str] = None
+
+    @property
+    def sample(self) -> List[Tuple[str, str]]:
+        """(strate, URL) de chaque URL tirée"""
+        return [(key, url) for key, stratum in self.strata.items() for url in stratum.sample]
+
+
+@dataclass
+class CoverageEstimate:
+    """Part estimée des URLs du site autorisées pour un User-Agent d'un bot, et son intervalle à 95 %"""
+    bot: str
+    user_agent_name: str
+    tested: int
+    allowed: int
+    estimate: float
+    low: float
+    high: float
+
+
+class SamplingPlanner:
+    """Planification d'un échantillon stratifié par site à partir de robots.txt et des sitemaps
+
+    Les strates sont les préfixes des règles robots.txt (sections bloquées ou
+    autorisées explicitement) puis le premier segment de chemin ; leur
+    population est le nombre d'URLs des sitemaps qui y tombent. Un préfixe
+    sans URL dans les sitemaps est représenté par l'URL du préfixe lui-même.
+    La planification coûte au plus 1 + max_sitemaps requêtes.
+    """
+
+    def __init__(self, sample_size: int = DEFAULT_SAMPLE_SIZE, max_sitemaps: int = DEFAULT_MAX_SITEMAPS,
+                 max_sitemap_urls: int = DEFAULT_MAX_SITEMAP_URLS, seed: int = 0, timeout: float = 10,
+                 cache: Optional[ResultCache] = None):
+        self.sample_size = sample_size
+        self.max_sitemaps = max_sitemaps
+        self.max_sitemap_urls = max_sitemap_urls
+        self.seed = seed
+        self.timeout = timeout
+        # Le robots.txt lu ici est partagé avec les vérifications de l'échantillon
+        self.cache = cache
+
+    def _fetch(self, url: str, token: Optional[CancellationToken] = None) -> Tuple[int, bytes]:
+        """Code et corps (tronqué à SITEMAP_BYTES_LIMIT), interrompus par le jeton à toute étape"""
+        timeout = token.timeout(self.timeout) if token is not None else self.timeout
+        response = timed_get(url, token, timeout=timeout, stream=True)
+        try:
+            return response.status_code, read_response_bytes(response, token, limit=SITEMAP_BYTES_LIMIT)
+        finally:
+            response.close()
+
+    def plan(self, url: str, token: Optional[CancellationToken] = None) -> SamplePlan:
+        """Plan d'échantillonnage du site ; sur arrêt du jeton, plan vide avec le motif en erreur"""
+        try:
+            return self._plan(url, token)
+        except OperationStopped as e:
+            return SamplePlan(site=url, strata={},
+                              error='Annulé' if e.reason == CANCELLED else 'Délai dépassé')
+
+    def _plan(self, url: str, token: Optional[CancellationToken]) -> SamplePlan:
+        parts = urlsplit(url)
+        origin = f'{parts.scheme}://{parts.netloc}'
+        plan = SamplePlan(site=url, strata={})
+        rng = random.Random(f'{self.seed}:{origin}')
+
+        robots_url = origin + '/robots.txt'
+        try:
+            status_code, content = self._fetch(robots_url, token)
+        except requests.exceptions.RequestException as e:
+            plan.error = f'robots.txt injoignable : {str(e)[:100]}'
+            return plan
+        plan.requests += 1
+        robots = content.decode('utf-8', errors='replace') if status_code == 200 else ''
+        if self.cache is not None:
+            self.cache.set_robots(robots_url, status_code, robots)
+        prefixes = rule_prefixes(robots)
+        index = StrataIndex(prefixes)
+
+        pages = self._read_sitemaps(SITEMAP_LINE.findall(robots) or [origin + '/sitemap.xml'], plan, rng, token)
+        candidates: Dict[str, List[str]] = {}
+        for page in pages:
+            page_parts = urlsplit(page)
+            if page_parts.netloc.lower() != parts.netloc.lower():
+                continue
+            candidates.setdefault(index.stratum_for(page_parts.path or '/'), []).append(page)
+        # Sections sans URL dans les sitemaps (souvent les parties bloquées) et page saisie
+        for probe in [url, *(origin + prefix for prefix in prefixes)]:
+            key = index.stratum_for(urlsplit(probe).path or '/')
+            if not candidates.get(key):
+                candidates[key] = [probe]
+
+        strata = sorted(candidates.items(), key=lambda item: (-len(item[1]), item[0]))
+        if len(strata) > self.sample_size:
+            kept, merged = strata[:self.sample_size - 1], strata[self.sample_size - 1:]
+            strata = kept + [(OTHER_STRATUM, [page for _, urls in merged for page in urls])]
+        plan.strata = {key: Stratum(key, len(urls), candidates=urls) for key, urls in strata}
+
+        allocation = allocate({key: stratum.population for key, stratum in plan.strata.items()},
+                              self.sample_size)
+        for key, size in allocation.items():
+            stratum = plan.strata[key]
+            stratum.sample = rng.sample(stratum.candidates, size)
+        return plan
+
+    def _read_sitemaps(self, roots: List[str], plan: SamplePlan, rng: random.Random,
+                       token: Optional[CancellationToken] = None) -> List[str]:
+        """URLs de pages des sitemaps (index suivis), dans la limite de max_sitemaps et max_sitemap_urls"""
+        queue, seen, pages = list(roots), set(), []
+        while queue and len(plan.sitemaps) < self.max_sitemaps and len(pages) < self.max_sitemap_urls:
+            sitemap_url = queue.pop(0)
+            if sitemap_url in seen:
+                continue
+            seen.add(sitemap_url)
+            try:
+                status_code, content = self._fetch(sitemap_url, token)
+            except requests.exceptions.RequestException:
+                plan.requests += 1
+                continue
+            plan.requests += 1
+            if status_code != 200:
+                continue
+            plan.sitemaps.append(sitemap_url)
+            if content[:2] == b'\x1f\x8b':
+                content = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(content, SITEMAP_BYTES_LIMIT)
+            locations = [location.decode('utf-8', errors='replace') for location in LOC.findall(content)]
+            if b'<sitemapindex' in content[:4096].lower():
+                # Sous-sitemaps lus dans un ordre aléatoire : pas de biais vers les premières sections
+                rng.shuffle(locations)
+                queue.extend(locations)
+            else:
+                pages.extend(locations[:self.max_sitemap_urls - len(pages)])
+        plan.sitemap_urls = len(pages)
+        plan.truncated = bool(queue) or len(pages) >= self.max_sitemap_urls
+        return pages
+
+
+def _test_statuses(results: Dict[str, Dict], urls: Sequence[str], bot: str) -> Dict[str, List[str]]:
+    """Statuts des tests d'un bot sur des URLs, par User-Agent"""
+    statuses: Dict[str, List[str]] = {}
+    for url in urls:
+        for test in results.get(url, {}).get('results', {}).get(bot, {}).get('tests', []):
+            statuses.setdefault(test['user_agent_name'], []).append(test['status'])
+    return statuses
+
+
+def _stratified(observed: List[Tuple[int, int, int]]) -> Tuple[float, float, float]:
+    """Estimation stratifiée d'une proportion et son intervalle à 95 % à partir de (population, testés, autorisés)"""
+    total = sum(population for population, _, _ in observed)
+    if not total:
+        return math.nan, math.nan, math.nan
+    estimate, variance = 0.0, 0.0
+    for population, tested, allowed in observed:
+        weight = population / total
+        estimate += weight * allowed / tested
+        smoothed = (allowed + 1) / (tested + 2)
+        fpc = max(0.0, 1 - tested / population)
+        variance += weight ** 2 * smoothed * (1 - smoothed) / tested * fpc
+    margin = Z_95 * math.sqrt(variance)
+    return estimate, max(0.0, estimate - margin), min(1.0, estimate + margin)
+
+
+def estimate_coverage(plan: SamplePlan, results: Dict[str, Dict],
+                      bots: Sequence[str]) -> Dict[Tuple[str, str], CoverageEstimate]:
+    """Estimation stratifiée de la part d'URLs autorisées, par bot et par User-Agent
+
+    L'estimation est faite par User-Agent : le statut global d'un bot est OK
+    dès qu'un de ses UA passe et masquerait un blocage de GPTBot seul. Les
+    tests NA sont exclus, ainsi que les strates sans test conclusif (leur
+    poids est réparti sur les autres). La variance de chaque strate utilise
+    (x + 1) / (n + 2) pour ne pas s'annuler sur les petits échantillons,
+    avec correction de population finie : une strate entièrement testée ne
+    contribue pas à l'incertitude.
+    """
+    estimates = {}
+    for bot in bots:
+        observed: Dict[str, List[Tuple[int, int, int]]] = {}
+        for stratum in plan.strata.values():
+            for user_agent_name, statuses in _test_statuses(results, stratum.sample, bot).items():
+                conclusive = [status for status in statuses if status != 'NA']
+                entries = observed.setdefault(user_agent_name, [])
+                if conclusive:
+                    entries.append((stratum.population, len(conclusive), conclusive.count('OK')))
+        for user_agent_name, entries in observed.items():
+            estimate, low, high = _stratified(entries)
+            estimates[(bot, user_agent_name)] = CoverageEstimate(
+                bot, user_agent_name, sum(tested for _, tested, _ in entries),
+                sum(allowed for _, _, allowed in entries), estimate, low, high)
+    return estimates
+
+
+@dataclass
+class SiteCoverage:
+    """Résultat de l'échantillonnage d'un site : plan, résultats des URLs tirées et estimations"""
+    plan: SamplePlan
+    results: Dict[str, Dict]
+    estimates: Dict[Tuple[str, str], CoverageEstimate]
+
+    def strata_frame(self) -> pd.DataFrame:
+        """Une ligne par strate, bot et User-Agent : population, URLs testées et autorisées"""
+        rows = []
+        bots = list(dict.fromkeys(bot for bot, _ in self.estimates))
+        for stratum in self.plan.strata.values():
+            for bot in bots:
+                for user_agent_name, statuses in _test_statuses(self.results, stratum.sample, bot).items():
+                    rows.append({'site': self.plan.site, 'stratum': stratum.key, 'population': stratum.population,
+                                 'bot': bot, 'user_agent_name': user_agent_name,
+                                 'tested': sum(status != 'NA' for status in statuses),
+                                 'allowed': statuses.count('OK')})
+        return pd.DataFrame(rows, columns=['site', 'stratum', 'population', 'bot', 'user_agent_name',
+                                           'tested', 'allowed'])
+
+
+def coverage_frame(coverages: List[SiteCoverage]) -> pd.DataFrame:
+    """Une ligne par site, bot et User-Agent : estimation, intervalle à 95 % et coût de la planification"""
+    rows = [{'site': coverage.plan.site, 'bot': estimate.bot, 'user_agent_name': estimate.user_agent_name,
+             'tested': estimate.tested, 'allowed': estimate.allowed, 'estimate': estimate.estimate,
+             'low': estimate.low, 'high': estimate.high, 'strata': len(coverage.plan.strata),
+             'sitemap_urls': coverage.plan.sitemap_urls, 'planning_requests': coverage.plan.requests,
+             'error': coverage.plan.error}
+            for coverage in coverages for estimate in coverage.estimates.values()]
+    return pd.DataFrame(rows, columns=['site', 'bot', 'user_agent_name', 'tested', 'allowed', 'estimate', 'low',
+                                       'high', 'strata', 'sitemap_urls', 'planning_requests', 'error'])
+
+
+def run_sampling(urls: Sequence[str], bots: List[str], planner: Optional[SamplingPlanner] = None,
+                 workers: int = 4, progress: Optional[Callable[[int, int], None]] = None,
+                 token: Optional[CancellationToken] = None) -> List[SiteCoverage]:
+    """Planifie l'échantillon de chaque site, vérifie les URLs tirées puis estime la couverture par User-Agent
+
+    Requêtes par site : au plus 1 + max_sitemaps pour le plan, puis un test
+    par URL tirée et par User-Agent, quelle que soit la taille du site.
+    """
+    from bots_checker import BotsChecker
+
+    cache = ResultCache()
+    planner = planner or SamplingPlanner()
+    planner.cache = cache
+    checker = BotsChecker(cache=cache)
+
+    def check(url):
+        result = checker.check_robots_txt(url, bots, token)
+        result['original_url'] = url
+        return url, result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        plans = list(executor.map(partial(planner.plan, token=token), urls))
+        jobs = list(dict.fromkeys(url for plan in plans for _, url in plan.sample))
+        results, done = {}, 0
+        for url, result in executor.map(check, jobs):
+            results[url] = result
+            done += 1
+            if progress:
+                progress(done, len(jobs))
+
+    return [SiteCoverage(plan, {url: results[url] for _, url in plan.sample},
+                         estimate_coverage(plan, results, bots))
+            for plan in plans]
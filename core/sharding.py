@@ -0,0 +1,379 @@
+"""
+Exécution répartie : file SQLite partagée entre un coordinateur et des processus workers par shard
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from .cancellation import CANCELLED, CancellationToken
+
+
+DEFAULT_BATCH_SIZE = 16
+# Au-delà, une URL réservée par un worker disparu est remise en file
+DEFAULT_LEASE_SECONDS = 300
+POLL_INTERVAL = 0.2
+# Après un arrêt, délai laissé aux workers pour publier en NA les URLs en cours
+STOP_GRACE_SECONDS = 5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    bots TEXT NOT NULL,
+    shards INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    created REAL NOT NULL,
+    deadline REAL,
+    cancelled INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    claimed_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, shard, run_id);
+CREATE TABLE IF NOT EXISTS results (
+    result_id INTEGER PRIMARY KEY,
+    job_id INTEGER NOT NULL UNIQUE,
+    run_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id, result_id);
+"""
+
+
+def shard_for(url: str, shards: int) -> int:
+    """Shard d'une URL selon un hachage stable de son hôte
+
+    Toutes les URLs d'un hôte vont au même worker : son robots.txt et son
+    cache restent locaux, et la politesse par hôte est préservée.
+    """
+    host = urlsplit(url if '://' in url else f'https://{url}').hostname or url
+    return zlib.crc32(host.lower().encode('utf-8')) % shards
+
+
+class ShardQueue:
+    """File de travail SQLite (mode WAL) : URLs à vérifier par shard et résultats sérialisés
+
+    Un fichier local suffit pour plusieurs processus d'une machine ; pour
+    plusieurs nœuds, le fichier doit être sur un système de fichiers partagé
+    dont le verrouillage est fiable.
+    """
+
+    def __init__(self, path: str, timeout: float = 30):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+            # Files créées avant l'échéance partagée : colonnes ajoutées en place
+            columns = {row[1] for row in connection.execute('PRAGMA table_info(runs)')}
+            if 'deadline' not in columns:
+                connection.execute('ALTER TABLE runs ADD COLUMN deadline REAL')
+            if 'cancelled' not in columns:
+                connection.execute('ALTER TABLE runs ADD COLUMN cancelled INTEGER NOT NULL DEFAULT 0')
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connexion propre au thread (sqlite3 n'autorise pas le partage entre threads)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def create_run(self, urls: Sequence[str], bots: List[str], shards: int,
+                   deadline: Optional[float] = None) -> str:
+        """Enregistre une analyse et ses URLs, réparties par hôte ; renvoie son identifiant
+
+        `deadline` est l'échéance de l'analyse en temps horloge (time.time()),
+        appliquée par chaque worker à ses vérifications.
+        """
+        run_id = uuid.uuid4().hex
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('INSERT INTO runs (run_id, bots, shards, total, created, deadline) '
+                               'VALUES (?, ?, ?, ?, ?, ?)',
+                               (run_id, json.dumps(bots), shards, len(urls), time.time(), deadline))
+            connection.executemany(
+                'INSERT INTO jobs (run_id, shard, position, url) VALUES (?, ?, ?, ?)',
+                [(run_id, shard_for(url, shards), position, url) for position, url in enumerate(urls)]
+            )
+        return run_id
+
+    def run_bots(self, run_id: str) -> List[str]:
+        row = self._connection().execute('SELECT bots FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def run_token(self, run_id: str) -> CancellationToken:
+        """Jeton local d'une analyse : son échéance horloge convertie en échéance monotone du processus"""
+        row = self._connection().execute('SELECT deadline, cancelled FROM runs WHERE run_id = ?',
+                                         (run_id,)).fetchone()
+        deadline, cancelled = row if row else (None, 0)
+        token = CancellationToken(None if deadline is None else time.monotonic() + deadline - time.time())
+        if cancelled:
+            token.cancel()
+        return token
+
+    def cancelled_runs(self, run_ids: Sequence[str]) -> List[str]:
+        placeholders = ','.join('?' * len(run_ids))
+        return [row[0] for row in self._connection().execute(
+            f'SELECT run_id FROM runs WHERE cancelled = 1 AND run_id IN ({placeholders})', list(run_ids))]
+
+    def claim(self, shards: Sequence[int], worker: str, limit: int = DEFAULT_BATCH_SIZE,
+              run_id: Optional[str] = None, lease: float = DEFAULT_LEASE_SECONDS) -> List[sqlite3.Row]:
+        """Réserve jusqu'à `limit` URLs en attente (ou dont la réservation a expiré) des shards donnés"""
+        now = time.time()
+        placeholders = ','.join('?' * len(shards))
+        run_filter = 'AND run_id = ?' if run_id else ''
+        params = [*shards, now - lease, *([run_id] if run_id else []), limit]
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            rows = connection.execute(
+                f"""SELECT job_id, run_id, position, url FROM jobs
+                    WHERE shard IN ({placeholders})
+                      AND (status = 'pending' OR (status = 'claimed' AND claimed_at < ?)) {run_filter}
+                    ORDER BY job_id LIMIT ?""",
+                params
+            ).fetchall()
+            connection.executemany(
+                "UPDATE jobs SET status = 'claimed', worker = ?, claimed_at = ? WHERE job_id = ?",
+                [(worker, now, row[0]) for row in rows]
+            )
+        return rows
+
+    def complete(self, job_id: int, run_id: str, position: int, result: Dict) -> None:
+        """Publie le résultat d'une URL (idempotent : une URL reprise après expiration n'est comptée qu'une fois)"""
+        payload = json.dumps(result, ensure_ascii=False, default=str)
+        connection = self._connection()
+        with connection:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.execute('INSERT OR IGNORE INTO results (job_id, run_id, position, payload) VALUES (?, ?, ?, ?)',
+                               (job_id, run_id, position, payload))
+            connection.execute("UPDATE jobs SET status = 'done' WHERE job_id = ?", (job_id,))
+
+    def remaining(self, shards: Sequence[int], run_id: Optional[str] = None) -> int:
+        """URLs non terminées (en attente ou réservées) des shards donnés"""
+        placeholders = ','.join('?' * len(shards))
+        run_filter = 'AND run_id = ?' if run_id else ''
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM jobs WHERE shard IN ({placeholders}) "
+            f"AND status IN ('pending', 'claimed') {run_filter}",
+            [*shards, *([run_id] if run_id else [])]
+        ).fetchone()[0]
+
+    def cancel(self, run_id: str, abort: bool = True) -> None:
+        """Retire de la file les URLs non encore réservées ; avec `abort`, les workers annulent aussi les URLs en cours"""
+        with self._connection() as connection:
+            connection.execute("UPDATE jobs SET status = 'cancelled' WHERE run_id = ? AND status = 'pending'",
+                               (run_id,))
+            if abort:
+                connection.execute('UPDATE runs SET cancelled = 1 WHERE run_id = ?', (run_id,))
+
+    def in_progress(self, run_id: str) -> int:
+        """URLs réservées par un worker et pas encore publiées"""
+        return self._connection().execute("SELECT COUNT(*) FROM jobs WHERE run_id = ? AND status = 'claimed'",
+                                          (run_id,)).fetchone()[0]
+
+    def results_since(self, run_id: str, after: int = 0) -> List[tuple]:
+        """Résultats publiés après le curseur `after` : (result_id, position, résultat)"""
+        rows = self._connection().execute(
+            'SELECT result_id, position, payload FROM results WHERE run_id = ? AND result_id > ? ORDER BY result_id',
+            (run_id, after)
+        ).fetchall()
+        return [(result_id, position, json.loads(payload)) for result_id, position, payload in rows]
+
+
+class ShardWorker:
+    """Worker d'un ou plusieurs shards : réserve des lots d'URLs, les vérifie et publie chaque résultat"""
+
+    def __init__(self, queue: ShardQueue, shards: Sequence[int], run_id: Optional[str] = None,
+                 threads: int = 4, batch_size: int = DEFAULT_BATCH_SIZE,
+                 lease: float = DEFAULT_LEASE_SECONDS, idle_timeout: float = 0):
+        self.queue = queue
+        self.shards = list(shards)
+        self.run_id = run_id
+        self.threads = threads
+        self.batch_size = batch_size
+        self.lease = lease
+        self.idle_timeout = idle_timeout
+        self.worker_id = f'{os.uname().nodename if hasattr(os, "uname") else "local"}:{os.getpid()}'
+
+    def run(self) -> int:
+        """Traite la file jusqu'à épuisement (puis `idle_timeout` s d'attente) ; renvoie le nombre d'URLs traitées"""
+        from bots_checker import BotsChecker
+        from .result_cache import ResultCache
+
+        checker = BotsChecker(cache=ResultCache())
+        processed = 0
+        idle_since = None
+        run_bots, run_tokens = {}, {}
+        lock = threading.Lock()
+        stop_watch = threading.Event()
+
+        def check(job):
+            run_id = job['run_id']
+            with lock:
+                if run_id not in run_bots:
+                    run_bots[run_id] = self.queue.run_bots(run_id)
+                    run_tokens[run_id] = self.queue.run_token(run_id)
+            # Échéance et annulation de l'analyse : les URLs en cours finissent en NA, comme sans shards
+            result = checker.check_robots_txt(job['url'], run_bots[run_id], run_tokens[run_id])
+            result['original_url'] = job['url']
+            self.queue.complete(job['job_id'], run_id, job['position'], result)
+
+        def watch_cancellations():
+            """Relaie aux jetons locaux l'annulation posée dans la file par le coordinateur"""
+            while not stop_watch.wait(POLL_INTERVAL):
+                with lock:
+                    active = [run_id for run_id, token in run_tokens.items() if not token.stopped]
+                if active:
+                    for run_id in self.queue.cancelled_runs(active):
+                        run_tokens[run_id].cancel()
+
+        threading.Thread(target=watch_cancellations, daemon=True).start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                while True:
+                    rows = self.queue.claim(self.shards, self.worker_id, self.batch_size, self.run_id, self.lease)
+                    if rows:
+                        idle_since = None
+                        jobs = [dict(zip(('job_id', 'run_id', 'position', 'url'), row)) for row in rows]
+                        list(executor.map(check, jobs))
+                        processed += len(jobs)
+                        continue
+                    # Plus rien à réserver : attente des URLs réservées ailleurs (reprises si leur worker disparaît)
+                    if not self.queue.remaining(self.shards, self.run_id):
+                        idle_since = idle_since or time.monotonic()
+                        if time.monotonic() - idle_since >= self.idle_timeout:
+                            return processed
+                    time.sleep(POLL_INTERVAL)
+        finally:
+            stop_watch.set()
+
+
+def _worker_main(path: str, shards: List[int], run_id: Optional[str], threads: int) -> None:
+    """Point d'entrée d'un processus worker local"""
+    ShardWorker(ShardQueue(path), shards, run_id, threads).run()
+
+
+def run_sharded(urls: Sequence[str], selected_bots: List[str], shards: int,
+                queue_path: Optional[str] = None, local_workers: Optional[int] = None,
+                threads: int = 4, progress: Optional[Callable[[int, int], None]] = None,
+                token: Optional[CancellationToken] = None) -> List[Dict]:
+    """Coordinateur : répartit les URLs par hachage d'hôte, lance les workers locaux et fusionne les résultats
+
+    `local_workers` processus (un par shard par défaut) se partagent les
+    shards ; avec 0, les shards sont laissés à des workers externes
+    (cli.py --worker) pointant sur la même file. Les résultats arrivent au
+    fil de l'eau et sont rendus dans l'ordre de saisie, au format de
+    BotsChecker.check_robots_txt.
+
+    L'échéance du jeton est enregistrée avec l'analyse et appliquée par les
+    workers ; une annulation leur est transmise par la file. Les URLs en
+    cours finissent alors en NA (« Annulé » / « Délai dépassé ») et les
+    URLs jamais réservées sont rapportées de la même façon : chaque URL
+    saisie a un résultat, comme sans shards.
+    """
+    temporary = queue_path is None
+    if temporary:
+        fd, queue_path = tempfile.mkstemp(prefix='ua_checker_queue_', suffix='.db')
+        os.close(fd)
+    queue = ShardQueue(queue_path)
+    deadline = None
+    if token is not None and token.deadline is not None:
+        deadline = time.time() + token.deadline - time.monotonic()
+    run_id = queue.create_run(list(urls), selected_bots, shards, deadline)
+
+    local_workers = shards if local_workers is None else min(local_workers, shards)
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=_worker_main, args=(queue_path, list(range(index, shards, local_workers)),
+                                                    run_id, threads), daemon=True)
+        for index in range(local_workers)
+    ]
+    for process in processes:
+        process.start()
+
+    results, cursor = {}, 0
+    stopped_at = None
+    try:
+        while len(results) < len(urls):
+            for result_id, position, result in queue.results_since(run_id, cursor):
+                cursor = result_id
+                results[position] = result
+            if progress:
+                progress(len(results), len(urls))
+            if token is not None and token.reason:
+                if stopped_at is None:
+                    # Plus aucune URL réservée ; seule l'annulation est relayée (l'échéance est connue des workers)
+                    queue.cancel(run_id, abort=token.reason == CANCELLED)
+                    stopped_at = time.monotonic()
+                elif not queue.in_progress(run_id) or time.monotonic() - stopped_at >= STOP_GRACE_SECONDS:
+                    break
+            if processes and not any(process.is_alive() for process in processes) \
+                    and not queue.results_since(run_id, cursor):
+                break
+            time.sleep(POLL_INTERVAL)
+        for result_id, position, result in queue.results_since(run_id, cursor):
+            results[position] = result
+    finally:
+        for process in processes:
+            if token is not None and token.reason:
+                process.terminate()
+            process.join(timeout=5)
+        if temporary:
+            for suffix in ('', '-wal', '-shm'):
+                try:
+                    os.remove(queue_path + suffix)
+                except OSError:
+                    pass
+
+    missing = [position for position in range(len(urls)) if position not in results]
+    if missing:
+        results.update(_unfinished_results(urls, missing, selected_bots, token))
+        if progress:
+            progress(len(results), len(urls))
+    return [results[position] for position in range(len(urls))]
+
+
+def _unfinished_results(urls: Sequence[str], positions: List[int], selected_bots: List[str],
+                        token: Optional[CancellationToken]) -> Dict[int, Dict]:
+    """Résultats des URLs sans résultat publié
+
+    Sur arrêt, ceux de check_robots_txt avec le jeton arrêté (tests NA,
+    sans requête) ; sinon (workers disparus), une erreur par URL.
+    """
+    if token is not None and token.stopped:
+        from bots_checker import BotsChecker
+
+        checker = BotsChecker()
+        results = {}
+        for position in positions:
+            result = checker.check_robots_txt(urls[position], selected_bots, token)
+            result['original_url'] = urls[position]
+            results[position] = result
+        return results
+    timestamp = datetime.now().isoformat()
+    return {position: {'url': urls[position], 'original_url': urls[position],
+                       'error': 'Erreur lors de la vérification: worker interrompu', 'timestamp': timestamp}
+            for position in positions}
@@ -0,0 +1,307 @@
+"""
+Décomposition du temps de réponse d'un test (DNS, connexion, TLS, TTFB, téléchargement, parsing)
+"""
+
+import errno
+import os
+import select
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from socket import timeout as SocketTimeout
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, LocationParseError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.timeout import _DEFAULT_TIMEOUT
+
+from . import http_archive
+from .cancellation import CancellationToken
+
+
+PHASES = ['dns', 'connect', 'tls', 'ttfb', 'download', 'parse']
+PHASE_LABELS = {
+    'dns': 'DNS',
+    'connect': 'Connexion',
+    'tls': 'TLS',
+    'ttfb': 'Premier octet',
+    'download': 'Téléchargement',
+    'parse': 'Parsing',
+}
+
+# Chronomètre du test en cours, jeton d'annulation et sockets ouverts de la requête en cours dans
+# chaque thread, lus par les connexions instrumentées
+_local = threading.local()
+# Intervalle de vérification du jeton pendant la résolution DNS et la connexion TCP
+POLL_INTERVAL = 0.05
+
+
+class PhaseTimer:
+    """Durées cumulées de chaque phase d'un test (redirections comprises)"""
+
+    def __init__(self):
+        self.durations = dict.fromkeys(PHASES, 0.0)
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.durations[phase] += seconds
+
+    @contextmanager
+    def phase(self, name: str):
+        """Chronomètre un bloc, y compris s'il est interrompu par une exception"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    @contextmanager
+    def request(self):
+        """Chronomètre l'envoi d'une requête jusqu'à la réception des en-têtes
+
+        Les connexions ouvertes pendant le bloc renseignent DNS, connexion et
+        TLS ; le reste du temps écoulé est l'attente du premier octet.
+        """
+        previous = getattr(_local, 'timer', None)
+        _local.timer = self
+        setup_before = self._setup_time()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            _local.timer = previous
+            elapsed = time.perf_counter() - start
+            self.add('ttfb', max(0.0, elapsed - (self._setup_time() - setup_before)))
+
+    def _setup_time(self) -> float:
+        return self.durations['dns'] + self.durations['connect'] + self.durations['tls']
+
+    def load_time(self) -> float:
+        """Temps de chargement (s) : de la résolution DNS à la fin du téléchargement"""
+        return sum(self.durations[phase] for phase in PHASES if phase != 'parse')
+
+    def as_dict(self) -> Dict[str, float]:
+        """Durées par phase en millisecondes"""
+        return {phase: round(seconds * 1000, 1) for phase, seconds in self.durations.items()}
+
+
+def _wait(done: threading.Event, timeout, token: Optional[CancellationToken]) -> bool:
+    """Attend l'événement au plus `timeout` secondes, en s'arrêtant dès que le jeton est arrêté"""
+    if token is None:
+        return done.wait(timeout if isinstance(timeout, (int, float)) else None)
+    deadline = time.monotonic() + timeout if isinstance(timeout, (int, float)) else None
+    while not done.wait(POLL_INTERVAL):
+        token.raise_if_stopped()
+        if deadline is not None and time.monotonic() >= deadline:
+            return False
+    return True
+
+
+def _resolve(host: str, port: int, timeout, token: Optional[CancellationToken] = None) -> List[Tuple]:
+    """getaddrinfo borné par le délai de connexion (la résolution système n'a pas de délai propre)"""
+    host = host.strip('[]')
+    try:
+        host.encode('idna')
+    except UnicodeError:
+        raise LocationParseError(f"'{host}', label empty or too long") from None
+    result: Dict[str, object] = {}
+    done = threading.Event()
+
+    def lookup():
+        try:
+            result['addresses'] = socket.getaddrinfo(host, port, allowed_gai_family(), socket.SOCK_STREAM)
+        except BaseException as e:
+            result['error'] = e
+        finally:
+            done.set()
+
+    # Thread démon : une résolution abandonnée n'empêche pas la fin du processus
+    threading.Thread(target=lookup, daemon=True).start()
+    if not _wait(done, timeout, token):
+        raise SocketTimeout(f'résolution DNS de {host} : délai dépassé')
+    if 'error' in result:
+        raise result['error']
+    if not result['addresses']:
+        raise socket.gaierror(f'aucune adresse pour {host}')
+    return result['addresses']
+
+
+def _connect_socket(sock: socket.socket, address, timeout, token: Optional[CancellationToken]) -> None:
+    """connect() interruptible : sans jeton, connexion bloquante ; avec jeton, non bloquante et vérifiée
+
+    Un connect() bloqué n'est réveillé ni par shutdown() ni par close()
+    depuis un autre thread : l'attente se fait donc par tranches courtes.
+    """
+    if token is None:
+        sock.connect(address)
+        return
+    deadline = time.monotonic() + timeout if isinstance(timeout, (int, float)) else None
+    sock.setblocking(False)
+    error = sock.connect_ex(address)
+    while error in (errno.EINPROGRESS, errno.EWOULDBLOCK, errno.EALREADY):
+        token.raise_if_stopped()
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise SocketTimeout('timed out')
+        _, writable, failed = select.select([], [sock], [sock], min(POLL_INTERVAL, remaining or POLL_INTERVAL))
+        if writable or failed:
+            error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+    if error not in (0, errno.EISCONN):
+        raise OSError(error, os.strerror(error))
+    sock.settimeout(timeout if timeout is not _DEFAULT_TIMEOUT else socket.getdefaulttimeout())
+
+
+def _connect(addresses: List[Tuple], timeout, source_address, socket_options,
+             token: Optional[CancellationToken] = None) -> socket.socket:
+    """Essaie chaque adresse résolue dans l'ordre, comme urllib3.util.connection.create_connection
+
+    Les sockets sont inscrits dans la requête en cours pour être coupés par
+    l'annulation (attente du premier octet, TLS).
+    """
+    sockets = getattr(_local, 'sockets', None)
+    error = None
+    for family, socktype, proto, _, address in addresses:
+        sock = None
+        try:
+            sock = socket.socket(family, socktype, proto)
+            if sockets is not None:
+                sockets.add(sock)
+            for option in socket_options or ():
+                sock.setsockopt(*option)
+            if timeout is not _DEFAULT_TIMEOUT:
+                sock.settimeout(timeout)
+            if source_address:
+                sock.bind(source_address)
+            _connect_socket(sock, address, timeout, token)
+            return sock
+        except OSError as e:
+            error = e
+            if sock is not None:
+                sock.close()
+    raise error
+
+
+@contextmanager
+def cancellable(token: Optional[CancellationToken]):
+    """Rend interruptible par le jeton toute la phase d'envoi d'une requête (DNS, connexion, TLS, TTFB)
+
+    Les attentes de résolution et de connexion vérifient le jeton ; à
+    l'annulation (ou à l'échéance), les sockets déjà connectés de la requête
+    sont coupés, ce qui réveille la poignée de main TLS et l'attente des
+    en-têtes.
+    """
+    if token is None:
+        yield
+        return
+    sockets = set()
+    previous = getattr(_local, 'token', None), getattr(_local, 'sockets', None)
+    _local.token, _local.sockets = token, sockets
+
+    def abort():
+        for sock in list(sockets):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    try:
+        with token.on_cancel(abort):
+            yield
+    finally:
+        _local.token, _local.sockets = previous
+
+
+class _TimedConnectionMixin:
+    """Sépare la résolution DNS de l'établissement de la connexion TCP
+
+    Reprend urllib3 (HTTPConnection._new_conn et create_connection) en deux
+    étapes chronométrées : toutes les adresses résolues sont essayées, et les
+    erreurs sont typées comme par urllib3.
+    """
+
+    def _new_conn(self):
+        timer = getattr(_local, 'timer', None)
+        token = getattr(_local, 'token', None)
+        if timer is None and token is None:
+            return super()._new_conn()
+
+        def phase(name):
+            return timer.phase(name) if timer is not None else nullcontext()
+
+        try:
+            with phase('dns'):
+                addresses = _resolve(self._dns_host, self.port, self.timeout, token)
+            with phase('connect'):
+                sock = _connect(addresses, self.timeout, self.source_address, self.socket_options, token)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        except SocketTimeout as e:
+            raise ConnectTimeoutError(
+                self, f"Connection to {self.host} timed out. (connect timeout={self.timeout})") from e
+        except OSError as e:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {e}") from e
+
+        sys.audit("http.client.connect", self, self.host, self.port)
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+
+    def connect(self):
+        timer = getattr(_local, 'timer', None)
+        if timer is None:
+            return super().connect()
+
+        # TLS = durée totale de connect() moins DNS et TCP mesurés par _new_conn
+        setup_before = timer._setup_time()
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            elapsed = time.perf_counter() - start
+            timer.add('tls', max(0.0, elapsed - (timer._setup_time() - setup_before)))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """Adaptateur requests dont les connexions renseignent le PhaseTimer du thread"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+def timed_get(url: str, token: Optional[CancellationToken] = None, **kwargs) -> requests.Response:
+    """Équivalent de requests.get avec des connexions instrumentées (enregistrées ou rejouées selon l'archive active)
+
+    Avec un jeton, l'annulation interrompt aussi la résolution, la connexion
+    et l'attente des en-têtes (OperationStopped), pas seulement la lecture du
+    corps.
+    """
+    with cancellable(token):
+        try:
+            return http_archive.get(url, adapter=TimedHTTPAdapter(), **kwargs)
+        except requests.exceptions.RequestException:
+            # Socket coupé par l'annulation : l'erreur réseau qui en résulte n'en est pas une
+            if token is not None:
+                token.raise_if_stopped()
+            raise
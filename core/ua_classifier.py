@@ -0,0 +1,88 @@
+"""
+Classification des User-Agents par famille de bot (user_agent_pattern de BOT_DEFINITIONS)
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .bot_definitions import BOT_DEFINITIONS
+
+
+# Motif réduit à une alternance de littéraux (gptbot|chatgpt-user|...)
+LITERAL_ALTERNATION = re.compile(r'[^\\^$.|?*+()\[\]{}]+(\|[^\\^$.|?*+()\[\]{}]+)*')
+
+
+class UAClassifier:
+    """Associe un User-Agent à sa famille de bot via un seul matcher combiné
+
+    Les motifs de toutes les familles sont compilés une fois :
+    - s'ils ne sont que des alternances de littéraux (cas de BOT_DEFINITIONS),
+      en une table de jetons cherchés dans le User-Agent mis en minuscules ;
+    - sinon, en une seule alternance de groupes nommés.
+    En cas d'ambiguïté, la première famille dans l'ordre des définitions l'emporte.
+    Les chaînes déjà vues sont servies par un mémo LRU (le trafic réel répète
+    massivement les mêmes User-Agents).
+    """
+
+    def __init__(self, definitions: Optional[Dict[str, Dict]] = None, memo_size: int = 65536):
+        definitions = BOT_DEFINITIONS if definitions is None else definitions
+        patterns = {family: definition['user_agent_pattern'].lower()
+                    for family, definition in definitions.items() if definition.get('user_agent_pattern')}
+        self.families = list(patterns)
+
+        if all(LITERAL_ALTERNATION.fullmatch(pattern) for pattern in patterns.values()):
+            self._tokens = tuple((token, family) for family, pattern in patterns.items()
+                                 for token in pattern.split('|'))
+            self._match = self._match_tokens
+        else:
+            # Noms de groupes génériques : les clés de définitions ne sont pas forcément des identifiants
+            self._groups = {f'f{index}': family for index, family in enumerate(patterns)}
+            combined = '|'.join(f'(?P<f{index}>{pattern})' for index, pattern in enumerate(patterns.values()))
+            self._search = re.compile(combined).search
+            self._match = self._match_regex
+        self.classify = lru_cache(maxsize=memo_size)(self._classify)
+
+    def _match_tokens(self, user_agent: str) -> Optional[str]:
+        for token, family in self._tokens:
+            if token in user_agent:
+                return family
+        return None
+
+    def _match_regex(self, user_agent: str) -> Optional[str]:
+        match = self._search(user_agent)
+        return self._groups[match.lastgroup] if match else None
+
+    def _classify(self, user_agent: str) -> Optional[str]:
+        """Famille du bot reconnu dans user_agent, None pour un visiteur ordinaire"""
+        if not user_agent or not self.families:
+            return None
+        return self._match(user_agent.lower())
+
+    def classify_many(self, user_agents: Iterable[str]) -> List[Optional[str]]:
+        """Famille de chaque User-Agent d'une séquence"""
+        classify = self.classify
+        return [classify(user_agent) for user_agent in user_agents]
+
+    def classify_array(self, user_agents) -> np.ndarray:
+        """Famille de chaque User-Agent d'un tableau ou d'une Series (None si aucun bot)
+
+        Seules les valeurs distinctes passent par l'expression ; le résultat est
+        reconstitué par indexation vectorielle.
+        """
+        codes, uniques = pd.factorize(pd.Series(user_agents, dtype='object'), use_na_sentinel=True)
+        labels = np.array([self.classify(user_agent) for user_agent in uniques] + [None], dtype=object)
+        # Le code -1 (valeur manquante) désigne le dernier élément : None
+        return labels[codes]
+
+    def cache_info(self):
+        return self.classify.cache_info()
+
+
+@lru_cache(maxsize=1)
+def get_classifier() -> UAClassifier:
+    """Classifieur partagé construit depuis BOT_DEFINITIONS"""
+    return UAClassifier()
@@ -0,0 +1,67 @@
+"""
+Tests de la vérification DNS des crawlers (résolveur local à tables fixes)
+"""
+
+from bots_checker import BotsChecker
+from core.dns_verification import DNSVerifier, StaticResolver, _normalize_ip, hostname_matches
+from core.ip_ranges import IPRanges
+
+GOOGLEBOT_UA = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+
+
+def make_verifier(ptr=None, addresses=None):
+    return DNSVerifier(resolver=StaticResolver(ptr or {}, addresses or {}))
+
+
+def test_normalize_ip_unmaps_ipv4_mapped_addresses():
+    assert _normalize_ip('::ffff:66.249.66.1') == '66.249.66.1'
+    assert _normalize_ip(' 2001:DB8::1 ') == '2001:db8::1'
+    assert _normalize_ip('pas une ip') is None
+
+
+def test_hostname_matches_requires_a_label_boundary():
+    domains = ('googlebot.com', 'gae.googleusercontent.com')
+    assert hostname_matches('crawl-66-249-66-1.googlebot.com', domains)
+    assert hostname_matches('googlebot.com', domains)
+    assert not hostname_matches('evilgooglebot.com', domains)
+    assert not hostname_matches('34-1-2-3.bc.googleusercontent.com', domains)
+
+
+def test_verify_forward_confirmed_hostname():
+    verifier = make_verifier({'66.249.66.1': ['crawl-66-249-66-1.googlebot.com.']},
+                             {'crawl-66-249-66-1.googlebot.com': ['66.249.66.1']})
+    result = verifier.verify('googlebot', '66.249.66.1')
+    assert result['is_authentic'] is True
+    assert result['reason'] == 'verified'
+
+
+def test_verify_ipv4_mapped_address():
+    verifier = make_verifier({'66.249.66.1': ['crawl-66-249-66-1.googlebot.com']},
+                             {'crawl-66-249-66-1.googlebot.com': ['66.249.66.1']})
+    result = verifier.verify('googlebot', '::ffff:66.249.66.1')
+    assert result['is_authentic'] is True
+    assert result['forward_confirmed'] is True
+
+
+def test_verify_rejects_forward_mismatch_and_foreign_domain():
+    verifier = make_verifier({'1.2.3.4': ['crawl.googlebot.com'], '5.6.7.8': ['vm.bc.googleusercontent.com']},
+                             {'crawl.googlebot.com': ['9.9.9.9'], 'vm.bc.googleusercontent.com': ['5.6.7.8']})
+    assert verifier.verify('googlebot', '1.2.3.4')['reason'] == 'forward_mismatch'
+    assert verifier.verify('googlebot', '5.6.7.8')['reason'] == 'foreign_domain'
+    assert verifier.verify('googlebot', '10.0.0.1')['reason'] == 'no_ptr'
+
+
+def test_verify_without_dns_rule_is_inconclusive():
+    assert make_verifier().verify('openai', '1.2.3.4')['is_authentic'] is None
+
+
+def test_comprehensive_check_ipv4_mapped_googlebot_is_authentic():
+    checker = BotsChecker(
+        ip_ranges=IPRanges({'googlebot': ['66.249.64.0/19']}),
+        dns_verifier=make_verifier({'66.249.66.1': ['crawl-66-249-66-1.googlebot.com']},
+                                   {'crawl-66-249-66-1.googlebot.com': ['66.249.66.1']}))
+    result = checker.comprehensive_check(GOOGLEBOT_UA, '::ffff:66.249.66.1')
+    validation = result['bot_validations']['googlebot']
+    assert validation['ip_range_valid'] is True
+    assert validation['dns_validation']['is_authentic'] is True
+    assert result['summary']['is_legitimate_bot'] is True
@@ -0,0 +1,67 @@
+"""
+Tests des plages IP publiées : normalisation des adresses et recherche par intervalles
+"""
+
+import json
+import logging
+
+import numpy as np
+
+from core.ip_ranges import IntervalIndex, IPRanges, get_ip_ranges, parse_ip, read_prefixes
+
+
+def test_parse_ip_unmaps_ipv4_mapped_addresses():
+    assert str(parse_ip('::ffff:66.249.66.1')) == '66.249.66.1'
+    assert parse_ip('2001:db8::1').version == 6
+    assert parse_ip('999.1.1.1') is None
+
+
+def test_read_prefixes_vendor_format_and_plain_list():
+    content = {'creationTime': '2024-01-01', 'prefixes': [{'ipv4Prefix': '66.249.64.0/27'},
+                                                          {'ipv6Prefix': '2001:4860:4801:10::/64'}]}
+    assert read_prefixes(content) == (['66.249.64.0/27', '2001:4860:4801:10::/64'], '2024-01-01')
+    assert read_prefixes(['1.2.3.0/24']) == (['1.2.3.0/24'], None)
+
+
+def test_interval_index_merges_adjacent_and_overlapping_intervals():
+    index = IntervalIndex([(10, 20), (21, 30), (25, 40), (50, 60)], 4)
+    assert index.size == 2
+    found = index.contains_encoded(np.array([9, 10, 35, 40, 41, 55, 61], dtype=np.uint32))
+    assert found.tolist() == [False, True, True, True, False, True, False]
+
+
+def test_contains_ipv4_ipv6_and_mapped():
+    ranges = IPRanges({'googlebot': ['66.249.64.0/27', '2001:4860:4801:10::/64', 'invalide']})
+    assert ranges.contains('googlebot', '66.249.64.5') is True
+    assert ranges.contains('googlebot', '66.249.64.32') is False
+    assert ranges.contains('googlebot', '::ffff:66.249.64.5') is True
+    assert ranges.contains('googlebot', '2001:4860:4801:10::1') is True
+    assert ranges.contains('googlebot', '2001:4860:4801:11::1') is False
+    assert ranges.contains('googlebot', 'pas une ip') is None
+    assert ranges.contains('openai', '66.249.64.5') is None
+
+
+def test_contains_many_matches_contains():
+    ranges = IPRanges({'googlebot': ['66.249.64.0/27', '2001:4860:4801:10::/64']})
+    ips = ['66.249.64.5', '66.249.64.32', '::ffff:66.249.64.5', '2001:4860:4801:10::1', 'x', None,
+           '66.249.64.5']
+    assert ranges.contains_many('googlebot', ips).tolist() == [True, False, True, True, None, None, True]
+    assert ranges.contains_many('openai', ips).tolist() == [None] * len(ips)
+
+
+def test_from_directory_reads_vendor_files(tmp_path):
+    (tmp_path / 'googlebot.json').write_text(json.dumps({'prefixes': [{'ipv4Prefix': '66.249.64.0/27'}]}))
+    ranges = IPRanges.from_directory(str(tmp_path))
+    assert ranges.families == ['googlebot']
+    assert ranges.sources['googlebot'].prefixes == 1
+
+
+def test_empty_range_directory_logs_a_warning(tmp_path, monkeypatch, caplog):
+    monkeypatch.setenv('UA_CHECKER_IP_RANGES', str(tmp_path))
+    get_ip_ranges.cache_clear()
+    try:
+        with caplog.at_level(logging.WARNING, logger='core.ip_ranges'):
+            assert get_ip_ranges().families == []
+    finally:
+        get_ip_ranges.cache_clear()
+    assert '--update-ip-ranges' in caplog.text
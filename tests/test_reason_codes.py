@@ -0,0 +1,49 @@
+"""
+Tests des codes de raison : portée des directives X-Robots-Tag et codes HTTP
+"""
+
+from core import reason_codes
+from core.bot_definitions import BOT_DEFINITIONS
+from core.reason_codes import has_noindex_header, product_tokens
+
+GPTBOT = BOT_DEFINITIONS['openai']['user_agents']['GPTBot']
+GOOGLEBOT_MOBILE = BOT_DEFINITIONS['googlebot']['user_agents']['Googlebot-Mobile']
+
+
+def test_product_tokens_ignore_browser_tokens():
+    assert product_tokens('Googlebot-Mobile', GOOGLEBOT_MOBILE) == {'googlebot', 'googlebot-mobile'}
+    assert 'mozilla' not in product_tokens('GPTBot', GPTBOT)
+
+
+def test_unscoped_directives_apply_to_every_user_agent():
+    assert has_noindex_header('noindex', 'GPTBot', GPTBOT)
+    assert has_noindex_header('NOINDEX, nofollow', 'GPTBot', GPTBOT)
+    assert has_noindex_header('none', 'GPTBot', GPTBOT)
+    assert not has_noindex_header('', 'GPTBot', GPTBOT)
+    assert not has_noindex_header('noindexer, nosnippet', 'GPTBot', GPTBOT)
+
+
+def test_scoped_directives_apply_only_to_the_named_user_agent():
+    assert not has_noindex_header('otherbot: noindex', 'GPTBot', GPTBOT)
+    assert not has_noindex_header('googlebot: none', 'GPTBot', GPTBOT)
+    assert has_noindex_header('gptbot: noindex, nofollow', 'GPTBot', GPTBOT)
+    assert has_noindex_header('googlebot: noindex', 'Googlebot-Mobile', GOOGLEBOT_MOBILE)
+    assert not has_noindex_header('googlebot: nofollow, otherbot: noindex, nofollow', 'GPTBot', GPTBOT)
+
+
+def test_valued_directives_are_not_scopes():
+    assert has_noindex_header('unavailable_after: 2020-09-21, noindex', 'GPTBot', GPTBOT)
+    assert not has_noindex_header('max-snippet: 20, nosnippet', 'GPTBot', GPTBOT)
+
+
+def test_scope_resets_on_each_header_line():
+    lines = ['otherbot: nofollow', 'noindex']
+    assert has_noindex_header(lines, 'GPTBot', GPTBOT)
+    assert not has_noindex_header(['otherbot: nofollow', 'otherbot: noindex'], 'GPTBot', GPTBOT)
+
+
+def test_http_code():
+    assert reason_codes.http_code(404) == reason_codes.HTTP_404
+    assert reason_codes.http_code(301) == reason_codes.HTTP_3XX
+    assert reason_codes.http_code(418) == reason_codes.HTTP_4XX
+    assert reason_codes.http_code(503) == reason_codes.HTTP_5XX
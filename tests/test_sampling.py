@@ -0,0 +1,53 @@
+"""
+Tests de l'échantillonnage stratifié : strates, allocation et estimation
+"""
+
+import math
+
+from core.sampling import SamplePlan, Stratum, StrataIndex, _stratified, allocate, estimate_coverage, rule_prefixes
+
+
+def test_rule_prefixes_keep_the_fixed_part_of_each_rule():
+    robots = 'User-agent: *\nDisallow: /private/\nAllow: /blog/*.html$\nDisallow: /\nDisallow: *.pdf\n'
+    assert rule_prefixes(robots) == ['/blog/', '/private/']
+
+
+def test_strata_index_uses_the_longest_prefix_then_the_first_segment():
+    index = StrataIndex(['/blog/', '/blog/2019/'])
+    assert index.stratum_for('/blog/2019/post') == '/blog/2019/'
+    assert index.stratum_for('/blog/post') == '/blog/'
+    assert index.stratum_for('/shop/item') == '/shop/'
+    assert index.stratum_for('/about') == '/'
+
+
+def test_allocate_is_proportional_with_one_per_stratum():
+    assert allocate({'a': 100, 'b': 10, 'c': 1}, 12) == {'a': 9, 'b': 2, 'c': 1}
+    assert sum(allocate({'a': 4000, 'b': 3000, 'c': 2000, 'd': 1}, 30).values()) == 30
+
+
+def test_allocate_never_exceeds_populations_or_budget():
+    assert allocate({'a': 2, 'b': 1}, 10) == {'a': 2, 'b': 1}
+    assert allocate({'a': 5, 'b': 5, 'c': 5}, 2) == {'a': 1, 'b': 1}
+    assert allocate({'a': 0, 'b': 3}, 2) == {'b': 2}
+
+
+def test_stratified_estimate_and_interval():
+    estimate, low, high = _stratified([(900, 10, 10), (100, 10, 0)])
+    assert math.isclose(estimate, 0.9)
+    assert 0 <= low < estimate < high <= 1
+    assert _stratified([(5, 5, 5)]) == (1.0, 1.0, 1.0)
+    assert all(math.isnan(value) for value in _stratified([]))
+
+
+def test_estimate_coverage_is_per_user_agent_and_skips_na():
+    def result(*statuses):
+        return {'results': {'openai': {'tests': [{'user_agent_name': name, 'status': status}
+                                                 for name, status in zip(('GPTBot', 'ChatGPT-User'), statuses)]}}}
+
+    plan = SamplePlan(site='https://example.com/', strata={
+        '/a/': Stratum('/a/', 3, sample=['u1', 'u2']), '/b/': Stratum('/b/', 1, sample=['u3'])})
+    results = {'u1': result('KO', 'OK'), 'u2': result('KO', 'OK'), 'u3': result('NA', 'OK')}
+    estimates = estimate_coverage(plan, results, ['openai'])
+    assert estimates[('openai', 'GPTBot')].tested == 2
+    assert estimates[('openai', 'GPTBot')].estimate == 0.0
+    assert estimates[('openai', 'ChatGPT-User')].estimate == 1.0
@@ -0,0 +1,93 @@
+"""
+Tests de la file de travail SQLite : répartition par hôte, réservation, bail, publication et arrêt
+"""
+
+import sqlite3
+import time
+
+from core.cancellation import CANCELLED, DEADLINE_EXCEEDED
+from core.sharding import ShardQueue, shard_for
+
+URLS = [f'https://site{index}.example/page' for index in range(10)]
+
+
+def make_queue(tmp_path):
+    return ShardQueue(str(tmp_path / 'queue.db'))
+
+
+def test_shard_for_is_stable_per_host():
+    assert shard_for('https://Example.com/a', 4) == shard_for('http://example.com/b?x=1', 4)
+    assert shard_for('example.com', 4) == shard_for('https://example.com/', 4)
+    assert {shard_for(url, 3) for url in URLS} <= {0, 1, 2}
+
+
+def test_claim_reserves_each_url_once(tmp_path):
+    queue = make_queue(tmp_path)
+    run_id = queue.create_run(URLS, ['openai'], 1)
+    first = queue.claim([0], 'a', limit=4, run_id=run_id)
+    second = queue.claim([0], 'b', limit=20, run_id=run_id)
+    assert len(first) == 4 and len(second) == 6
+    assert {row[0] for row in first}.isdisjoint(row[0] for row in second)
+    assert queue.claim([0], 'c', run_id=run_id) == []
+    assert queue.in_progress(run_id) == 10
+
+
+def test_claim_only_returns_requested_shards(tmp_path):
+    queue = make_queue(tmp_path)
+    run_id = queue.create_run(URLS, ['openai'], 3)
+    rows = queue.claim([1], 'a', limit=100, run_id=run_id)
+    assert {row[3] for row in rows} == {url for url in URLS if shard_for(url, 3) == 1}
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    queue = make_queue(tmp_path)
+    run_id = queue.create_run(URLS[:2], ['openai'], 1)
+    queue.claim([0], 'dead', run_id=run_id, lease=300)
+    assert queue.claim([0], 'b', run_id=run_id, lease=300) == []
+    time.sleep(0.05)
+    assert len(queue.claim([0], 'b', run_id=run_id, lease=0.01)) == 2
+
+
+def test_complete_is_idempotent_and_results_are_incremental(tmp_path):
+    queue = make_queue(tmp_path)
+    run_id = queue.create_run(URLS[:3], ['openai'], 1)
+    rows = queue.claim([0], 'a', run_id=run_id)
+    queue.complete(rows[0][0], run_id, rows[0][2], {'url': rows[0][3]})
+    queue.complete(rows[0][0], run_id, rows[0][2], {'url': 'doublon'})
+    published = queue.results_since(run_id)
+    assert [(position, result['url']) for _, position, result in published] == [(0, URLS[0])]
+    queue.complete(rows[1][0], run_id, rows[1][2], {'url': rows[1][3]})
+    assert [position for _, position, _ in queue.results_since(run_id, published[-1][0])] == [1]
+    assert queue.remaining([0], run_id) == 1
+
+
+def test_cancel_removes_pending_urls_and_flags_the_run(tmp_path):
+    queue = make_queue(tmp_path)
+    run_id = queue.create_run(URLS, ['openai'], 1)
+    queue.claim([0], 'a', limit=2, run_id=run_id)
+    queue.cancel(run_id)
+    assert queue.claim([0], 'b', run_id=run_id) == []
+    assert queue.in_progress(run_id) == 2
+    assert queue.cancelled_runs([run_id]) == [run_id]
+    assert queue.run_token(run_id).reason == CANCELLED
+
+
+def test_run_token_carries_the_deadline(tmp_path):
+    queue = make_queue(tmp_path)
+    past = queue.create_run(URLS[:1], ['openai'], 1, deadline=time.time() - 1)
+    future = queue.create_run(URLS[:1], ['openai'], 1, deadline=time.time() + 60)
+    unbounded = queue.create_run(URLS[:1], ['openai'], 1)
+    assert queue.run_token(past).reason == DEADLINE_EXCEEDED
+    assert queue.run_token(future).reason is None
+    assert queue.run_token(unbounded).deadline is None
+    assert queue.run_bots(future) == ['openai']
+
+
+def test_queue_created_before_deadline_columns_is_migrated(tmp_path):
+    path = str(tmp_path / 'old.db')
+    with sqlite3.connect(path) as connection:
+        connection.execute('CREATE TABLE runs (run_id TEXT PRIMARY KEY, bots TEXT NOT NULL, '
+                           'shards INTEGER NOT NULL, total INTEGER NOT NULL, created REAL NOT NULL)')
+    queue = ShardQueue(path)
+    run_id = queue.create_run(URLS[:1], ['openai'], 1, deadline=time.time() + 60)
+    assert queue.run_token(run_id).reason is None
@@ -2,11 +2,12 @@
 Composants UI réutilisables pour l'interface Streamlit
 """
 
+import os
+import tempfile
+
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-import base64
-from io import BytesIO
 
 from core.bot_definitions import BOT_MAPPING
 
@@ -84,6 +85,68 @@ class UIComponents:
         
         return selected_bots
     
+    @staticmethod
+    def render_run_settings():
+        """Réglages d'exécution : durée maximale de l'analyse (en secondes, None = illimitée)"""
+        st.sidebar.markdown("### ⏱️ Exécution")
+        max_minutes = st.sidebar.number_input(
+            "Durée max de l'analyse (min)",
+            min_value=0,
+            value=0,
+            step=1,
+            help="Au-delà, les tests restants sont marqués NA (Délai dépassé). 0 = illimitée",
+            key="run_deadline_minutes"
+        )
+        return max_minutes * 60 if max_minutes else None
+    
+    @staticmethod
+    def render_audit_settings():
+        """Mode audit robots.txt seul : chemins évalués sur chaque site, None si le mode est désactivé"""
+        robots_only = st.sidebar.toggle(
+            "📄 Audit robots.txt seul",
+            value=False,
+            help="Une seule requête par site (son robots.txt), sans visiter les pages : "
+                 "pas de contrôle des codes HTTP ni des meta noindex",
+            key="robots_only"
+        )
+        if not robots_only:
+            return None
+        paths_text = st.sidebar.text_input(
+            "Chemins évalués en plus de l'URL",
+            placeholder="/blog/ /produits/",
+            help="Séparés par des espaces, évalués sur l'hôte de chaque URL",
+            key="robots_only_paths"
+        )
+        return paths_text.split()
+    
+    @staticmethod
+    def render_profiling_toggle():
+        """Active le profilage (CPU + mémoire) de la prochaine analyse et de son affichage"""
+        return st.sidebar.toggle(
+            "🔬 Mode profilage",
+            value=False,
+            help="Échantillonne la pile de tous les threads et trace les allocations "
+                 "pendant l'analyse et l'affichage des résultats (analyse ~2 à 3x plus lente)",
+            key="profiling_enabled"
+        )
+    
+    @staticmethod
+    def render_profile_report(report):
+        """Rapport de profilage : composants, fonctions coûteuses et sites d'allocation"""
+        with st.expander("🔬 Rapport de profilage", expanded=True):
+            data = report.to_dict()
+            if data['components']:
+                st.bar_chart(pd.Series(data['components'], name='% des échantillons'), horizontal=True)
+            text = report.to_text()
+            st.code(text, language=None)
+            st.download_button(
+                "📥 Télécharger le rapport",
+                data=text,
+                file_name=f"profil_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                mime="text/plain",
+                key="download_profile_report"
+            )
+    
     @staticmethod
     def render_url_input():
         """Interface d'entrée des URLs"""
@@ -145,13 +208,19 @@ class UIComponents:
         return urls
     
     @staticmethod
-    def get_download_link(df, filename):
-        """Génère un lien de téléchargement pour le fichier Excel"""
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Results')
-        
-        excel_data = output.getvalue()
-        b64 = base64.b64encode(excel_data).decode()
-        href = f'<a href="data:application/vnd.openxmlformats-officedocument.spreadsheetml.sheet;base64,{b64}" download="{filename}">📥 Télécharger Excel</a>'
-        return href
+    def render_download_button(exporter, frame, filename, label="📥 Télécharger Excel"):
+        """Écrit l'export dans un fichier temporaire et le sert via un bouton de téléchargement"""
+        fd, path = tempfile.mkstemp(suffix=f'.{exporter.extension}')
+        os.close(fd)
+        try:
+            exporter.write(frame, path)
+            with open(path, 'rb') as export_file:
+                st.download_button(
+                    label,
+                    data=export_file,
+                    file_name=filename,
+                    mime=exporter.mime,
+                    use_container_width=True
+                )
+        finally:
+            os.remove(path)
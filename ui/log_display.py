@@ -0,0 +1,118 @@
+"""
+Module d'affichage de l'analyse des journaux d'accès
+"""
+
+import streamlit as st
+
+from core.log_analyzer import DEFAULT_PREFIX_DEPTH, IP_VERDICT_LABELS
+
+
+class LogAnalysisDisplay:
+    """Saisie des journaux et affichage des agrégats par bot, préfixe, jour et code HTTP"""
+
+    @staticmethod
+    def render_log_input():
+        """Chemins côté serveur (gros volumes) et/ou fichiers envoyés ; renvoie (chemins, fichiers, options)"""
+        st.subheader("📜 Journaux d'accès (format combined nginx/Apache)")
+        paths_text = st.text_area(
+            "Chemins sur le serveur (un par ligne) : fichiers, dossiers ou motifs glob",
+            placeholder="/var/log/nginx/access.log\n/var/log/apache2/\n/data/logs/*.gz",
+            height=100,
+            help="Lus directement sur le disque, sans limite de taille. Les fichiers .gz sont décompressés à la volée",
+            key="log_paths"
+        )
+        uploaded = st.file_uploader(
+            "Ou envoyer des journaux",
+            # Pas de filtre d'extension : les rotations s'appellent access.log.1, access.log.2.gz...
+            type=None,
+            accept_multiple_files=True,
+            help="Pour des fichiers de taille modeste ; préférer les chemins serveur pour les gros volumes",
+            key="log_uploader"
+        )
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            include_rotated = st.checkbox(
+                "Inclure les rotations (access.log.1, .2.gz...)", value=True, key="log_include_rotated"
+            )
+        with col2:
+            prefix_depth = st.number_input(
+                "Profondeur des préfixes de chemin", min_value=1, max_value=5,
+                value=DEFAULT_PREFIX_DEPTH, step=1, key="log_prefix_depth",
+                help="1 : /blog/ ; 2 : /blog/2024/"
+            )
+        with col3:
+            workers = st.number_input(
+                "Processus", min_value=0, max_value=64, value=0, step=1, key="log_workers",
+                help="Processus d'analyse en parallèle. 0 = un par cœur"
+            )
+
+        verify_dns = st.checkbox(
+            "Vérifier par DNS inverse et direct les bots sans plages IP publiées",
+            value=False, key="log_verify_dns",
+            help="Googlebot, Bingbot, YandexBot : une double résolution par IP distincte, mise en cache"
+        )
+
+        paths = [line.strip() for line in (paths_text or '').splitlines() if line.strip()]
+        options = {'include_rotated': include_rotated, 'prefix_depth': int(prefix_depth),
+                   'workers': int(workers) or None, 'verify_dns': verify_dns}
+        return paths, uploaded or [], options
+
+    @staticmethod
+    def render_log_analysis(analysis):
+        """Métriques globales, activité par bot et par jour, préfixes et codes HTTP"""
+        stats = analysis.stats
+        if analysis.stopped:
+            st.warning("⏹️ Analyse interrompue : agrégats partiels")
+        if stats.malformed:
+            st.caption(f"⚠️ {stats.malformed:,} ligne(s) hors format combined ignorée(s)".replace(',', ' '))
+
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Fichiers", len(analysis.files))
+        col2.metric("Lignes", f"{stats.lines:,}".replace(',', ' '))
+        share = stats.bot_lines / stats.lines * 100 if stats.lines else 0
+        col3.metric("Requêtes de bots", f"{stats.bot_lines:,}".replace(',', ' '), f"{share:.1f} %", delta_color="off")
+        col4.metric("Durée", f"{analysis.seconds:.1f} s",
+                    f"{stats.bytes_read / 1024 ** 2 / analysis.seconds:.0f} Mo/s" if analysis.seconds else None,
+                    delta_color="off")
+
+        if analysis.aggregates.empty:
+            st.info("Aucune requête de bot connu dans ces journaux")
+            return
+
+        by_bot = analysis.by_bot()
+        col_left, col_right = st.columns(2)
+        with col_left:
+            st.markdown("#### 🤖 Requêtes par bot")
+            st.bar_chart(by_bot['hits'], horizontal=True)
+        with col_right:
+            st.markdown("#### 📅 Requêtes par jour")
+            st.line_chart(analysis.by_day())
+
+        st.markdown("#### 📦 Volume servi par bot")
+        volume = by_bot.assign(mo=(by_bot['bytes'] / 1024 ** 2).round(1))
+        st.dataframe(volume[['hits', 'mo']].rename(columns={'hits': 'Requêtes', 'mo': 'Mo servis'}),
+                     use_container_width=True)
+
+        st.markdown("#### 🗂️ Préfixes de chemin les plus visités")
+        st.dataframe(analysis.by_prefix(), use_container_width=True)
+
+        st.markdown("#### 🚦 Codes HTTP par bot")
+        st.dataframe(analysis.by_status(), use_container_width=True)
+
+        st.markdown("#### 🛡️ Vérification des adresses IP")
+        if stats.spoofed_lines:
+            st.warning(f"⚠️ {stats.spoofed_lines:,} requête(s) annoncée(s) comme bot depuis une IP hors des "
+                       "plages publiées par l'éditeur".replace(',', ' '))
+        st.dataframe(analysis.ip_verification().rename(columns=IP_VERDICT_LABELS), use_container_width=True)
+        st.caption("Plages publiées disponibles pour Googlebot, Bingbot, OpenAI, Anthropic et Perplexity "
+                   "si leurs fichiers sont présents localement ; à défaut, Googlebot, Bingbot et YandexBot "
+                   "peuvent être vérifiés par DNS. Les autres bots restent non vérifiables")
+
+        st.download_button(
+            "📥 Télécharger les agrégats (CSV)",
+            data=analysis.aggregates.to_csv(index=False),
+            file_name="bots_logs.csv",
+            mime="text/csv",
+            key="download_log_aggregates"
+        )
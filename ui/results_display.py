@@ -2,9 +2,11 @@
 Module d'affichage des résultats
 """
 
+import numpy as np
 import streamlit as st
-import pandas as pd
 
+from core.reason_codes import REASON_LABELS
+from core.results_frame import STATUS_CATEGORIES, ResultsFrame
 from .charts import ChartCreator
 
 
@@ -14,90 +16,107 @@ class ResultsDisplay:
     def __init__(self):
         self.chart_creator = ChartCreator()
     
-    def create_detailed_results_table(self, results, selected_bots):
+    def create_detailed_results_table(self, results, selected_bots, frame=None):
         """Crée un tableau détaillé avec le statut OK/KO/NA pour chaque site et crawler"""
-        table_data = []
-        
-        for result in results:
-            row = {'Site': result['original_url']}
-            
-            if 'error' in result:
-                # Si erreur globale, tous les bots sont NA
-                for bot in selected_bots:
-                    row[bot.upper()] = f"NA (Erreur: {result['error'][:30]}...)"
-            else:
-                # Analyser chaque bot avec les nouveaux résultats
-                for bot in selected_bots:
-                    if bot in result.get('results', {}):
-                        bot_result = result['results'][bot]
-                        status = bot_result.get('status', 'NA')
-                        reason = bot_result.get('reason', 'Raison inconnue')
-                        summary = bot_result.get('summary', {})
-                        
-                        # Format amélioré avec détails
-                        if status == 'OK':
-                            if summary.get('total', 0) > 1:
-                                ok_count = summary.get('ok', 0)
-                                total = summary.get('total', 1)
-                                if ok_count == total:
-                                    row[bot.upper()] = "OK (Tous UA)"
-                                else:
-                                    row[bot.upper()] = f"OK ({ok_count}/{total} UA)"
-                            else:
-                                row[bot.upper()] = "OK"
-                        elif status == 'KO':
-                            if 'Tous les UA bloqués' in reason:
-                                row[bot.upper()] = "KO (Tous bloqués)"
-                            elif 'robots.txt' in reason.lower():
-                                row[bot.upper()] = "KO (Robots.txt)"
-                            elif 'http' in reason.lower():
-                                row[bot.upper()] = "KO (HTTP)"
-                            elif 'noindex' in reason.lower():
-                                row[bot.upper()] = "KO (Meta noindex)"
-                            else:
-                                row[bot.upper()] = f"KO ({reason[:15]}...)"
-                        else:  # NA
-                            if 'timeout' in reason.lower():
-                                row[bot.upper()] = "NA (Timeout)"
-                            elif 'impossible' in reason.lower():
-                                row[bot.upper()] = "NA (Test impossible)"
-                            elif 'erreur' in reason.lower():
-                                row[bot.upper()] = "NA (Erreur réseau)"
-                            else:
-                                row[bot.upper()] = f"NA ({reason[:15]}...)"
-                    else:
-                        row[bot.upper()] = "NA (Non testé)"
-            
-            table_data.append(row)
-        
-        return pd.DataFrame(table_data)
+        if frame is None:
+            frame = ResultsFrame.from_results(results)
+        return frame.matrix(selected_bots)
     
-    def render_results(self, results, selected_bots):
-        """Affichage amélioré des résultats"""
-        st.markdown("## 📊 Résultats de l'analyse")
-        
-        # Métriques globales améliorées
-        total_urls = len(results)
-        success_count = sum(1 for r in results if 'error' not in r)
-        error_count = total_urls - success_count
+    @staticmethod
+    def highlight_status(val):
+        """Couleur de fond d'une cellule selon son statut"""
+        if isinstance(val, str):
+            if val.startswith("OK"):
+                return 'background-color: #d4edda; color: #155724'
+            elif val.startswith("KO"):
+                return 'background-color: #f8d7da; color: #721c24'
+            elif val.startswith("NA"):
+                return 'background-color: #fff3cd; color: #856404'
+        return ''
+    
+    @staticmethod
+    def filter_sites(frame, selected_bots, statuses, reason_codes, sort_by, ascending):
+        """Identifiants des sites correspondant aux filtres, dans l'ordre de tri demandé"""
+        status_matrix = frame.status_matrix(selected_bots)
+        mask = status_matrix.isin(statuses).any(axis=1).to_numpy()
+        
+        if reason_codes:
+            reasons = frame.reasons[frame.reasons['reason_code'].isin(reason_codes)]
+            tests = frame.tests.iloc[reasons['test_id'].to_numpy()]
+            matching = tests.loc[tests['bot'].isin(selected_bots), 'site_id']
+            mask = mask & frame.sites['site_id'].isin(matching.unique()).to_numpy()
+        
+        sites = frame.sites.loc[mask, ['site_id', 'site']]
+        if sort_by == 'Site':
+            sites = sites.sort_values('site', ascending=ascending, kind='stable')
+        elif sort_by in ('OK', 'KO', 'NA'):
+            counts = (status_matrix.to_numpy() == sort_by).sum(axis=1)[mask]
+            order = np.argsort(counts if ascending else -counts, kind='stable')
+            sites = sites.iloc[order]
+        elif not ascending:
+            sites = sites.iloc[::-1]
+        return sites['site_id'].to_numpy()
+    
+    def render_results_grid(self, frame, selected_bots):
+        """Tableau paginé : filtres et tri sur la vue tabulaire, style limité à la page affichée"""
+        col_bots, col_status, col_reasons = st.columns(3)
+        with col_bots:
+            bots = st.multiselect("Crawlers", selected_bots, default=selected_bots, key="grid_bots")
+        with col_status:
+            statuses = st.multiselect("Statut", STATUS_CATEGORIES, default=STATUS_CATEGORIES, key="grid_status")
+        with col_reasons:
+            present = frame.reasons['reason_code'].dropna().unique().tolist()
+            reasons = st.multiselect(
+                "Raison", present, format_func=lambda code: REASON_LABELS.get(code, code), key="grid_reasons"
+            )
+        
+        col_sort, col_order, col_size = st.columns(3)
+        with col_sort:
+            sort_by = st.selectbox(
+                "Trier par", ["Ordre d'analyse", 'Site', 'OK', 'KO', 'NA'],
+                format_func=lambda key: key if key in ("Ordre d'analyse", 'Site') else f'Nombre de {key}',
+                key="grid_sort"
+            )
+        with col_order:
+            ascending = st.radio("Ordre", ['Croissant', 'Décroissant'], horizontal=True, key="grid_order") == 'Croissant'
+        with col_size:
+            page_size = st.selectbox("Lignes par page", [25, 50, 100, 250], index=1, key="grid_page_size")
+        
+        bots = bots or selected_bots
+        site_ids = self.filter_sites(frame, bots, statuses, reasons, sort_by, ascending)
+        page_count = max(1, -(-len(site_ids) // page_size))
+        page = st.number_input(
+            f"Page (sur {page_count})", min_value=1, max_value=page_count, value=1, step=1, key="grid_page"
+        ) if page_count > 1 else 1
+        
+        # Seule la page visible est mise en forme et envoyée au navigateur
+        page_ids = site_ids[(page - 1) * page_size:page * page_size]
+        page_table = frame.matrix(bots, site_ids=page_ids)
+        styler = page_table.style
+        style_map = getattr(styler, 'map', None) or styler.applymap
+        st.dataframe(style_map(self.highlight_status), use_container_width=True, hide_index=True)
+        st.caption(f"{len(site_ids)} site(s) correspondant(s) sur {len(frame.sites)}")
+    
+    @staticmethod
+    def get_frame(results, version=None):
+        """Vue tabulaire des résultats, reconstruite uniquement quand la version change"""
+        version = version if version is not None else id(results)
+        cached = st.session_state.get('results_frame')
+        if cached is None or cached[0] != version:
+            cached = (version, ResultsFrame.from_results(results))
+            st.session_state.results_frame = cached
+        return cached[1]
+    
+    def render_metrics(self, frame):
+        """Métriques globales : URLs analysées, tests OK/KO/NA et taux de succès"""
+        total_urls = len(frame.sites)
         
         # Calcul des statistiques par statut
-        ok_count = 0
-        ko_count = 0
-        na_count = 0
-        total_tests = 0
-        
-        for result in results:
-            if 'error' not in result and 'all_tests' in result:
-                for test in result['all_tests']:
-                    total_tests += 1
-                    status = test.get('status', 'NA')
-                    if status == 'OK':
-                        ok_count += 1
-                    elif status == 'KO':
-                        ko_count += 1
-                    else:
-                        na_count += 1
+        counts = frame.status_counts()
+        ok_count = counts['ok']
+        ko_count = counts['ko']
+        na_count = counts['na']
+        total_tests = counts['total']
         
         # Affichage des métriques
         col1, col2, col3, col4, col5 = st.columns(5)
@@ -117,13 +136,14 @@ class ResultsDisplay:
         with col5:
             success_rate = (ok_count / total_tests * 100) if total_tests > 0 else 0
             st.metric("📈 Taux de succès", f"{success_rate:.1f}%")
-
-        # Graphiques avec Streamlit natif
+    
+    def render_charts(self, frame):
+        """Graphiques des raisons de blocage et des sites par crawler"""
         col_chart1, col_chart2 = st.columns(2)
         
         with col_chart1:
             st.subheader("🚫 Raisons de blocage")
-            blocking_df = self.chart_creator.create_blocking_reasons_chart(results)
+            blocking_df = self.chart_creator.create_blocking_reasons_chart(None, frame)
             if blocking_df is not None:
                 st.bar_chart(
                     blocking_df.set_index('Raison'),
@@ -135,7 +155,7 @@ class ResultsDisplay:
         
         with col_chart2:
             st.subheader("🤖 Sites par crawler")
-            bots_df = self.chart_creator.create_bots_analysis_data(results)
+            bots_df = self.chart_creator.create_bots_analysis_data(None, frame)
             if bots_df is not None:
                 chart_data = bots_df.set_index('Bot')[['Sites autorisant', 'Sites bloquant']]
                 st.bar_chart(
@@ -143,33 +163,56 @@ class ResultsDisplay:
                     horizontal=True,
                     color=['#28a745', '#dc3545']
                 )
+    
+    def render_latency_breakdown(self, frame):
+        """Graphique optionnel des temps de réponse par phase (DNS, connexion, TLS, TTFB...)"""
+        if not st.toggle("⏱️ Décomposition des temps de réponse", key="show_latency_breakdown"):
+            return
+        
+        group = st.radio("Regrouper par", ["Bot", "Hôte"], horizontal=True, key="latency_group")
+        latency_df = self.chart_creator.create_latency_breakdown_data(
+            None, frame, by='bot' if group == "Bot" else 'host'
+        )
+        if latency_df is not None:
+            st.caption("Durée moyenne par test (ms) ; les 20 plus lents sont affichés")
+            st.bar_chart(latency_df, horizontal=True)
+        else:
+            st.info("Aucune mesure de temps disponible pour ces résultats")
+    
+    def render_live_summary(self, frame, selected_bots, last_sites=20):
+        """Vue allégée pendant l'analyse : métriques, graphiques et derniers sites terminés"""
+        self.render_metrics(frame)
+        self.render_charts(frame)
+        
+        st.subheader("🕒 Derniers sites analysés")
+        recent_ids = frame.sites['site_id'].to_numpy()[-last_sites:][::-1]
+        recent = frame.matrix(selected_bots, site_ids=recent_ids)
+        styler = recent.style
+        style_map = getattr(styler, 'map', None) or styler.applymap
+        st.dataframe(style_map(self.highlight_status), use_container_width=True, hide_index=True)
+    
+    def render_results(self, results, selected_bots, version=None):
+        """Affichage amélioré des résultats"""
+        st.markdown("## 📊 Résultats de l'analyse")
+        
+        # Mise à plat unique des résultats, partagée par les métriques, graphiques et tableau
+        frame = self.get_frame(results, version)
+        
+        self.render_metrics(frame)
+        self.render_charts(frame)
+        self.render_latency_breakdown(frame)
         
         # Tableau détaillé des résultats
         st.markdown("---")
         st.subheader("📋 Résultats détaillés")
         
-        detailed_table = self.create_detailed_results_table(results, selected_bots)
-        
-        # Fonction pour colorer les cellules
-        def highlight_status(val):
-            if isinstance(val, str):
-                if val.startswith("OK"):
-                    return 'background-color: #d4edda; color: #155724'
-                elif val.startswith("KO"):
-                    return 'background-color: #f8d7da; color: #721c24'
-                elif val.startswith("NA"):
-                    return 'background-color: #fff3cd; color: #856404'
-            return ''
-        
-        # Appliquer le style et afficher le tableau complet
-        styled_table = detailed_table.style.applymap(highlight_status)
-        st.dataframe(styled_table, use_container_width=True, height=400)
+        self.render_results_grid(frame, selected_bots)
         
         # Légende mise à jour
         st.markdown("""
         **Légende (nouvelle logique):**
-        - 🟢 **OK** : Status 200 + Robots.txt autorise + Pas de meta noindex
-        - 🔴 **KO** : Status ≠ 200 OU Robots.txt bloque OU Meta noindex présent
+        - 🟢 **OK** : Status 200 + Robots.txt autorise + Pas de noindex (meta ou X-Robots-Tag)
+        - 🔴 **KO** : Status ≠ 200 OU Robots.txt bloque OU Meta noindex / X-Robots-Tag noindex présent
         - 🟡 **NA** : Test impossible (timeout, erreur réseau)
         
         **Note :** Un bot est OK si au moins un de ses User-Agents est autorisé.